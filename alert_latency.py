@@ -0,0 +1,124 @@
+# alert_latency.py
+"""
+Restock-to-alert latency: how long after a task first sees a product in
+stock the notification for it is acknowledged by Telegram.
+
+A product is "first seen" at the start of the stage that read its stock
+state, in the first run where it passed every check; the clock stops when
+the notifier confirms delivery. Products that drop out of a task's results
+(sold out, filtered) are forgotten, so their next restock is measured
+afresh, and a product is measured at most once per appearance, so cooldown
+repeats don't count.
+
+Each task keeps a rolling window of samples; their percentiles are logged,
+exported as metrics, and checked against ALERT_LATENCY_TARGET_SECONDS.
+"""
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional, Set
+
+import config
+import metrics
+from models import Product
+
+
+def percentile(values: Iterable[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile; None for no values."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class AlertLatencyTracker:
+    """Tracks restock-to-alert latency per task over a rolling window of samples."""
+
+    def __init__(self, window: int = 100, target_seconds: float = 0.0):
+        self.window = window
+        self.target_seconds = target_seconds
+        self._first_seen: Dict[str, Dict[str, float]] = {}
+        self._alerted: Dict[str, Set[str]] = {}
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, task_name: str, products: Iterable[Product], seen_at: Optional[float] = None):
+        """
+        Records the products a task run found in stock and eligible, as seen
+        at `seen_at` (now by default). Products missing from `products` are forgotten.
+        """
+        products = list(products)
+        self.seen(task_name, products, seen_at)
+        self.retain(task_name, {product.url for product in products})
+
+    def seen(self, task_name: str, products: Iterable[Product], seen_at: Optional[float] = None):
+        """
+        Records some of the products a run found in stock and eligible, e.g.
+        one streamed batch, keeping what earlier batches and runs recorded.
+        """
+        seen_at = time.time() if seen_at is None else seen_at
+        with self._lock:
+            first_seen = self._first_seen.setdefault(task_name, {})
+            alerted = self._alerted.get(task_name, set())
+            for product in products:
+                if product.url not in alerted:
+                    first_seen.setdefault(product.url, seen_at)
+
+    def retain(self, task_name: str, urls: Set[str]):
+        """Forgets the products a finished run no longer found, once it has `seen` all the others."""
+        with self._lock:
+            first_seen = self._first_seen.get(task_name, {})
+            self._first_seen[task_name] = {url: at for url, at in first_seen.items() if url in urls}
+            self._alerted[task_name] = self._alerted.get(task_name, set()) & urls
+
+    def acknowledged(self, task_name: str, product: Product, stage_seconds: Optional[Dict[str, float]] = None,
+                     acked_at: Optional[float] = None) -> Optional[float]:
+        """
+        Records that the notification for `product` was delivered; returns the
+        latency, or None when the product wasn't awaiting an alert.
+        """
+        acked_at = time.time() if acked_at is None else acked_at
+        with self._lock:
+            first_seen = self._first_seen.get(task_name, {}).pop(product.url, None)
+            if first_seen is None:
+                return None
+            self._alerted.setdefault(task_name, set()).add(product.url)
+            self._samples.setdefault(task_name, deque(maxlen=self.window)).append(acked_at - first_seen)
+        latency = acked_at - first_seen
+        metrics.RESTOCK_ALERT_SECONDS.observe(latency, task=task_name)
+        stages = ', '.join(f"{name} {seconds:.1f}s" for name, seconds in (stage_seconds or {}).items())
+        logging.info(f"'{product.title}' 自首次發現有貨至通知送達共 {latency:.1f} 秒" + (f" (本輪階段: {stages})" if stages else ""))
+        return latency
+
+    def summary(self, task_name: str) -> Dict[str, Optional[float]]:
+        with self._lock:
+            samples = list(self._samples.get(task_name, ()))
+        return {'count': len(samples), 'p50': percentile(samples, 0.5), 'p95': percentile(samples, 0.95)}
+
+    def report(self, task_name: str):
+        """Logs and exports the task's rolling percentiles, warning when p95 is over the target."""
+        summary = self.summary(task_name)
+        if not summary['count']:
+            return
+        metrics.RESTOCK_ALERT_P50_SECONDS.set(summary['p50'], task=task_name)
+        metrics.RESTOCK_ALERT_P95_SECONDS.set(summary['p95'], task=task_name)
+        logging.info(
+            f"補貨通知延遲 (最近 {summary['count']} 筆): p50 {summary['p50']:.1f} 秒, p95 {summary['p95']:.1f} 秒"
+        )
+        if self.target_seconds and summary['p95'] > self.target_seconds:
+            metrics.RESTOCK_ALERT_TARGET_BREACHES.inc(task=task_name)
+            logging.warning(
+                f"任務 '{task_name}' 的補貨通知延遲 p95 為 {summary['p95']:.1f} 秒，超過目標 {self.target_seconds:g} 秒。"
+            )
+
+    def reset(self):
+        with self._lock:
+            self._first_seen.clear()
+            self._alerted.clear()
+            self._samples.clear()
+
+
+# Singleton instance
+alert_latency_tracker = AlertLatencyTracker(config.ALERT_LATENCY_WINDOW, config.ALERT_LATENCY_TARGET_SECONDS)
@@ -0,0 +1,108 @@
+# benchmarks/__main__.py
+"""
+Runs the offline benchmark suite and writes the results as JSON.
+
+Usage:
+    python -m benchmarks [--quick] [--only parsers,checkers,cycle]
+                         [--output results.json] [--compare baseline.json]
+
+No network or Selenium Grid is needed: parsers run on saved and synthetic
+HTML, checkers and the processing cycle on synthetic products.
+"""
+import argparse
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+
+import numpy
+
+from benchmarks import checkers, cycle, parsers
+
+SUITES = {
+    'parsers': (parsers.run, [100, 1_000]),
+    'checkers': (checkers.run, [100, 1_000, 10_000, 100_000]),
+    'cycle': (cycle.run, [100, 1_000, 10_000]),
+}
+QUICK_SIZES = [100]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run_suites(names, quick: bool = False, repeat: int = 5) -> dict:
+    results = []
+    for name in names:
+        run, sizes = SUITES[name]
+        results.extend(run(QUICK_SIZES if quick else sizes, repeat=repeat))
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': numpy.__version__,
+            'quick': quick,
+        },
+        'results': results,
+    }
+
+
+def compare(report: dict, baseline: dict) -> list:
+    """Pairs results by name and returns (name, baseline_best, best, speedup) rows."""
+    previous = {r['name']: r for r in baseline.get('results', [])}
+    rows = []
+    for result in report['results']:
+        old = previous.get(result['name'])
+        if old:
+            rows.append((result['name'], old['best_seconds'], result['best_seconds'], old['best_seconds'] / result['best_seconds']))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', default=','.join(SUITES), help="Comma-separated suites to run")
+    parser.add_argument('--quick', action='store_true', help="Smallest sizes only, for a smoke run")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="Write the JSON report to this path instead of stdout")
+    parser.add_argument('--compare', help="Baseline JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    # Keep per-product INFO logs out of the measurements
+    logging.getLogger().setLevel(logging.WARNING)
+
+    names = [name.strip() for name in args.only.split(',') if name.strip()]
+    unknown = set(names) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    report = run_suites(names, quick=args.quick, repeat=args.repeat)
+
+    for result in report['results']:
+        rate = result['items_per_second']
+        print(f"{result['name']:<45} {result['best_seconds'] * 1000:10.3f} ms  {rate:14,.0f} items/s", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print("\nCompared with baseline:", file=sys.stderr)
+        for name, old, new, speedup in compare(report, baseline):
+            print(f"{name:<45} {old * 1000:10.3f} -> {new * 1000:10.3f} ms  x{speedup:.2f}", file=sys.stderr)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/blocking.py
+"""
+Measures what request blocking saves per page load, on a real Selenium Grid.
+
+Loads each URL `--repeat` times in a session without blocking and in one
+with it, and reports the median requests, transferred bytes and load time
+of both, with the savings.
+
+Usage: python -m benchmarks.blocking [--browser firefox] [--grid http://localhost:4444/wd/hub]
+       [--repeat 3] [--settle 3] [--output blocking.json] [URL ...]
+"""
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+from typing import List
+
+import config
+from scrapers.request_blocking import page_load_stats
+from scrapers.selenium_scraper import SeleniumScraper
+
+
+def _default_urls() -> List[str]:
+    urls = []
+    for task in config.TASKS:
+        params = task.get('scraper_params') or task.get('search_scraper_params') or {}
+        if params.get('search_url') and params['search_url'] not in urls:
+            urls.append(params['search_url'])
+    return urls
+
+
+def _median(samples: List[dict], key: str):
+    values = [s[key] for s in samples if s[key] is not None]
+    return statistics.median(values) if values else None
+
+
+def measure(urls: List[str], browser: str, grid_url: str, blocking: bool, repeat: int, settle: float) -> dict:
+    previous = config.REQUEST_BLOCKING
+    config.REQUEST_BLOCKING = blocking
+    try:
+        with SeleniumScraper(grid_url, browser=browser) as scraper:
+            if scraper.driver is None:
+                raise RuntimeError(f"無法連線至 Selenium Grid: {grid_url}")
+            results = {}
+            for url in urls:
+                samples = []
+                for _ in range(repeat):
+                    scraper.driver.get(url)
+                    time.sleep(settle)  # Let late scripts fire their requests
+                    samples.append(page_load_stats(scraper.driver, scraper.blocklist))
+                results[url] = {key: _median(samples, key) for key in ('requests', 'bytes', 'blocked_requests', 'load_ms')}
+            return results
+    finally:
+        config.REQUEST_BLOCKING = previous
+
+
+def run(urls: List[str], browser: str, grid_url: str, repeat: int = 3, settle: float = 3.0) -> List[dict]:
+    without = measure(urls, browser, grid_url, False, repeat, settle)
+    with_blocking = measure(urls, browser, grid_url, True, repeat, settle)
+    rows = []
+    for url in urls:
+        before, after = without[url], with_blocking[url]
+        rows.append({
+            'url': url,
+            'without_blocking': before,
+            'with_blocking': after,
+            'saved_requests': before['requests'] - after['requests'],
+            'saved_bytes': before['bytes'] - after['bytes'],
+            'saved_load_ms': before['load_ms'] - after['load_ms'] if before['load_ms'] and after['load_ms'] else None,
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('urls', nargs='*', help="Pages to load (default: the search URLs in config.TASKS)")
+    parser.add_argument('--browser', default='firefox')
+    parser.add_argument('--grid', default=config.SELENIUM_GRID_URL)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--settle', type=float, default=3.0, help="Seconds to wait after each load")
+    parser.add_argument('--output', help="Write the JSON report to this path instead of stdout")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+    rows = run(args.urls or _default_urls(), args.browser, args.grid, args.repeat, args.settle)
+
+    for row in rows:
+        print(f"{row['url']}\n    saved {row['saved_requests']} requests, {row['saved_bytes'] / 1024:.0f} KiB"
+              + (f", {row['saved_load_ms']:.0f} ms" if row['saved_load_ms'] is not None else ''), file=sys.stderr)
+    output = json.dumps({'browser': args.browser, 'results': rows}, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return rows
+
+
+if __name__ == '__main__':
+    main()
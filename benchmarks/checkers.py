@@ -0,0 +1,41 @@
+# benchmarks/checkers.py
+"""Throughput of the checkers on synthetic product sets."""
+from typing import List
+
+from benchmarks.harness import measure
+from benchmarks.synthetic import generate_products
+from checkers.keyword import KeywordChecker
+from checkers.pipeline import PipelineChecker
+from checkers.product import ProductChecker
+from checkers.stock import StockChecker
+from models import PaymentMethod
+
+KEYWORD_PARAMS = {'keywords': ['鋼彈'], 'exclude_keywords': ['預購']}
+PRODUCT_PARAMS = {'keywords': ['MGSD'], 'exclude_keywords': ['預購'], 'min_price': 800}
+STOCK_PARAMS = {
+    'max_price': 2000,
+    'blacklisted_sellers': [f"seller_{i}" for i in range(5)],
+    'acceptable_payment_methods': [PaymentMethod.CREDIT_CARD, PaymentMethod.SEVEN_ELEVEN_COD],
+}
+PIPELINE_PARAMS = {**KEYWORD_PARAMS, **STOCK_PARAMS}
+
+CHECKERS = [
+    ('KeywordChecker', KeywordChecker, KEYWORD_PARAMS),
+    ('ProductChecker', ProductChecker, PRODUCT_PARAMS),
+    ('StockChecker', StockChecker, STOCK_PARAMS),
+    ('PipelineChecker', PipelineChecker, PIPELINE_PARAMS),
+]
+
+
+def run(sizes: List[int], repeat: int = 5) -> List[dict]:
+    results = []
+    for size in sizes:
+        products = generate_products(size)
+        for name, checker_class, params in CHECKERS:
+            checker = checker_class()
+            results.append(measure(
+                f'check.{name}[{size}]',
+                lambda: checker.check(products, params),
+                items=size, repeat=repeat,
+            ))
+    return results
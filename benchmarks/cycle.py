@@ -0,0 +1,80 @@
+# benchmarks/cycle.py
+"""End-to-end `process_ruten_task` timing with stubbed scrapers and notifier."""
+import asyncio
+from typing import List
+
+from benchmarks.checkers import KEYWORD_PARAMS, STOCK_PARAMS
+from benchmarks.harness import measure
+from benchmarks.synthetic import generate_products
+from factory import get_checker
+from processors.ruten import notification_manager, process_ruten_task
+
+
+class StubSearchScraper:
+    def __init__(self, products):
+        self.products = products
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def scrape(self, params):
+        return list(self.products)
+
+
+class StubPageScraper(StubSearchScraper):
+    def scrape(self, products, params):
+        return products, {'failed_to_scrape': []}
+
+
+class StubNotifier:
+    def __init__(self):
+        self.sent = 0
+
+    async def notify(self, product, params):
+        self.sent += 1
+
+
+TASK = {
+    'name': 'benchmark',
+    'type': 'ruten',
+    'search_scraper': 'stub.search',
+    'search_scraper_params': {},
+    'keyword_checker': 'keyword.KeywordChecker',
+    'keyword_checker_params': KEYWORD_PARAMS,
+    'page_scraper': 'stub.page',
+    'stock_checker': 'stock.StockChecker',
+    'stock_checker_params': STOCK_PARAMS,
+    'notifier': 'stub.notifier',
+    'notifier_params': {},
+}
+
+
+def run(sizes: List[int], repeat: int = 5) -> List[dict]:
+    results = []
+    loop = asyncio.new_event_loop()
+    try:
+        for size in sizes:
+            products = generate_products(size)
+            scrapers = {'stub.search': StubSearchScraper(products), 'stub.page': StubPageScraper(products)}
+            notifier = StubNotifier()
+
+            def run_cycle():
+                loop.run_until_complete(process_ruten_task(
+                    TASK,
+                    get_scraper=lambda name, *args, **kwargs: scrapers[name],
+                    get_checker=get_checker,
+                    get_notifier=lambda name: notifier,
+                ))
+
+            results.append(measure(
+                f'cycle.process_ruten_task[{size}]', run_cycle, items=size, repeat=repeat,
+                # Every run should notify, as a fresh cycle would
+                setup=notification_manager._last_notified.clear,
+            ))
+    finally:
+        notification_manager._last_notified.clear()
+        loop.close()
+    return results
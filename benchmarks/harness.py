@@ -0,0 +1,30 @@
+# benchmarks/harness.py
+import statistics
+import time
+from typing import Callable, Optional
+
+
+def measure(name: str, func: Callable[[], object], items: int, repeat: int = 5, setup: Optional[Callable[[], None]] = None) -> dict:
+    """
+    Times `func` `repeat` times and returns a result record.
+
+    `items` is the number of items one call processes; throughput is derived
+    from the best run, which is the least disturbed by other load on the machine.
+    """
+    func()  # Warm up caches and lazy imports
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        'name': name,
+        'items': items,
+        'repeat': repeat,
+        'best_seconds': best,
+        'median_seconds': statistics.median(timings),
+        'items_per_second': items / best if best else None,
+    }
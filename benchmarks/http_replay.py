@@ -0,0 +1,147 @@
+# benchmarks/http_replay.py
+"""
+Replays a recorded HTTP cassette through RutenSearchAPIScraper and
+RutenProductPageAPIScraper, to measure their throughput without network.
+
+Usage:
+    # Against a cassette recorded with HTTP_CASSETTE_MODE=record
+    python -m benchmarks.http_replay --cassette cassettes/ruten.jsonl.gz --search-url "https://www.ruten.com.tw/find/?q=mgsd"
+    # Against a synthetic cassette of N products, generated on the fly
+    python -m benchmarks.http_replay --synthetic 200 --latency 0.05 --jitter 0.02
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import BaseAdapter
+
+from benchmarks.harness import measure
+from benchmarks.synthetic import (
+    generate_products, ruten_details_payload, ruten_item_page_html, ruten_price_payload,
+    ruten_product_id, ruten_search_payload,
+)
+from models import Product
+from scrapers.http_adapters import Cassette, InstrumentedAdapter, RecordingAdapter, ReplayAdapter
+from scrapers.ruten_api import RutenProductPageAPIScraper, RutenSearchAPIScraper
+
+DEFAULT_SEARCH_URL = "https://www.ruten.com.tw/find/?q=mgsd"
+
+
+class SyntheticRutenAdapter(BaseAdapter):
+    """Answers the Ruten endpoints the API scrapers call from a synthetic catalog."""
+
+    def __init__(self, products: List[Product]):
+        super().__init__()
+        self.by_id: Dict[str, Product] = {ruten_product_id(p): p for p in products}
+        self.products = products
+
+    def send(self, request, **kwargs):
+        url = urlparse(request.url)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path.endswith('/core/prod'):
+            body = json.dumps(ruten_search_payload(self.products))
+        elif url.path.endswith('/prod'):
+            body = json.dumps(ruten_details_payload([self.by_id[i] for i in query['id'].split(',')]))
+        elif url.path.endswith('/items/v2/list'):
+            body = json.dumps(ruten_price_payload(self.by_id[query['gno']]))
+        elif url.path == '/item/show':
+            body = ruten_item_page_html(self.by_id[url.query])
+        else:
+            return self._response(request, 404, 'Not Found')
+        return self._response(request, 200, body)
+
+    @staticmethod
+    def _response(request, status: int, body: str) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response._content = body.encode('utf-8')
+        response.encoding = 'utf-8'
+        response.headers['Content-Type'] = 'application/json' if body[:1] in '[{' else 'text/html; charset=utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def _session(adapter: BaseAdapter) -> requests.Session:
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def record_synthetic_cassette(path: str, count: int, search_url: str = DEFAULT_SEARCH_URL) -> Cassette:
+    """Runs both scrapers once against a synthetic catalog, recording every exchange to `path`."""
+    cassette = Cassette(path)
+    session = _session(RecordingAdapter(cassette, SyntheticRutenAdapter(generate_products(count))))
+    products = RutenSearchAPIScraper(session=session).scrape({'search_url': search_url})
+    RutenProductPageAPIScraper(session=session).scrape(products, {})
+    session.close()
+    return cassette
+
+
+def run(cassette_path: str, search_url: str = DEFAULT_SEARCH_URL, latency: float = 0.0,
+        jitter: float = 0.0, recorded_latency: bool = False, repeat: int = 3) -> List[dict]:
+    cassette = Cassette(cassette_path)
+    cassette.load()
+
+    def replay_session() -> requests.Session:
+        return _session(InstrumentedAdapter(ReplayAdapter(cassette, latency, jitter, recorded_latency, seed=0)))
+
+    search_scraper = RutenSearchAPIScraper(session=replay_session())
+    products = search_scraper.scrape({'search_url': search_url})
+    if not products:
+        raise SystemExit(f"Cassette {cassette_path} has no search results for {search_url}")
+
+    page_scraper = RutenProductPageAPIScraper(session=replay_session())
+    suffix = f"[{len(products)}, latency={latency}s±{jitter}s]"
+    return [
+        measure(f'replay.RutenSearchAPIScraper{suffix}',
+                lambda: search_scraper.scrape({'search_url': search_url}), items=len(products), repeat=repeat),
+        measure(f'replay.RutenProductPageAPIScraper{suffix}',
+                lambda: page_scraper.scrape(list(products), {}), items=len(products), repeat=repeat),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cassette', help="Recorded cassette (.jsonl.gz)")
+    parser.add_argument('--synthetic', type=int, default=100, help="Product count for a generated cassette when --cassette is not given")
+    parser.add_argument('--search-url', default=DEFAULT_SEARCH_URL)
+    parser.add_argument('--latency', type=float, default=0.0, help="Injected latency per response, in seconds")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Uniform +/- jitter on the latency, in seconds")
+    parser.add_argument('--recorded-latency', action='store_true', help="Use each response's recorded elapsed time as its latency")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="Write the JSON results to this path instead of stdout")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cassette_path = args.cassette
+        if not cassette_path:
+            cassette_path = os.path.join(tmpdir, 'synthetic.jsonl.gz')
+            record_synthetic_cassette(cassette_path, args.synthetic, args.search_url)
+        results = run(cassette_path, args.search_url, args.latency, args.jitter, args.recorded_latency, args.repeat)
+
+    for result in results:
+        print(f"{result['name']:<70} {result['best_seconds'] * 1000:10.1f} ms  {result['items_per_second']:10,.1f} items/s", file=sys.stderr)
+    output = json.dumps({'results': results}, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+# benchmarks/load.py
+"""
+Load-tests the Ruten processing path against the local mock upstream.
+
+For each task count, runs that many Ruten API tasks concurrently for a few
+cycles while the mock flips stock, and reports cycle time and the delay from
+a product's restock to its Telegram message reaching the mock.
+
+Usage: python -m benchmarks.load [--tasks 1,5,10,20] [--cycles 3] [--catalog 500]
+       [--latency-ms 20] [--flip-interval 1] [--interval 0] [--output load.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+from typing import List, Optional
+
+from benchmarks.mock_upstream import MockUpstreamServer, MockUpstreamSettings, point_config_at, restore_config
+from benchmarks.synthetic import generate_tasks
+from processors.ruten import notification_manager, process_ruten_task
+
+
+def build_tasks(count: int, base_url: str) -> List[dict]:
+    """Ruten tasks from the synthetic task generator, searching the mock."""
+    return generate_tasks(count, ruten_share=1.0, ruten_base_url=base_url)
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _summary(values: List[float]) -> dict:
+    return {
+        'count': len(values),
+        'mean': statistics.fmean(values) if values else None,
+        'p50': _percentile(values, 0.5),
+        'p95': _percentile(values, 0.95),
+        'max': max(values) if values else None,
+    }
+
+
+async def run_level(server: MockUpstreamServer, base_url: str, task_count: int, cycles: int, interval: float) -> dict:
+    tasks = build_tasks(task_count, base_url)
+    notification_manager._last_notified.clear()
+    requests_before = server.requests.copy()
+    notifications_before = len(server.notifications)
+
+    cycle_seconds = []
+    for _ in range(cycles):
+        start = time.perf_counter()
+        await asyncio.gather(*(process_ruten_task(task) for task in tasks))
+        cycle_seconds.append(time.perf_counter() - start)
+        if interval:
+            await asyncio.sleep(interval)
+
+    notifications = server.notifications[notifications_before:]
+    latencies = [n['latency_seconds'] for n in notifications if n['latency_seconds'] is not None]
+    return {
+        'tasks': task_count,
+        'cycles': cycles,
+        'cycle_seconds': _summary(cycle_seconds),
+        'notifications': len(notifications),
+        'detection_to_notification_seconds': _summary(latencies),
+        'upstream_requests': dict(server.requests - requests_before),
+    }
+
+
+def run(task_counts: List[int], cycles: int, settings: MockUpstreamSettings, interval: float = 0.0) -> List[dict]:
+    server = MockUpstreamServer(settings)
+    base_url = server.start_in_thread()
+    previous = point_config_at(base_url)
+    try:
+        return [asyncio.run(run_level(server, base_url, count, cycles, interval)) for count in task_counts]
+    finally:
+        restore_config(previous)
+        server.stop_thread()
+        notification_manager._last_notified.clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', default='1,5,10', help="Comma-separated task counts")
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--interval', type=float, default=0.0, help="Seconds to wait between cycles")
+    parser.add_argument('--catalog', type=int, default=500)
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    parser.add_argument('--latency-spread-ms', type=float, default=10.0)
+    parser.add_argument('--latency', default='lognormal')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--flip-interval', type=float, default=1.0)
+    parser.add_argument('--flip-fraction', type=float, default=0.05)
+    parser.add_argument('--output', help="Write the JSON report to this path instead of stdout")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+    settings = MockUpstreamSettings(
+        catalog_size=args.catalog, latency=args.latency, latency_ms=args.latency_ms,
+        latency_spread_ms=args.latency_spread_ms, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, flip_interval=args.flip_interval, flip_fraction=args.flip_fraction,
+    )
+    results = run([int(n) for n in args.tasks.split(',')], args.cycles, settings, args.interval)
+
+    for level in results:
+        cycle, latency = level['cycle_seconds'], level['detection_to_notification_seconds']
+        p95 = f"{latency['p95']:.2f}s" if latency['p95'] is not None else '-'
+        print(f"{level['tasks']:>4} tasks: cycle mean {cycle['mean']:.2f}s p95 {cycle['p95']:.2f}s, "
+              f"{level['notifications']} notifications, restock->notify p95 {p95}", file=sys.stderr)
+    output = json.dumps({'settings': vars(args), 'results': results}, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,375 @@
+# benchmarks/mock_upstream.py
+"""
+A local stand-in for the upstreams the monitor talks to, for load testing.
+
+Implements the endpoints the scrapers and notifier call:
+    GET  /api/search/v3/index.php/core/prod   Ruten search API (q, prc.now, sort=new/dc, limit, offset)
+    GET  /api/prod/v2/index.php/prod          Ruten product details API (id=a,b,...)
+    GET  /api/items/v2/list                   Ruten accurate price API (gno)
+    GET  /item/show?<id>                      Ruten item page with an RT.context blob
+    GET  /find/                               Ruten search result page (Selenium scraper markup)
+    GET  /products                            Pulamo search page (search)
+    POST /bot<token>/sendMessage              Telegram Bot API
+
+HTML pages carry an ETag and answer a matching If-None-Match with 304.
+Point the monitor at it with MOCK_UPSTREAM_URL=http://<host>:<port>.
+
+Usage: python -m benchmarks.mock_upstream [--port 8765] [--catalog 500]
+       [--latency-ms 50 --latency lognormal] [--error-rate 0.01] [--rate-limit-rate 0.02]
+       [--flip-interval 5 --flip-fraction 0.05]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, unquote_plus, urlsplit
+
+from benchmarks.synthetic import (
+    generate_catalog, pulamo_search_page_html, ruten_details_payload, ruten_item_page_html,
+    ruten_price_payload, ruten_product_id, ruten_search_page_html, ruten_search_payload, search_catalog,
+)
+from models import Product
+
+LATENCY_MODELS = ('fixed', 'uniform', 'lognormal')
+ITEM_ID_PATTERN = re.compile(r'item/show\?(\d+)')
+
+
+@dataclass
+class MockUpstreamSettings:
+    catalog_size: int = 500
+    seed: int = 0
+    latency: str = 'fixed'           # One of LATENCY_MODELS
+    latency_ms: float = 0.0          # Mean latency
+    latency_spread_ms: float = 0.0   # uniform: +/- range; lognormal: standard deviation
+    error_rate: float = 0.0          # Share of shop requests answered with HTTP 500
+    rate_limit_rate: float = 0.0     # Share of shop requests answered with HTTP 429
+    flip_interval: float = 0.0       # Seconds between stock flips; 0 disables them
+    flip_fraction: float = 0.05      # Share of the catalog flipped each time
+
+
+class Catalog:
+    """The mock's products, whose stock flips over time."""
+
+    def __init__(self, settings: MockUpstreamSettings):
+        self.products: List[Product] = generate_catalog(settings.catalog_size, settings.seed)
+        self.by_id: Dict[str, Product] = {ruten_product_id(p): p for p in self.products}
+        # When each product last came back in stock; products in stock from the start have no restock time
+        self.restocked_at: Dict[str, float] = {}
+        self.flip_fraction = settings.flip_fraction
+        self._rng = random.Random(settings.seed + 1)
+
+    def flip(self) -> int:
+        """Toggles stock on a random share of the catalog; returns how many came back in stock."""
+        count = max(1, int(len(self.products) * self.flip_fraction))
+        restocked = 0
+        now = time.time()
+        for product in self._rng.sample(self.products, min(count, len(self.products))):
+            product.in_stock = not product.in_stock
+            if product.in_stock:
+                self.restocked_at[ruten_product_id(product)] = now
+                restocked += 1
+        return restocked
+
+    def search(self, query: str = '', price_range: str = '') -> List[Product]:
+        return search_catalog(self.products, query, price_range)
+
+
+class MockUpstreamServer:
+    """
+    Serves the mock endpoints from an asyncio server.
+
+    Records request counts per endpoint and every Telegram message, with the
+    delay between the product's restock and the message arriving.
+    """
+
+    def __init__(self, settings: Optional[MockUpstreamSettings] = None):
+        self.settings = settings or MockUpstreamSettings()
+        self.catalog = Catalog(self.settings)
+        self.requests: Counter = Counter()
+        self.notifications: List[dict] = []
+        self._rng = random.Random(self.settings.seed + 2)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._flipper: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._message_ids = 0
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    # --- Lifecycle ---
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        if self.settings.flip_interval > 0:
+            self._flipper = asyncio.create_task(self._flip_periodically())
+        bound_host, bound_port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{bound_host}:{bound_port}"
+
+    async def stop(self):
+        if self._flipper is not None:
+            self._flipper.cancel()
+        if self._server is not None:
+            self._server.close()
+            # Idle keep-alive connections would otherwise keep wait_closed() waiting
+            for writer in list(self._connections.values()):
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+
+    def start_in_thread(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Runs the server on its own event loop thread, so blocking clients can call it; returns the base URL."""
+        started = threading.Event()
+        result = {}
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            result['url'] = self._loop.run_until_complete(self.start(host, port))
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name='mock-upstream', daemon=True)
+        self._thread.start()
+        started.wait()
+        return result['url']
+
+    def stop_thread(self):
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+
+    async def _flip_periodically(self):
+        while True:
+            await asyncio.sleep(self.settings.flip_interval)
+            self.catalog.flip()
+
+    # --- HTTP handling ---
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0) or 0))
+
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                status, content_type, payload, extra_headers = await self._route(method, target, headers, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                head = [
+                    f"HTTP/1.1 {status}",
+                    f"Content-Type: {content_type}",
+                    f"Content-Length: {len(payload)}",
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}",
+                    *extra_headers,
+                ]
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+
+    async def _route(self, method: str, target: str, headers: dict, body: bytes):
+        url = urlsplit(target)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        path = url.path
+
+        if method == 'POST' and path.endswith('/sendMessage') and path.startswith('/bot'):
+            self.requests['telegram.sendMessage'] += 1
+            return self._send_message(headers, body)
+
+        endpoint = {
+            '/api/search/v3/index.php/core/prod': 'ruten.search_api',
+            '/api/prod/v2/index.php/prod': 'ruten.details_api',
+            '/api/items/v2/list': 'ruten.price_api',
+            '/item/show': 'ruten.item_page',
+            '/find/': 'ruten.search_page',
+            '/products': 'pulamo.search_page',
+        }.get(path)
+        if endpoint is None or method != 'GET':
+            return '404 Not Found', 'text/plain', b'Not Found', []
+        self.requests[endpoint] += 1
+
+        await self._delay()
+        roll = self._rng.random()
+        if roll < self.settings.rate_limit_rate:
+            self.requests['injected.429'] += 1
+            return '429 Too Many Requests', 'text/plain', b'Too Many Requests', ['Retry-After: 1']
+        if roll < self.settings.rate_limit_rate + self.settings.error_rate:
+            self.requests['injected.500'] += 1
+            return '500 Internal Server Error', 'text/plain', b'Internal Server Error', []
+
+        catalog = self.catalog
+        try:
+            if endpoint == 'ruten.search_api':
+                matches = catalog.search(query.get('q', ''), query.get('prc.now', ''))
+                if query.get('sort') == 'new/dc':  # Newest listing (highest ID) first
+                    matches = sorted(matches, key=lambda p: int(ruten_product_id(p)), reverse=True)
+                offset = max(int(query.get('offset', 1)) - 1, 0)
+                limit = int(query.get('limit', 100))
+                payload = ruten_search_payload(matches[offset:offset + limit])
+                payload['TotalRows'] = len(matches)
+                return self._json(payload)
+            if endpoint == 'ruten.details_api':
+                ids = [i for i in query.get('id', '').split(',') if i in catalog.by_id]
+                return self._json(ruten_details_payload([catalog.by_id[i] for i in ids]))
+            if endpoint == 'ruten.price_api':
+                return self._json(ruten_price_payload(catalog.by_id[query['gno']]))
+            if endpoint == 'ruten.item_page':
+                return self._html(ruten_item_page_html(catalog.by_id[url.query]), headers)
+            if endpoint == 'ruten.search_page':
+                return self._html(ruten_search_page_html(catalog.search(unquote_plus(query.get('q', ''))), self.base_url(headers)), headers)
+            return self._html(pulamo_search_page_html(catalog.search(query.get('search', ''))), headers)
+        except (KeyError, ValueError):
+            return '404 Not Found', 'text/plain', b'Not Found', []
+
+    async def _delay(self):
+        settings = self.settings
+        if settings.latency_ms <= 0:
+            return
+        if settings.latency == 'uniform':
+            delay = settings.latency_ms + self._rng.uniform(-settings.latency_spread_ms, settings.latency_spread_ms)
+        elif settings.latency == 'lognormal':
+            # Parameterised by the distribution's mean and standard deviation
+            variance = settings.latency_spread_ms ** 2
+            sigma2 = math.log(1 + variance / settings.latency_ms ** 2)
+            delay = self._rng.lognormvariate(math.log(settings.latency_ms) - sigma2 / 2, math.sqrt(sigma2))
+        else:
+            delay = settings.latency_ms
+        await asyncio.sleep(max(delay, 0) / 1000)
+
+    def _send_message(self, headers: dict, body: bytes):
+        content_type = headers.get('content-type', '')
+        text = body.decode('utf-8', errors='replace')
+        if 'json' in content_type:
+            fields = json.loads(text or '{}')
+        else:
+            fields = {k: v[0] for k, v in parse_qs(text).items()}
+        message_text = str(fields.get('text', ''))
+        received_at = time.time()
+        match = ITEM_ID_PATTERN.search(message_text)
+        product_id = match.group(1) if match else None
+        restocked_at = self.catalog.restocked_at.get(product_id)
+        self.notifications.append({
+            'received_at': received_at,
+            'product_id': product_id,
+            'latency_seconds': received_at - restocked_at if restocked_at is not None else None,
+        })
+
+        self._message_ids += 1
+        chat_id = fields.get('chat_id', 0)
+        result = {
+            'message_id': self._message_ids,
+            'date': int(received_at),
+            'chat': {'id': int(chat_id) if str(chat_id).lstrip('-').isdigit() else 0, 'type': 'private'},
+            'text': message_text,
+        }
+        return self._json({'ok': True, 'result': result})
+
+    @staticmethod
+    def base_url(headers: dict) -> str:
+        return f"http://{headers.get('host', 'localhost')}"
+
+    @staticmethod
+    def _json(payload) -> tuple:
+        return '200 OK', 'application/json', json.dumps(payload, ensure_ascii=False).encode('utf-8'), []
+
+    def _html(self, html: str, request_headers: dict) -> tuple:
+        payload = html.encode('utf-8')
+        etag = f'"{hashlib.blake2b(payload, digest_size=8).hexdigest()}"'
+        if request_headers.get('if-none-match') == etag:
+            self.requests['conditional.304'] += 1
+            return '304 Not Modified', 'text/html; charset=utf-8', b'', [f'ETag: {etag}']
+        return '200 OK', 'text/html; charset=utf-8', payload, [f'ETag: {etag}']
+
+
+def point_config_at(base_url: str) -> Dict[str, object]:
+    """
+    Points every upstream base URL and the Telegram settings in `config` at
+    the mock, the runtime equivalent of MOCK_UPSTREAM_URL. Returns the previous
+    values for `restore_config`.
+    """
+    import config
+    overrides = {
+        'RUTEN_BASE_URL': base_url,
+        'RUTEN_API_BASE_URL': base_url,
+        'RUTEN_RAPI_BASE_URL': base_url,
+        'PULAMO_BASE_URL': base_url,
+        'TELEGRAM_API_BASE_URL': f"{base_url}/bot",
+        'TELEGRAM_BOT_TOKEN': config.TELEGRAM_BOT_TOKEN or '123456:mock-token',
+        'TELEGRAM_CHAT_ID': config.TELEGRAM_CHAT_ID or '1',
+    }
+    previous = {name: getattr(config, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    return previous
+
+
+def restore_config(previous: Dict[str, object]):
+    import config
+    for name, value in previous.items():
+        setattr(config, name, value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--catalog', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', choices=LATENCY_MODELS, default='fixed')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--latency-spread-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--flip-interval', type=float, default=0.0)
+    parser.add_argument('--flip-fraction', type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    settings = MockUpstreamSettings(
+        catalog_size=args.catalog, seed=args.seed, latency=args.latency, latency_ms=args.latency_ms,
+        latency_spread_ms=args.latency_spread_ms, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, flip_interval=args.flip_interval, flip_fraction=args.flip_fraction,
+    )
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    async def serve():
+        server = MockUpstreamServer(settings)
+        url = await server.start(args.host, args.port)
+        logging.info(f"Mock upstream 已啟動於 {url} (MOCK_UPSTREAM_URL={url})")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
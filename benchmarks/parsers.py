@@ -0,0 +1,54 @@
+# benchmarks/parsers.py
+"""Throughput of the search-result parsers on saved and synthetic HTML."""
+import os
+from typing import List
+
+from bs4 import BeautifulSoup
+
+from benchmarks.harness import measure
+from benchmarks.synthetic import generate_products, pulamo_search_page_html, ruten_search_page_html
+from scrapers.pulamo import PulamoScraper
+from scrapers.ruten import RutenSearchScraper
+
+SAVED_RUTEN_SEARCH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'temp', 'ruten_search.html')
+PULAMO_CARD_CLASS = 'meepshop-meep-ui__productList-index__productCard'
+
+
+def _bare(scraper_class):
+    # The parsers need no WebDriver, so skip __init__ and its grid connection
+    return scraper_class.__new__(scraper_class)
+
+
+def run(sizes: List[int], repeat: int = 5) -> List[dict]:
+    ruten = _bare(RutenSearchScraper)
+    pulamo = _bare(PulamoScraper)
+    results = []
+
+    if os.path.exists(SAVED_RUTEN_SEARCH):
+        with open(SAVED_RUTEN_SEARCH, encoding='utf-8') as f:
+            saved_html = f.read()
+
+        def parse_saved_page():
+            soup = BeautifulSoup(saved_html, 'html.parser')
+            return [ruten._parse_product_item(item) for item in soup.find_all('div', class_='product-item')]
+
+        # The saved page is the skeleton served before results load, so this
+        # measures the full-page soup cost rather than per-item parsing.
+        results.append(measure('parse.ruten_saved_page', parse_saved_page, items=1, repeat=repeat))
+
+    for size in sizes:
+        products = generate_products(size)
+        ruten_items = BeautifulSoup(ruten_search_page_html(products), 'html.parser').find_all('div', class_='product-item')
+        results.append(measure(
+            f'parse.ruten_search_item[{size}]',
+            lambda: [ruten._parse_product_item(item) for item in ruten_items],
+            items=size, repeat=repeat,
+        ))
+
+        pulamo_cards = BeautifulSoup(pulamo_search_page_html(products), 'html.parser').find_all('div', class_=PULAMO_CARD_CLASS)
+        results.append(measure(
+            f'parse.pulamo_product_card[{size}]',
+            lambda: [pulamo._parse_product_card(card, 'https://www.pulamo.com.tw/search') for card in pulamo_cards],
+            items=size, repeat=repeat,
+        ))
+    return results
@@ -0,0 +1,105 @@
+# benchmarks/product_memory.py
+"""
+Compares the memory footprint of the slotted `models.Product` with the
+dataclass layout it replaced, on a synthetic Ruten-like catalog.
+
+Usage: python -m benchmarks.product_memory [count]
+"""
+import gc
+import random
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from models import Product
+
+
+@dataclass
+class LegacyProduct:
+    """The pre-slots Product dataclass, kept here only as a baseline."""
+    title: str
+    price: int
+    in_stock: bool
+    url: str
+    seller: Optional[str] = None
+    payment_methods: List[str] = field(default_factory=list)
+
+
+PAYMENT_STRINGS = [
+    "PP_CRD,SEVEN_COD,FAMI_COD",
+    "SEVEN_COD,FAMI_COD,HILIFE_COD",
+    "PP_CRD",
+    "ATM,SEVEN_COD",
+]
+
+
+def _generate_rows(count: int, seed: int = 0) -> List[dict]:
+    """Builds raw rows shaped like the Ruten details API output, with fresh string objects per row."""
+    rng = random.Random(seed)
+    sellers = [f"seller_{i}" for i in range(max(1, count // 50))]
+    rows = []
+    for i in range(count):
+        rows.append({
+            'ProdName': f"MGSD 命運鋼彈 #{i}",
+            'Price': rng.randint(500, 3000),
+            'StockStatus': rng.randint(0, 3),
+            # Build new string objects, as json.loads would for every response
+            'ProdId': ''.join(['2253', str(6771547054 + i)]),
+            'SellerId': ''.join(list(rng.choice(sellers))),
+            'Payment': ''.join(list(rng.choice(PAYMENT_STRINGS))),
+        })
+    return rows
+
+
+def _build(product_class, rows: List[dict]) -> list:
+    return [
+        product_class(
+            title=row['ProdName'],
+            price=row['Price'],
+            in_stock=row['StockStatus'] > 0,
+            url=f"https://www.ruten.com.tw/item/show?{row['ProdId']}",
+            seller=row['SellerId'],
+            payment_methods=row['Payment'].split(','),
+        )
+        for row in rows
+    ]
+
+
+def measure(product_class, count: int) -> int:
+    """Returns the bytes still allocated by `count` products once the raw rows are released."""
+    rows = _generate_rows(count)
+    gc.collect()
+    tracemalloc.start()
+    products = _build(product_class, rows)
+    del rows
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del products
+    return current
+
+
+def main(count: int = 50_000) -> dict:
+    legacy = measure(LegacyProduct, count)
+    compact = measure(Product, count)
+    result = {
+        'count': count,
+        'legacy_bytes': legacy,
+        'compact_bytes': compact,
+        'legacy_bytes_per_product': legacy / count,
+        'compact_bytes_per_product': compact / count,
+        'saving_ratio': 1 - compact / legacy if legacy else 0.0,
+    }
+    print(
+        f"{count} products: dataclass {legacy / 1024:.0f} KiB "
+        f"({result['legacy_bytes_per_product']:.0f} B/item), "
+        f"slotted {compact / 1024:.0f} KiB "
+        f"({result['compact_bytes_per_product']:.0f} B/item), "
+        f"saving {result['saving_ratio']:.0%}"
+    )
+    return result
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
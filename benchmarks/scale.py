@@ -0,0 +1,229 @@
+# benchmarks/scale.py
+"""
+Scaling test: runs synthetic task lists against a synthetic catalog in-process.
+
+Generates a catalog and, for each task count, a `config.TASKS`-shaped task
+list, then runs monitoring cycles the way `main.py` does (all tasks gathered
+at once) with stub scrapers that search the catalog and a stub notifier.
+The checkers, processors and notification cooldown are the real ones.
+
+Reports, per cycle: wall and CPU time, peak and current RSS, allocated
+blocks, garbage collections, traced allocation peak (with
+--trace-allocations) and listings checked per second.
+
+Usage: python -m benchmarks.scale [--tasks 50,200,500] [--catalog 50000]
+       [--cycles 5] [--trace-allocations] [--output scale.json]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+from benchmarks.synthetic import generate_catalog, generate_tasks, search_catalog_by_url
+from factory import get_checker
+from models import Product
+from processors import process_task
+from processors.ruten import notification_manager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RUTEN_SEARCH_LIMIT = 100  # Rows per page of the Ruten search API
+
+
+class CatalogSearchScraper:
+    """Answers every search URL from the catalog; results are cached per URL, as they would not change within a cycle."""
+
+    def __init__(self, catalog: List[Product], limit: Optional[int] = None):
+        self.catalog = catalog
+        self.limit = limit
+        self.listings_returned = 0
+        self._results: Dict[str, List[Product]] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def scrape(self, params: dict) -> List[Product]:
+        search_url = params['search_url']
+        results = self._results.get(search_url)
+        if results is None:
+            results = self._results[search_url] = search_catalog_by_url(self.catalog, search_url)[:self.limit]
+        self.listings_returned += len(results)
+        return list(results)
+
+
+class PassThroughPageScraper(CatalogSearchScraper):
+    """The product page step: the catalog already has the page-level fields."""
+
+    def scrape(self, products, params):
+        return products, {'failed_to_scrape': []}
+
+
+class CountingNotifier:
+    def __init__(self):
+        self.sent = 0
+
+    async def notify(self, product, params):
+        self.sent += 1
+
+
+def _rss_bytes() -> Optional[int]:
+    """Current resident set size, where /proc is available."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # kilobytes on Linux
+
+
+def _gc_collections() -> int:
+    return sum(generation['collections'] for generation in gc.get_stats())
+
+
+async def run_cycle(tasks: List[dict], scrapers: dict, notifier: CountingNotifier) -> None:
+    get_scraper = lambda name, *args, **kwargs: scrapers[name]
+    get_notifier = lambda name: notifier
+    runs = []
+    for task in tasks:
+        runs.append(process_task(task, get_scraper=get_scraper, get_checker=get_checker, get_notifier=get_notifier))
+    await asyncio.gather(*runs)
+
+
+def run_level(catalog: List[Product], task_count: int, cycles: int, seed: int = 0, trace_allocations: bool = False) -> dict:
+    """Runs `cycles` cycles of `task_count` generated tasks and returns per-cycle measurements."""
+    tasks = generate_tasks(task_count, seed)
+    search = CatalogSearchScraper(catalog, RUTEN_SEARCH_LIMIT)
+    pulamo = CatalogSearchScraper(catalog)
+    scrapers = {
+        'ruten_api.RutenSearchAPIScraper': search,
+        'ruten_api.RutenProductPageAPIScraper': PassThroughPageScraper(catalog),
+        'pulamo.PulamoScraper': pulamo,
+    }
+    notifier = CountingNotifier()
+    notification_manager._last_notified.clear()
+
+    measurements = []
+    loop = asyncio.new_event_loop()
+    try:
+        for _ in range(cycles):
+            listings_before = search.listings_returned + pulamo.listings_returned
+            sent_before = notifier.sent
+            blocks_before = sys.getallocatedblocks()
+            collections_before = _gc_collections()
+            if trace_allocations:
+                tracemalloc.reset_peak()
+            cpu_start, wall_start = time.process_time(), time.perf_counter()
+
+            loop.run_until_complete(run_cycle(tasks, scrapers, notifier))
+
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            listings = search.listings_returned + pulamo.listings_returned - listings_before
+            measurements.append({
+                'wall_seconds': wall,
+                'cpu_seconds': cpu,
+                'listings_checked': listings,
+                'listings_per_second': listings / wall if wall else None,
+                'notifications': notifier.sent - sent_before,
+                'rss_bytes': _rss_bytes(),
+                'peak_rss_bytes': _peak_rss_bytes(),
+                'allocated_blocks_delta': sys.getallocatedblocks() - blocks_before,
+                'gc_collections': _gc_collections() - collections_before,
+                'traced_peak_bytes': tracemalloc.get_traced_memory()[1] if trace_allocations else None,
+            })
+    finally:
+        loop.close()
+        notification_manager._last_notified.clear()
+
+    # The first cycle fills the search caches; steady-state figures leave it out when there are more
+    steady = measurements[1:] or measurements
+    return {
+        'tasks': task_count,
+        'ruten_tasks': sum(1 for task in tasks if task['type'] == 'ruten'),
+        'catalog': len(catalog),
+        'cycles': measurements,
+        'summary': {
+            'median_wall_seconds': statistics.median(m['wall_seconds'] for m in steady),
+            'median_cpu_seconds': statistics.median(m['cpu_seconds'] for m in steady),
+            'median_listings_per_second': statistics.median(m['listings_per_second'] or 0 for m in steady),
+            'peak_rss_bytes': measurements[-1]['peak_rss_bytes'],
+        },
+    }
+
+
+def run(task_counts: List[int], catalog_size: int, cycles: int, seed: int = 0, trace_allocations: bool = False) -> dict:
+    if trace_allocations:
+        tracemalloc.start()
+    try:
+        catalog = generate_catalog(catalog_size, seed)
+        results = [run_level(catalog, count, cycles, seed, trace_allocations) for count in task_counts]
+    finally:
+        if trace_allocations:
+            tracemalloc.stop()
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'catalog': catalog_size,
+            'seed': seed,
+            'trace_allocations': trace_allocations,
+        },
+        'results': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', default='50,200,500', help="Comma-separated task counts")
+    parser.add_argument('--catalog', type=int, default=50_000)
+    parser.add_argument('--cycles', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--trace-allocations', action='store_true', help="Trace allocations with tracemalloc (slower)")
+    parser.add_argument('--output', help="Write the JSON report to this path instead of stdout")
+    args = parser.parse_args(argv)
+
+    # Keep per-task INFO logs out of the measurements
+    logging.getLogger().setLevel(logging.WARNING)
+
+    report = run([int(n) for n in args.tasks.split(',')], args.catalog, args.cycles, args.seed, args.trace_allocations)
+
+    for level in report['results']:
+        summary = level['summary']
+        peak = summary['peak_rss_bytes']
+        print(f"{level['tasks']:>5} tasks: wall {summary['median_wall_seconds'] * 1000:9.1f} ms, "
+              f"cpu {summary['median_cpu_seconds'] * 1000:9.1f} ms, "
+              f"{summary['median_listings_per_second']:12,.0f} listings/s, "
+              f"peak RSS {peak / 2 ** 20 if peak else 0:7.1f} MiB", file=sys.stderr)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+# benchmarks/synthetic.py
+"""
+Deterministic synthetic inputs for the benchmarks: product lists, large
+catalogs with matching `config.TASKS`-shaped task lists, search-result
+markup and Ruten API payloads in the shapes the scrapers expect.
+"""
+import itertools
+import json
+import math
+import random
+import re
+from typing import List, Tuple
+from urllib.parse import parse_qs, quote_plus, urlsplit
+
+from models import PaymentMethod, Product
+
+TITLE_WORDS = ["MGSD", "RG", "HG", "MG", "命運鋼彈", "飛翼鋼彈", "自由鋼彈", "強襲鋼彈", "萬代", "組裝模型", "預購", "現貨", "全新"]
+PAYMENT_CHOICES = [
+    [PaymentMethod.CREDIT_CARD.value, PaymentMethod.SEVEN_ELEVEN_COD.value, PaymentMethod.FAMILY_MART_COD.value],
+    [PaymentMethod.SEVEN_ELEVEN_COD.value, PaymentMethod.HILIFE_COD.value],
+    [PaymentMethod.CREDIT_CARD.value],
+    ["ATM"],
+]
+
+
+def _title(rng: random.Random, index: int) -> str:
+    return f"{' '.join(rng.sample(TITLE_WORDS, 4))} #{index}"
+
+
+def generate_products(count: int, seed: int = 0) -> List[Product]:
+    """Builds `count` products with a mix of prices, stock, sellers and payment methods."""
+    rng = random.Random(seed)
+    sellers = [f"seller_{i}" for i in range(max(1, count // 20))]
+    return [
+        Product(
+            title=_title(rng, i),
+            price=rng.randint(500, 3000),
+            in_stock=rng.random() < 0.6,
+            url=f"https://www.ruten.com.tw/item/show?{22530000000000 + i}",
+            seller=rng.choice(sellers),
+            payment_methods=list(rng.choice(PAYMENT_CHOICES)),
+        )
+        for i in range(count)
+    ]
+
+
+# --- Large catalogs and task lists, for scaling tests ---
+
+# (grade, typical price) and (Chinese name, English name) pairs; the Chinese
+# names overlap on purpose (自由鋼彈 / 攻擊自由鋼彈) as real keywords do.
+GRADES = [('MGSD', 1300), ('SD', 350), ('HG', 600), ('RG', 1000), ('MG', 1800), ('RE/100', 2400), ('PG', 6500)]
+MODELS = [
+    ('命運鋼彈', 'Destiny'), ('飛翼鋼彈', 'Wing'), ('自由鋼彈', 'Freedom'), ('攻擊自由鋼彈', 'Strike Freedom'),
+    ('強襲鋼彈', 'Strike'), ('獵魔鋼彈', 'Barbatos'), ('正義鋼彈', 'Justice'), ('無限正義鋼彈', 'Infinite Justice'),
+    ('能天使鋼彈', 'Exia'), ('獨角獸鋼彈', 'Unicorn'), ('報喪女妖', 'Banshee'), ('沙薩比', 'Sazabi'),
+    ('牛鋼', 'Nu Gundam'), ('新安洲', 'Sinanju'), ('薩克II', 'Zaku II'), ('吉翁克', 'Zeong'),
+    ('異端鋼彈 紅色機', 'Astray Red Frame'), ('風靈鋼彈', 'Aerial'), ('天意鋼彈', 'Providence'), ('脈衝鋼彈', 'Impulse'),
+]
+CONDITIONS = ['【現貨】', '【預購】', '全新', '二手', '']
+CONDITION_WEIGHTS = [45, 20, 20, 10, 5]
+# Cheap add-ons sold under the kit's name, which tasks exclude by keyword
+ACCESSORIES = ['水貼', '擴充套件', '遮蓋膠帶', '支架', 'LED 燈組']
+PAYMENT_WEIGHTS = [50, 30, 15, 5]
+
+
+def _zipf_weights(count: int, exponent: float = 1.0) -> List[float]:
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+def generate_catalog(count: int, seed: int = 0) -> List[Product]:
+    """
+    Builds a catalog of `count` listings shaped like real Gunpla searches.
+
+    Model popularity and listings per seller follow a Zipf distribution,
+    prices scatter log-normally around each grade's typical price, about
+    15% of listings are cheap accessories for a kit, and titles mix
+    Chinese and English names, condition tags and filler words.
+    """
+    rng = random.Random(seed)
+    model_weights = _zipf_weights(len(MODELS))
+    sellers = [f"seller_{i}" for i in range(max(1, count // 25))]
+    seller_cum_weights = list(itertools.accumulate(_zipf_weights(len(sellers), 0.8)))
+    products = []
+    for i in range(count):
+        grade, typical_price = rng.choice(GRADES)
+        name, english = rng.choices(MODELS, model_weights)[0]
+        condition = rng.choices(CONDITIONS, CONDITION_WEIGHTS)[0]
+        if rng.random() < 0.15:
+            title = f"{condition}{grade} {name} 專用{rng.choice(ACCESSORIES)}"
+            price = rng.randint(80, 450)
+        else:
+            extras = ' '.join(rng.sample(['萬代', 'BANDAI', '組裝模型', '鋼彈', '可動', '限定'], rng.randint(0, 3)))
+            title = f"{condition}{grade} {name} {english} Gundam {extras}".strip()
+            price = typical_price * rng.lognormvariate(0, 0.25) * (0.7 if condition == '二手' else 1)
+            price = max(100, int(round(price, -1)))
+        products.append(Product(
+            title=title,
+            price=price,
+            in_stock=rng.random() < 0.6,
+            url=f"https://www.ruten.com.tw/item/show?{22540000000000 + i}",
+            seller=rng.choices(sellers, cum_weights=seller_cum_weights)[0],
+            payment_methods=list(rng.choices(PAYMENT_CHOICES, PAYMENT_WEIGHTS)[0]),
+        ))
+    return products
+
+
+def generate_tasks(count: int, seed: int = 0, ruten_share: float = 0.7,
+                   ruten_base_url: str = "https://www.ruten.com.tw", pulamo_base_url: str = "https://www.pulamo.com.tw") -> List[dict]:
+    """
+    Builds `count` tasks in the `config.TASKS` format, watching the same
+    popular models as `generate_catalog` so that searches overlap.
+    """
+    rng = random.Random(seed)
+    model_weights = _zipf_weights(len(MODELS))
+    tasks = []
+    for i in range(count):
+        grade, typical_price = rng.choice(GRADES)
+        name, english = rng.choices(MODELS, model_weights)[0]
+        exclude_keywords = rng.sample(ACCESSORIES + ['預購', '二手'], rng.randint(1, 4))
+        label = f"{grade} {name}"
+        if rng.random() < ruten_share:
+            low, high = int(typical_price * 0.6), int(typical_price * 1.5)
+            tasks.append({
+                'name': f"Ruten - {label} #{i}",
+                'type': 'ruten',
+                'browser': 'firefox',
+                'search_scraper': 'ruten_api.RutenSearchAPIScraper',
+                'search_scraper_params': {
+                    'search_url': f"{ruten_base_url}/find/?q={quote_plus(f'{grade.lower()} {name}')}&prc.now={low}-{high}",
+                },
+                'keyword_checker': 'keyword.KeywordChecker',
+                'keyword_checker_params': {'keywords': [grade.lower(), name], 'exclude_keywords': exclude_keywords},
+                'page_scraper': 'ruten_api.RutenProductPageAPIScraper',
+                'stock_checker': 'stock.StockChecker',
+                'stock_checker_params': {
+                    'max_price': int(typical_price * rng.uniform(1.0, 1.4)),
+                    'min_price': low,
+                    'blacklisted_sellers': [f"seller_{j}" for j in rng.sample(range(50), 3)],
+                    'acceptable_payment_methods': rng.sample(list(PaymentMethod), rng.randint(1, len(PaymentMethod))),
+                },
+                'notifier': 'telegram.TelegramNotifier',
+                'notifier_params': {'name': f"{label} {english}", 'store_name': '露天拍賣'},
+            })
+        else:
+            tasks.append({
+                'name': f"Pulamo - {label} #{i}",
+                'type': 'pulamo',
+                'browser': 'firefox',
+                'scraper': 'pulamo.PulamoScraper',
+                'scraper_params': {'search_url': f"{pulamo_base_url}/products?search={quote_plus(grade)}"},
+                'checker': 'product.ProductChecker',
+                'checker_params': {
+                    'name': name,
+                    'store_name': 'Pulamo',
+                    'keywords': [grade, name],
+                    'exclude_keywords': exclude_keywords,
+                    'min_price': int(typical_price * 0.5),
+                },
+                'notifier': 'telegram.TelegramNotifier',
+                'notifier_params': {'name': name, 'store_name': 'Pulamo'},
+            })
+    return tasks
+
+
+def search_catalog(products: List[Product], query: str = '', price_range: str = '') -> List[Product]:
+    """Listings whose title contains every query term (case-insensitive) and whose price is in `low-high`."""
+    terms = [t.lower() for t in re.split(r'[\s+]+', query) if t]
+    low, high = _parse_price_range(price_range)
+    return [p for p in products if low <= p.price <= high and all(t in p.title.lower() for t in terms)]
+
+
+def search_catalog_by_url(products: List[Product], search_url: str) -> List[Product]:
+    """`search_catalog` for a Ruten (`q`, `prc.now`) or Pulamo (`search`) search URL."""
+    query = {k: v[0] for k, v in parse_qs(urlsplit(search_url).query).items()}
+    return search_catalog(products, query.get('q', query.get('search', '')), query.get('prc.now', ''))
+
+
+def _parse_price_range(price_range: str) -> Tuple[float, float]:
+    low, _, high = price_range.partition('-')
+    try:
+        return (float(low) if low else -math.inf, float(high) if high else math.inf)
+    except ValueError:
+        return -math.inf, math.inf
+
+
+def ruten_search_page_html(products: List[Product], base_url: str = "https://www.ruten.com.tw") -> str:
+    """A Ruten search result page, in the `div.product-item` markup RutenSearchScraper parses."""
+    items = [
+        '<div class="product-item"><div class="rt-product-card">'
+        f'<a href="{base_url}/item/show?{ruten_product_id(p)}" title="{p.title}" class="rt-product-card-name-wrap">'
+        f'<p class="rt-product-card-name"><svg></svg>{p.title}</p></a>'
+        '<div class="rt-product-card-price-wrap"><div class="price-range-container">'
+        f'<span class="rt-text-price rt-text-bold text-price-dollar">{p.price:,}</span>'
+        '</div></div></div></div>'
+        for p in products
+    ]
+    return f"<html><body><div class=\"search-result-container\">{''.join(items)}</div></body></html>"
+
+
+SOLD_OUT_BUTTON = '<button disabled="">已售完</button>'
+
+
+def pulamo_search_page_html(products: List[Product]) -> str:
+    """A Pulamo product list page, in the card markup PulamoScraper parses."""
+    cards = [
+        '<div class="meepshop-meep-ui__productList-index__productCard">'
+        f'<div class="meepshop-meep-ui__productList-index__productTitle">{p.title}</div>'
+        f'<div style="font-size:16px;font-weight:700">NT$ {p.price:,}</div>'
+        f'{"" if p.in_stock else SOLD_OUT_BUTTON}'
+        f'<a href="/products/{ruten_product_id(p)}">View Product</a></div>'
+        for p in products
+    ]
+    return f"<html><body>{''.join(cards)}</body></html>"
+
+
+# --- Ruten API payloads, in the shapes RutenSearchAPIScraper / RutenProductPageAPIScraper read ---
+
+def ruten_product_id(product: Product) -> str:
+    return product.url.rsplit('?', 1)[-1]
+
+
+def ruten_search_payload(products: List[Product]) -> dict:
+    """Response of the search `core/prod` API: the matching product IDs."""
+    return {'TotalRows': len(products), 'Rows': [{'Id': ruten_product_id(p)} for p in products]}
+
+
+def ruten_details_payload(products: List[Product]) -> list:
+    """Response of the `prod` details API for the given products."""
+    return [
+        {
+            'ProdId': ruten_product_id(p),
+            'ProdName': p.title,
+            'PriceRange': [p.price * 100, p.price * 100],
+            'StockStatus': 1 if p.in_stock else 0,
+            'SellerId': p.seller,
+            'Payment': ','.join(p.payment_methods),
+        }
+        for p in products
+    ]
+
+
+def ruten_item_page_html(product: Product) -> str:
+    """An item page with the meta description the Selenium page scraper reads and the `RT.context` blob the API page scraper parses."""
+    context = {
+        'item': {
+            'no': ruten_product_id(product),
+            'name': product.title,
+            'remainNum': 5 if product.in_stock else 0,
+            'payment': product.payment_methods,
+            'directPrice': product.price,
+        },
+        'seller': {'nick': product.seller},
+    }
+    remaining = context['item']['remainNum']
+    return (
+        f"<html><head><title>{product.title}</title>"
+        f'<meta name="description" content="直購價: {product.price} - {product.price}, 已賣數量: 0, 庫存: {remaining}, 物品狀況: 全新">'
+        "</head><body>"
+        f"<script>RT.context = {json.dumps(context, ensure_ascii=False)};</script>"
+        "</body></html>"
+    )
+
+
+def ruten_price_payload(product: Product) -> dict:
+    """Response of the `items/v2/list` API used for the accurate price."""
+    return {'status': 'success', 'data': [{'id': ruten_product_id(product), 'goods_price_range': {'min': product.price, 'max': product.price}}]}
@@ -1,7 +1,14 @@
 # checkers/base.py
+import logging
 from abc import ABC, abstractmethod
+from contextvars import ContextVar
 from typing import List, Optional
 from models import Product
+import tracing
+
+# Level of a checker's once-per-call summary logs; the pipeline lowers it for streamed batches,
+# where a call may check a single product
+summary_log_level: ContextVar[int] = ContextVar('checker_summary_log_level', default=logging.INFO)
 
 class BaseChecker(ABC):
     """Abstract base class for all checkers."""
@@ -15,3 +22,8 @@ class BaseChecker(ABC):
         Checks the list of products and returns the target product if found.
         """
         pass
+
+
+def traced_check(name: str):
+    """Traces a checker's `check(products, params)` call, with the product count as an attribute."""
+    return tracing.traced(name, lambda self, products, params: {'products': len(products)})
@@ -0,0 +1,99 @@
+# checkers/columnar.py
+from array import array
+from functools import cached_property
+from operator import attrgetter
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from models import Product
+
+import numpy as np
+
+# Below this many products the per-item loop is cheaper than building columns.
+BATCH_THRESHOLD = 1000
+
+
+def use_columns(count: int, params: dict) -> bool:
+    """
+    Decides whether a checker should take the columnar path.
+
+    An explicit 'batch_threshold' in params always wins over BATCH_THRESHOLD.
+    """
+    threshold = params.get('batch_threshold', BATCH_THRESHOLD)
+    return count >= threshold
+
+
+def _column(products: Sequence[Product], attribute: str, dtype) -> np.ndarray:
+    return np.fromiter(map(attrgetter(attribute), products), dtype=dtype, count=len(products))
+
+
+class ProductColumns:
+    """
+    Holds the fields the checkers filter on as parallel arrays, so that
+    price/stock/seller/payment predicates are evaluated as whole-column masks.
+
+    Columns are built on first use, so a check that never filters by seller
+    never pays for encoding sellers. Sellers are stored as integer codes;
+    code 0 means "no seller".
+    """
+
+    def __init__(self, products: Sequence[Product]):
+        self.products = products
+        self.size = len(products)
+        self.seller_codes: Dict[str, int] = {}
+
+    @cached_property
+    def prices(self):
+        return _column(self.products, 'price', np.int64)
+
+    @cached_property
+    def in_stock(self):
+        return _column(self.products, 'in_stock', bool)
+
+    @cached_property
+    def payment_masks(self):
+        return _column(self.products, 'payment_mask', np.int64)
+
+    @cached_property
+    def sellers(self):
+        # Read the slot directly; the `seller` property only adds interning on write.
+        sellers = list(map(attrgetter('_seller'), self.products))
+        codes = self.seller_codes
+        for seller in set(sellers):
+            if seller:
+                codes[seller] = len(codes) + 1
+        encoded = array('q', [codes.get(seller, 0) for seller in sellers])
+        return np.frombuffer(encoded, dtype=np.int64)
+
+    # --- Masks: each returns a boolean vector that is True where the product is rejected ---
+
+    def out_of_stock(self):
+        return ~self.in_stock
+
+    def price_above(self, max_price: int):
+        return self.prices > max_price
+
+    def price_below(self, min_price: int):
+        return self.prices < min_price
+
+    def seller_in(self, sellers: Iterable[str]):
+        column = self.sellers
+        blocked = {self.seller_codes[s] for s in sellers if s in self.seller_codes}
+        return np.isin(column, list(blocked))
+
+    def payment_missing(self, acceptable_mask: int):
+        return (self.payment_masks & acceptable_mask) == 0
+
+    def partition(self, rejections: List[Tuple[str, object]]) -> Tuple[Dict[str, List[int]], List[int]]:
+        """
+        Applies reject masks in order. Each product is attributed to the first
+        reason that rejects it, exactly like the per-item loop's `continue` chain.
+
+        Returns the rejected indices per reason and the indices that passed every mask.
+        """
+        rejected: Dict[str, List[int]] = {}
+        remaining = np.ones(self.size, dtype=bool)
+        for reason, mask in rejections:
+            hit = remaining & mask
+            rejected[reason] = np.flatnonzero(hit).tolist()
+            remaining &= ~hit
+        return rejected, np.flatnonzero(remaining).tolist()
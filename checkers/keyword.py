@@ -2,11 +2,15 @@
 import logging
 from typing import Any, Dict, List, Optional, Tuple
 from models import Product
-from checkers.base import BaseChecker
+from checkers.base import BaseChecker, traced_check
+from checkers.stats import new_title_sample
+
+logger = logging.getLogger(__name__)
 
 class KeywordChecker(BaseChecker):
     """Filters a list of products based on keywords."""
 
+    @traced_check('KeywordChecker.check')
     def check(self, products: List[Product], params: dict) -> Tuple[List[Product], Dict[str, Any]]:
         """
         Returns a sublist of products that match the given keywords and rejection stats.
@@ -16,12 +20,12 @@ class KeywordChecker(BaseChecker):
         
         stats = {
             'total_processed': len(products),
-            'rejected_keyword_mismatch': [],
-            'rejected_excluded_keyword': []
+            'rejected_keyword_mismatch': new_title_sample(params, logger),
+            'rejected_excluded_keyword': new_title_sample(params, logger)
         }
 
         if not keywords:
-            logging.warning("KeywordChecker: No keywords provided. Returning all products.")
+            logger.warning("KeywordChecker: No keywords provided. Returning all products.")
             return products, stats
 
         filtered_products = []
@@ -0,0 +1,221 @@
+# checkers/pipeline.py
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from models import Product
+from checkers.base import BaseChecker, summary_log_level, traced_check
+from checkers.stats import TitleSample, new_title_sample
+
+logger = logging.getLogger(__name__)
+
+# Stats keys match the ones KeywordChecker and StockChecker already report,
+# so RutenTaskStats can read pipeline results unchanged.
+FILTER_REASONS = {
+    'keyword': 'rejected_keyword_mismatch',
+    'exclude': 'rejected_excluded_keyword',
+    'price': 'rejected_due_to_price',
+    'stock': 'out_of_stock_titles',
+    'seller': 'rejected_due_to_seller',
+    'payment': 'rejected_due_to_payment_method',
+}
+DEFAULT_FILTER_ORDER = ['keyword', 'exclude', 'price', 'stock', 'seller', 'payment']
+
+
+class Predicate:
+    """
+    A single filter step. `test(product)` returns True when the product passes.
+
+    Keeps an exponentially smoothed cost per evaluated item and rejection rate,
+    which the pipeline uses to decide where the predicate should run.
+    """
+
+    def __init__(self, name: str, test: Callable[[Product], bool], smoothing: float = 0.3):
+        self.name = name
+        self.reason = FILTER_REASONS[name]
+        self.test = test
+        self.smoothing = smoothing
+        self.cost: Optional[float] = None
+        self.rejection_rate: Optional[float] = None
+
+    def observe(self, evaluated: int, rejected: int, elapsed: float):
+        """Folds one cycle's measurements into the running averages."""
+        if not evaluated:
+            return
+        cost = elapsed / evaluated
+        rate = rejected / evaluated
+        if self.cost is None:
+            self.cost, self.rejection_rate = cost, rate
+        else:
+            a = self.smoothing
+            self.cost = a * cost + (1 - a) * self.cost
+            self.rejection_rate = a * rate + (1 - a) * self.rejection_rate
+
+    @property
+    def rank(self) -> float:
+        """Expected cost per rejected item; lower runs earlier."""
+        if self.cost is None:
+            return 0.0
+        if not self.rejection_rate:
+            return float('inf')
+        return self.cost / self.rejection_rate
+
+
+def build_predicates(params: dict) -> List[Predicate]:
+    """Builds predicates from checker params, in the order given by params['filters']."""
+    builders = {
+        'keyword': _keyword_predicate,
+        'exclude': _exclude_predicate,
+        'price': _price_predicate,
+        'stock': _stock_predicate,
+        'seller': _seller_predicate,
+        'payment': _payment_predicate,
+    }
+    predicates = []
+    for name in params.get('filters', DEFAULT_FILTER_ORDER):
+        if name not in builders:
+            raise ValueError(f"未知的篩選條件: {name}")
+        test = builders[name](params)
+        if test is not None:
+            predicates.append(Predicate(name, test, params.get('smoothing', 0.3)))
+    return predicates
+
+
+def _keyword_predicate(params: dict):
+    keywords = [k.lower() for k in params.get('keywords', [])]
+    if not keywords:
+        return None
+    return lambda p: all(k in p.title.lower() for k in keywords)
+
+
+def _exclude_predicate(params: dict):
+    exclude_keywords = [k.lower() for k in params.get('exclude_keywords', [])]
+    if not exclude_keywords:
+        return None
+    return lambda p: not any(k in p.title.lower() for k in exclude_keywords)
+
+
+def _price_predicate(params: dict):
+    min_price = params.get('min_price')
+    max_price = params.get('max_price')
+    if min_price is None and max_price is None:
+        return None
+    low = min_price if min_price is not None else float('-inf')
+    high = max_price if max_price is not None else float('inf')
+    return lambda p: low <= p.price <= high
+
+
+def _stock_predicate(params: dict):
+    if not params.get('require_in_stock', True):
+        return None
+    return lambda p: p.in_stock
+
+
+def _seller_predicate(params: dict):
+    blacklisted = set(params.get('blacklisted_sellers', []))
+    if not blacklisted:
+        return None
+    return lambda p: not (p.seller and p.seller in blacklisted)
+
+
+def _payment_predicate(params: dict):
+    acceptable_mask = 0
+    for method in params.get('acceptable_payment_methods', []):
+        acceptable_mask |= method.flag
+    if not acceptable_mask:
+        return None
+    return lambda p: bool(p.payment_mask & acceptable_mask)
+
+
+class FilterPipeline:
+    """
+    Runs predicates stage by stage over the surviving products and, between
+    runs, reorders them so that cheap and selective predicates go first.
+
+    A rejected product is counted under the predicate that dropped it, so
+    rejection stats follow the execution order: a product failing several
+    predicates is reported for whichever of them runs first. The set of
+    products that pass never depends on the order.
+    """
+
+    def __init__(self, predicates: List[Predicate], adaptive: bool = True):
+        self.predicates = predicates
+        self.adaptive = adaptive
+        self.order = list(range(len(predicates)))
+
+    def run(self, products: List[Product], params: Optional[dict] = None) -> Tuple[List[Product], Dict[str, TitleSample]]:
+        rejected: Dict[int, List[int]] = {i: [] for i in range(len(self.predicates))}
+        survivors = list(enumerate(products))
+
+        for position in self.order:
+            predicate = self.predicates[position]
+            test = predicate.test
+            kept, dropped = [], []
+            start = time.perf_counter()
+            for item in survivors:
+                (kept if test(item[1]) else dropped).append(item)
+            predicate.observe(len(survivors), len(dropped), time.perf_counter() - start)
+            rejected[position] = [index for index, _ in dropped]
+            survivors = kept
+
+        stats = {reason: new_title_sample(params or {}, logger) for reason in FILTER_REASONS.values()}
+        for position, indices in rejected.items():
+            stats[self.predicates[position].reason].extend_from(products, sorted(indices))
+
+        if self.adaptive:
+            self.reorder()
+        return [product for _, product in survivors], stats
+
+    def reorder(self):
+        """Sorts predicates by expected cost per rejection; ties keep declared order."""
+        self.order.sort(key=lambda i: (self.predicates[i].rank, i))
+
+    @property
+    def order_names(self) -> List[str]:
+        return [self.predicates[i].name for i in self.order]
+
+
+class PipelineChecker(BaseChecker):
+    """
+    Filters products through a declarative, self-ordering predicate pipeline.
+
+    Accepts the params of KeywordChecker, ProductChecker and StockChecker
+    ('keywords', 'exclude_keywords', 'min_price', 'max_price',
+    'blacklisted_sellers', 'acceptable_payment_methods'), plus:
+        'filters': declared predicate order (defaults to DEFAULT_FILTER_ORDER),
+        'require_in_stock': set False to skip the stock predicate,
+        'adaptive': set False to keep the declared order.
+
+    Pipelines, and with them the measured costs, are kept per distinct params
+    so the ordering keeps improving across cycles; the least recently used
+    are dropped beyond MAX_PIPELINES.
+    """
+    MAX_PIPELINES = 64
+    _pipelines: 'OrderedDict[str, FilterPipeline]' = OrderedDict()
+
+    @traced_check('PipelineChecker.check')
+    def check(self, products: List[Product], params: dict) -> Tuple[List[Product], Dict[str, Any]]:
+        pipeline = self._get_pipeline(params)
+        order = pipeline.order_names
+        found_products, reasons = pipeline.run(products, params)
+
+        stats: Dict[str, Any] = {'total_processed': len(products), **reasons}
+        stats['in_stock_found_titles'] = [p.title for p in found_products]
+        logger.log(
+            summary_log_level.get(),
+            "PipelineChecker: %d 件商品中有 %d 件通過篩選，篩選順序: %s",
+            len(products), len(found_products), ' -> '.join(order)
+        )
+        return found_products, stats
+
+    def _get_pipeline(self, params: dict) -> FilterPipeline:
+        key = repr(sorted(params.items()))
+        pipeline = self._pipelines.get(key)
+        if pipeline is None:
+            pipeline = FilterPipeline(build_predicates(params), adaptive=params.get('adaptive', True))
+            self._pipelines[key] = pipeline
+            while len(self._pipelines) > self.MAX_PIPELINES:
+                self._pipelines.popitem(last=False)
+        self._pipelines.move_to_end(key)
+        return pipeline
@@ -2,11 +2,16 @@
 import logging
 from typing import List, Dict, Optional
 from models import Product
-from checkers.base import BaseChecker
+from checkers.base import BaseChecker, summary_log_level, traced_check
+from checkers.columnar import ProductColumns, use_columns
+from checkers.stats import new_title_sample
+
+logger = logging.getLogger(__name__)
 
 class ProductChecker(BaseChecker):
     """Checks for a product based on keywords and price."""
 
+    @traced_check('ProductChecker.check')
     def check(self, products: List[Product], params: dict) -> List[Product]:
         """
         Finds all products that match the given specification.
@@ -15,11 +20,32 @@ class ProductChecker(BaseChecker):
         exclude_keywords = params.get("exclude_keywords", [])
         min_price = params.get("min_price", 0)
         
-        logging.info(f"ProductChecker: 開始用 {params} 篩選 {len(products)} 件商品...")
+        logger.log(summary_log_level.get(), "ProductChecker: 開始篩選 %d 件商品...", len(products))
+        logger.debug("ProductChecker: 篩選條件 %s", params)
 
-        reasons = {'keyword': [], 'excluded': [], 'price': [], 'stock': []}
-        found_products = []
+        reasons = {reason: new_title_sample(params, logger) for reason in ('keyword', 'excluded', 'price', 'stock')}
+        if use_columns(len(products), params):
+            found_products = self._check_columns(products, reasons, keywords, exclude_keywords, min_price)
+        else:
+            found_products = self._check_rows(products, reasons, keywords, exclude_keywords, min_price)
+
+        for product in found_products:
+            logger.info("ProductChecker: 找到符合條件且有庫存的商品: %s", product.title)
+
+        if not found_products:
+            logger.log(
+                summary_log_level.get(),
+                "ProductChecker: 未找到符合條件的商品。分析結果: "
+                "%d 件因關鍵字不符, %d 件因排除關鍵字, %d 件因價格不符, %d 件因無庫存。",
+                len(reasons['keyword']), len(reasons['excluded']), len(reasons['price']), len(reasons['stock'])
+            )
+            logger.debug("被過濾的商品詳情: %s", reasons)
 
+        return found_products
+
+    def _check_rows(self, products, reasons, keywords, exclude_keywords, min_price) -> List[Product]:
+        """Checks products one at a time; cheapest for small lists."""
+        found_products = []
         for product in products:
             title_lower = product.title.lower()
 
@@ -36,19 +62,31 @@ class ProductChecker(BaseChecker):
                 continue
 
             if product.in_stock:
-                logging.info(f"ProductChecker: 找到符合條件且有庫存的商品: {product.title}")
                 found_products.append(product)
             else:
                 reasons['stock'].append(product.title)
-        
-        if not found_products:
-            logging.info(
-                f"ProductChecker: 未找到符合條件的商品。分析結果: "
-                f"{len(reasons['keyword'])} 件因關鍵字不符, "
-                f"{len(reasons['excluded'])} 件因排除關鍵字, "
-                f"{len(reasons['price'])} 件因價格不符, "
-                f"{len(reasons['stock'])} 件因無庫存。"
-            )
-            logging.debug(f"被過濾的商品詳情: {reasons}")
-
         return found_products
+
+    def _check_columns(self, products, reasons, keywords, exclude_keywords, min_price) -> List[Product]:
+        """Filters titles in Python, then evaluates price and stock as vector masks."""
+        keywords = [keyword.lower() for keyword in keywords]
+        exclude_keywords = [ex_keyword.lower() for ex_keyword in exclude_keywords]
+
+        candidates = []
+        for product in products:
+            title_lower = product.title.lower()
+            if not all(keyword in title_lower for keyword in keywords):
+                reasons['keyword'].append(product.title)
+            elif any(ex_keyword in title_lower for ex_keyword in exclude_keywords):
+                reasons['excluded'].append(product.title)
+            else:
+                candidates.append(product)
+
+        columns = ProductColumns(candidates)
+        rejected, passed = columns.partition([
+            ('price', columns.price_below(min_price)),
+            ('stock', columns.out_of_stock()),
+        ])
+        for reason, indices in rejected.items():
+            reasons[reason].extend_from(candidates, indices)
+        return [candidates[i] for i in passed]
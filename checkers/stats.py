@@ -0,0 +1,117 @@
+# checkers/stats.py
+import logging
+import math
+import random
+from typing import Iterable, List, Optional, Sequence
+
+from models import Product
+
+DEFAULT_SAMPLE_SIZE = 10
+
+
+class TitleSample:
+    """
+    Records rejected product titles for one rejection reason.
+
+    `len()` is always the exact number of rejections. Only up to `limit` titles
+    are kept, as a uniform reservoir sample (Algorithm L, so most rejections
+    cost a single comparison). With `limit=None` every title is kept.
+
+    Supports the list operations the processors and tests use on the former
+    stats lists: len, iteration, indexing, `in` and comparison with a list.
+    """
+    __slots__ = ('limit', 'count', '_titles', '_rng', '_w', '_next')
+
+    def __init__(self, limit: Optional[int] = DEFAULT_SAMPLE_SIZE):
+        self.limit = limit
+        self.count = 0
+        self._titles: List[str] = []
+        self._rng = None
+        self._w = 0.0
+        self._next = math.inf  # Index of the next rejection to enter the sample, once it is full
+
+    @property
+    def sampled(self) -> bool:
+        """True when titles have been dropped and only a sample is kept."""
+        return self.count > len(self._titles)
+
+    def append(self, title: str):
+        index = self.count
+        self.count += 1
+        if self.limit is None or index < self.limit:
+            self._titles.append(title)
+            if index + 1 == self.limit:
+                self._start_skipping()
+        elif index == self._next:
+            self._replace(title)
+
+    def extend(self, titles: Iterable[str]):
+        for title in titles:
+            self.append(title)
+
+    def extend_from(self, products: Sequence[Product], indices: Sequence[int]):
+        """Adds the titles of `products[i]` for each index, only reading the titles that get sampled."""
+        if self.limit is None:
+            self._titles.extend(products[i].title for i in indices)
+            self.count += len(indices)
+            return
+
+        position = 0
+        while position < len(indices) and self.count < self.limit:
+            self.append(products[indices[position]].title)
+            position += 1
+
+        start = self.count
+        end = start + len(indices) - position
+        while self._next < end:
+            self._replace(products[indices[position + self._next - start]].title)
+        self.count = end
+
+    def _start_skipping(self):
+        self._rng = random.Random(self.limit)
+        self._w = math.exp(math.log(self._rng.random() or 1e-12) / self.limit)
+        self._next = self.limit + self._skip()
+
+    def _skip(self) -> int:
+        return int(math.log(self._rng.random() or 1e-12) / math.log(1 - self._w))
+
+    def _replace(self, title: str):
+        self._titles[self._rng.randrange(self.limit)] = title
+        self._w *= math.exp(math.log(self._rng.random() or 1e-12) / self.limit)
+        self._next += self._skip() + 1
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self):
+        return iter(self._titles)
+
+    def __getitem__(self, index):
+        return self._titles[index]
+
+    def __contains__(self, title) -> bool:
+        return title in self._titles
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, TitleSample):
+            return self.count == other.count and self._titles == other._titles
+        if isinstance(other, list):
+            return self.count == len(other) and self._titles == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        suffix = f" (sample of {self.count})" if self.sampled else ""
+        return f"{self._titles!r}{suffix}"
+
+
+def new_title_sample(params: dict, logger: logging.Logger = None) -> TitleSample:
+    """
+    Creates the container for one rejection reason.
+
+    Keeps every title when the logger is at DEBUG, so the debug dumps stay
+    complete; otherwise keeps `params['stats_sample_size']` titles.
+    """
+    logger = logger or logging.getLogger()
+    if logger.isEnabledFor(logging.DEBUG):
+        return TitleSample(limit=None)
+    return TitleSample(limit=params.get('stats_sample_size', DEFAULT_SAMPLE_SIZE))
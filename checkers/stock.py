@@ -2,19 +2,17 @@
 import logging
 from typing import Any, Dict, List, Optional, Tuple
 
-from models import Product
-from checkers.base import BaseChecker
-from enum import Enum
+from models import Product, PaymentMethod
+from checkers.base import BaseChecker, summary_log_level, traced_check
+from checkers.columnar import ProductColumns, use_columns
+from checkers.stats import new_title_sample
 
-class PaymentMethod(Enum):
-    CREDIT_CARD = "PP_CRD"
-    SEVEN_ELEVEN_COD = "SEVEN_COD"
-    FAMILY_MART_COD = "FAMI_COD"
-    HILIFE_COD = "HILIFE_COD"
+logger = logging.getLogger(__name__)
 
 class StockChecker(BaseChecker):
     """Checks a list of products and returns all that are in stock and meet the price and seller criteria."""
 
+    @traced_check('StockChecker.check')
     def check(self, products: List[Product], params: dict) -> Tuple[List[Product], Dict[str, Any]]:
         """
         Returns all products from the list that are in stock, within the price limit,
@@ -23,6 +21,7 @@ class StockChecker(BaseChecker):
         Args:
             products: List of products to check.
             params: Dictionary of parameters, may contain 'max_price', 'blacklisted_sellers', and 'acceptable_payment_methods'.
+                'batch_threshold' sets the product count above which the columnar path is used.
 
         Returns:
             A tuple containing a list of found products and statistics.
@@ -30,21 +29,41 @@ class StockChecker(BaseChecker):
         max_price = params.get('max_price')
         blacklisted_sellers = params.get('blacklisted_sellers', [])
         acceptable_payment_methods = params.get('acceptable_payment_methods', [])
+        acceptable_payment_mask = 0
+        for method in acceptable_payment_methods:
+            acceptable_payment_mask |= method.flag
         
         stats = {
             'total_processed': len(products),
             'in_stock_found_titles': [],
-            'out_of_stock_titles': [],
-            'rejected_due_to_price': [],
-            'rejected_due_to_seller': [],
-            'rejected_due_to_payment_method': []
+            'out_of_stock_titles': new_title_sample(params, logger),
+            'rejected_due_to_price': new_title_sample(params, logger),
+            'rejected_due_to_seller': new_title_sample(params, logger),
+            'rejected_due_to_payment_method': new_title_sample(params, logger)
         }
-        found_products = []
 
         if not products:
             return [], stats
             
-        logging.info(f"StockChecker: 開始檢查 {len(products)} 件商品的庫存、價格、賣家與付款方式...")
+        logger.log(summary_log_level.get(), "StockChecker: 開始檢查 %d 件商品的庫存、價格、賣家與付款方式...", len(products))
+        if use_columns(len(products), params):
+            found_products = self._check_columns(products, stats, max_price, blacklisted_sellers, acceptable_payment_mask)
+        else:
+            found_products = self._check_rows(products, stats, max_price, blacklisted_sellers, acceptable_payment_mask)
+
+        for product in found_products:
+            logger.info("StockChecker: 找到符合條件且有庫存的商品: %s", product.title)
+            stats['in_stock_found_titles'].append(product.title)
+
+        if not found_products:
+            logger.log(summary_log_level.get(), "StockChecker: 檢查的所有商品皆不符合條件 (無庫存、價格過高、賣家黑名單或付款方式不符)。")
+            logger.debug("被過濾的商品詳情: %s", stats)
+
+        return found_products, stats
+
+    def _check_rows(self, products, stats, max_price, blacklisted_sellers, acceptable_payment_mask) -> List[Product]:
+        """Checks products one at a time; cheapest for small lists."""
+        found_products = []
         for product in products:
             if not product.in_stock:
                 stats['out_of_stock_titles'].append(product.title)
@@ -52,37 +71,38 @@ class StockChecker(BaseChecker):
 
             # Product is in stock, now check other criteria
             if max_price is not None and product.price > max_price:
-                logging.debug(f"StockChecker: 商品 '{product.title}' 有庫存，但價格 ${product.price} > ${max_price}，予以跳過。")
+                logger.debug("StockChecker: 商品 '%s' 有庫存，但價格 $%s > $%s，予以跳過。", product.title, product.price, max_price)
                 stats['rejected_due_to_price'].append(product.title)
                 continue
 
             if product.seller and product.seller in blacklisted_sellers:
-                logging.debug(f"StockChecker: 商品 '{product.title}' 的賣家 '{product.seller}' 在黑名單中，予以跳過。")
+                logger.debug("StockChecker: 商品 '%s' 的賣家 '%s' 在黑名單中，予以跳過。", product.title, product.seller)
                 stats['rejected_due_to_seller'].append(product.title)
                 continue
 
             # Check acceptable payment methods
-            if acceptable_payment_methods:
-                product_has_acceptable_payment = False
-                for acceptable_method in acceptable_payment_methods:
-                    if acceptable_method.value in product.payment_methods:
-                        product_has_acceptable_payment = True
-                        break
-                
-                if not product_has_acceptable_payment:
-                    logging.debug(f"StockChecker: 商品 '{product.title}' 的付款方式不符合要求，予以跳過。")
-                    stats['rejected_due_to_payment_method'].append(product.title)
-                    continue
+            if acceptable_payment_mask and not product.payment_mask & acceptable_payment_mask:
+                logger.debug("StockChecker: 商品 '%s' 的付款方式不符合要求，予以跳過。", product.title)
+                stats['rejected_due_to_payment_method'].append(product.title)
+                continue
 
             # This product is valid
-            logging.info(f"StockChecker: 找到符合條件且有庫存的商品: {product.title}")
-            stats['in_stock_found_titles'].append(product.title)
             found_products.append(product)
 
-        if not found_products:
-            logging.info(
-                f"StockChecker: 檢查的所有商品皆不符合條件 (無庫存、價格過高、賣家黑名單或付款方式不符)。"
-            )
-            logging.debug(f"被過濾的商品詳情: {stats}")
+        return found_products
 
-        return found_products, stats
+    def _check_columns(self, products, stats, max_price, blacklisted_sellers, acceptable_payment_mask) -> List[Product]:
+        """Evaluates every criterion as a vector mask over the whole product list."""
+        columns = ProductColumns(products)
+        rejections = [('out_of_stock_titles', columns.out_of_stock())]
+        if max_price is not None:
+            rejections.append(('rejected_due_to_price', columns.price_above(max_price)))
+        if blacklisted_sellers:
+            rejections.append(('rejected_due_to_seller', columns.seller_in(blacklisted_sellers)))
+        if acceptable_payment_mask:
+            rejections.append(('rejected_due_to_payment_method', columns.payment_missing(acceptable_payment_mask)))
+
+        rejected, passed = columns.partition(rejections)
+        for reason, indices in rejected.items():
+            stats[reason].extend_from(products, indices)
+        return [products[i] for i in passed]
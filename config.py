@@ -7,11 +7,141 @@ SELENIUM_GRID_URL = "http://selenium:4444/wd/hub"
 RETRY_DELAY_SECONDS = 5
 CHECK_INTERVAL_SECONDS = 30
 MAX_RETRIES = 10
+# Deadline for one task run; an overdue task is cancelled, ending its WebDriver sessions. 0 disables it
+TASK_TIMEOUT_SECONDS = float(os.getenv("TASK_TIMEOUT_SECONDS", "600"))
+# Tabs RutenProductPageScraper loads product pages in at once, within one WebDriver session
+RUTEN_PAGE_TABS = int(os.getenv("RUTEN_PAGE_TABS", "4"))
+
+# Hold WebDriver session requests until the grid reports a free slot for the browser
+# (tasks with a higher 'priority' go first); polls the grid /status at most this often
+GRID_SCHEDULER = os.getenv("GRID_SCHEDULER", "true").lower() == "true"
+GRID_STATUS_POLL_SECONDS = float(os.getenv("GRID_STATUS_POLL_SECONDS", "1"))
+
+# Scraper routing (a task scraper given as a list of backends, cheapest first):
+# a backend failing this many times in a row is skipped for the cooldown
+ROUTING_FAILURE_THRESHOLD = 3
+ROUTING_COOLDOWN_SECONDS = float(os.getenv("ROUTING_COOLDOWN_SECONDS", "300"))
+ROUTING_WINDOW = 20  # Recent requests per backend kept for its success rate and latency
+
+# Incremental Ruten API search ('incremental' in the search params): poll only listings newer than the
+# newest one seen per query, sorted newest first in pages of RUTEN_INCREMENTAL_PAGE_SIZE, and run the
+# full query every RUTEN_FULL_SWEEP_SECONDS to catch stock changes on older listings
+RUTEN_INCREMENTAL_SEARCH = os.getenv("RUTEN_INCREMENTAL_SEARCH", "false").lower() == "true"
+RUTEN_FULL_SWEEP_SECONDS = float(os.getenv("RUTEN_FULL_SWEEP_SECONDS", "600"))
+RUTEN_INCREMENTAL_PAGE_SIZE = 20
+RUTEN_INCREMENTAL_MAX_PAGES = 5
+
+# Price-band fan-out of broad Ruten API searches ('price_bands' in the search params, 0 for off): the
+# query's prc.now range is split into this many bands (an open range tops out at the ceiling, plus an
+# open band above it), fetched RUTEN_SEARCH_CONCURRENCY at a time; bands over one page are split again
+RUTEN_PRICE_BANDS = int(os.getenv("RUTEN_PRICE_BANDS", "0"))
+RUTEN_PRICE_BAND_CEILING = 20000
+RUTEN_SEARCH_CONCURRENCY = int(os.getenv("RUTEN_SEARCH_CONCURRENCY", "4"))
+RUTEN_BAND_MAX_PAGES = 10  # Pages read from a single-price band that can't be split
+RUTEN_DETAILS_CHUNK_SIZE = 100  # Product IDs per details API call
+
+# Ruten tasks stream products from page scraping to stock check to notification.
+# Products per page-scraper call and calls in flight; tasks can override both with 'enrich_batch_size' /
+# 'enrich_workers'. Batch size 0: RUTEN_PAGE_TABS when the task's (first) page scraper is the Selenium one,
+# so a batch loads in tabs, else 1
+RUTEN_ENRICH_BATCH_SIZE = int(os.getenv("RUTEN_ENRICH_BATCH_SIZE", "0"))
+RUTEN_ENRICH_WORKERS = int(os.getenv("RUTEN_ENRICH_WORKERS", "4"))
+# Scrapers fingerprint the payload their products come from and, when it's unchanged since the last
+# call, reuse the products (and the pipeline its check results) instead of parsing again
+PAYLOAD_FINGERPRINTS = os.getenv("PAYLOAD_FINGERPRINTS", "true").lower() == "true"
+PAYLOAD_CACHE_ENTRIES = 256  # Sources (scraper and URL or query) remembered
+# Items buffered between two pipeline stages before the producing stage waits
+PIPELINE_QUEUE_SIZE = 16
+# Products per call of a pipeline filter/check stage (the checkers vectorize large batches)
+PIPELINE_CHECK_BATCH_SIZE = 2000
+# Batch results kept by stages with 'cache': True, across cycles
+PIPELINE_CACHE_ENTRIES = int(os.getenv("PIPELINE_CACHE_ENTRIES", "256"))
+
+# --- Request Blocking (Selenium) ---
+# Hosts (shell-style globs) the browsers may not contact; ALLOWED_HOSTS wins over BLOCKED_HOSTS
+REQUEST_BLOCKING = os.getenv("REQUEST_BLOCKING", "true").lower() == "true"
+BLOCKED_HOSTS = [
+    # Analytics and tag managers
+    "*.google-analytics.com", "google-analytics.com", "*.googletagmanager.com", "*.googletagservices.com",
+    "*.hotjar.com", "*.clarity.ms", "*.newrelic.com", "*.nr-data.net",
+    # Ads
+    "*.doubleclick.net", "*.googlesyndication.com", "*.adservice.google.com", "*.criteo.com", "*.criteo.net",
+    # Social widgets
+    "*.facebook.net", "*.facebook.com", "*.fbcdn.net", "*.line-scdn.net",
+    # Web fonts
+    "fonts.googleapis.com", "fonts.gstatic.com", "use.typekit.net",
+]
+ALLOWED_HOSTS = ["ruten.com.tw", "*.ruten.com.tw", "*.rimg.com.tw", "pulamo.com.tw", "*.pulamo.com.tw"]
+# Firefox: don't download web fonts from any host
+BLOCK_WEB_FONTS = True
+# Count requests and bytes per page load (one extra WebDriver call per page, so off by default)
+PAGE_LOAD_STATS = os.getenv("PAGE_LOAD_STATS", "false").lower() == "true"
+
+# --- Logging Settings ---
+# Write logs from a background thread so stdout never blocks the event loop
+LOG_USE_QUEUE = os.getenv("LOG_USE_QUEUE", "true").lower() == "true"
+# Emit one JSON object per line (with task, stage and latency fields)
+LOG_JSON = os.getenv("LOG_JSON", "false").lower() == "true"
+# Per-logger levels, e.g. {'scrapers.ruten': 'WARNING'}; hot-path debug logs are free when disabled
+LOG_LEVELS = {
+    'checkers': 'INFO',
+    'scrapers': 'INFO',
+}
+
+# --- Metrics Settings ---
+# Prometheus text endpoint served at http://METRICS_HOST:METRICS_PORT/metrics; 0 disables it
+METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+
+# --- HTTP Record/Replay Settings ---
+# 'record' saves every API scraper request/response to the cassette, 'replay' serves them
+# from it without network, 'off' talks to the real upstreams
+HTTP_CASSETTE_MODE = os.getenv("HTTP_CASSETTE_MODE", "off")
+HTTP_CASSETTE_PATH = os.getenv("HTTP_CASSETTE_PATH", "cassettes/ruten.jsonl.gz")
+# Injected per-response delay in replay mode: latency +/- uniform jitter
+HTTP_REPLAY_LATENCY_SECONDS = float(os.getenv("HTTP_REPLAY_LATENCY_SECONDS", "0"))
+HTTP_REPLAY_JITTER_SECONDS = float(os.getenv("HTTP_REPLAY_JITTER_SECONDS", "0"))
+
+# --- HTTP Cache Settings ---
+# Directory where API scrapers cache GET responses and revalidate them with
+# If-None-Match / If-Modified-Since; empty disables the cache
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", "")
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# --- Tracing Settings ---
+# Chrome trace event file (open with chrome://tracing or ui.perfetto.dev); empty disables tracing
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(10 * 1024 * 1024)))
+TRACE_BACKUP_COUNT = 3
+
+# --- Profiling Settings ---
+# Send SIGUSR1 to profile the next cycle, or set PROFILE_CYCLES to profile the first N cycles
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/profiles")
+PROFILE_MODE = os.getenv("PROFILE_MODE", "cprofile")  # 'cprofile' or 'sampling'
+PROFILE_CYCLES = int(os.getenv("PROFILE_CYCLES", "0"))
+PROFILE_SAMPLE_INTERVAL = 0.005
+# Trace allocations and write a tracemalloc diff for each profiled cycle (adds overhead to every cycle)
+PROFILE_TRACEMALLOC = os.getenv("PROFILE_TRACEMALLOC", "false").lower() == "true"
+
+# --- Restock Alert Latency ---
+# Warn when the rolling p95 from first seeing a product in stock to its delivered notification exceeds this; 0 disables
+ALERT_LATENCY_TARGET_SECONDS = float(os.getenv("ALERT_LATENCY_TARGET_SECONDS", "90"))
+ALERT_LATENCY_WINDOW = 100  # Samples per task kept for the rolling percentiles
 
 # --- Telegram Settings ---
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
+# --- Upstream Base URLs ---
+# Set MOCK_UPSTREAM_URL (e.g. http://localhost:8765) to send all upstream traffic to the
+# bundled mock server (python -m benchmarks.mock_upstream)
+MOCK_UPSTREAM_URL = os.getenv("MOCK_UPSTREAM_URL", "").rstrip('/')
+RUTEN_BASE_URL = MOCK_UPSTREAM_URL or "https://www.ruten.com.tw"
+RUTEN_API_BASE_URL = MOCK_UPSTREAM_URL or "https://rtapi.ruten.com.tw"
+RUTEN_RAPI_BASE_URL = MOCK_UPSTREAM_URL or "https://rapi.ruten.com.tw"
+PULAMO_BASE_URL = MOCK_UPSTREAM_URL or "https://www.pulamo.com.tw"
+TELEGRAM_API_BASE_URL = f"{MOCK_UPSTREAM_URL}/bot" if MOCK_UPSTREAM_URL else "https://api.telegram.org/bot"
+
 # --- Blacklist ---
 BLACKLISTED_SELLERS = [
     'lana20110406',
@@ -25,7 +155,7 @@ TASKS = [
         'browser': 'firefox',
         'scraper': 'pulamo.PulamoScraper',
         'scraper_params': {
-            'search_url': 'https://www.pulamo.com.tw/products?search=MGSD',
+            'search_url': f'{PULAMO_BASE_URL}/products?search=MGSD',
         },
         'checker': 'product.ProductChecker',
         'checker_params': {
@@ -46,7 +176,7 @@ TASKS = [
         'browser': 'firefox',
         'scraper': 'pulamo.PulamoScraper',
         'scraper_params': {
-            'search_url': 'https://www.pulamo.com.tw/products?search=MGSD',
+            'search_url': f'{PULAMO_BASE_URL}/products?search=MGSD',
         },
         'checker': 'product.ProductChecker',
         'checker_params': {
@@ -66,16 +196,17 @@ TASKS = [
         'name': 'Ruten - Destiny Gundam',
         'type': 'ruten',
         'browser': 'firefox',
-        'search_scraper': 'ruten_api.RutenSearchAPIScraper', # <--- 使用新的 API Scraper
+        # API 優先，失敗或突然沒有結果時改用 Selenium
+        'search_scraper': ['ruten_api.RutenSearchAPIScraper', 'ruten.RutenSearchScraper'],
         'search_scraper_params': {
-            'search_url': 'https://www.ruten.com.tw/find/?q=mgsd+%E5%91%BD%E9%81%8B&prc.now=900-1400',
+            'search_url': f'{RUTEN_BASE_URL}/find/?q=mgsd+%E5%91%BD%E9%81%8B&prc.now=900-1400',
         },
         'keyword_checker': 'keyword.KeywordChecker',
         'keyword_checker_params': {
             'keywords': ['mgsd', '命運鋼彈'],
             'exclude_keywords': ['魔物語', 'ps5', 'ns2', '非'] # Exclude game pre-orders
         },
-        'page_scraper': 'ruten_api.RutenProductPageAPIScraper',
+        'page_scraper': ['ruten_api.RutenProductPageAPIScraper', 'ruten.RutenProductPageScraper'],
         'stock_checker': 'stock.StockChecker',
         'stock_checker_params': {
             'max_price': 2000,
@@ -102,7 +233,7 @@ TEST_TASKS = [
         'type': 'pulamo', # Add type for test tasks
         'scraper': 'pulamo.PulamoScraper',
         'scraper_params': {
-            'search_url': 'https://www.pulamo.com.tw/products?search=MGSD',
+            'search_url': f'{PULAMO_BASE_URL}/products?search=MGSD',
         },
         'checker': 'product.ProductChecker',
         'checker_params': {
@@ -8,9 +8,10 @@ from notifiers.telegram import TelegramNotifier
 
 # Import new Ruten components
 from scrapers.ruten import RutenSearchScraper, RutenProductPageScraper
-from scrapers.ruten_api import RutenProductPageAPIScraper, RutenSearchAPIScraper
+from scrapers.ruten_api import RutenProductPageAPIScraper, RutenSearchAPIScraper, RutenSearchHTTPScraper
 from checkers.keyword import KeywordChecker
 from checkers.stock import StockChecker
+from checkers.pipeline import PipelineChecker
 
 from scrapers.base import BaseScraper
 from checkers.base import BaseChecker
@@ -21,6 +22,7 @@ SCRAPERS = {
     'pulamo.PulamoScraper': PulamoScraper,
     'ruten.RutenSearchScraper': RutenSearchScraper,
     'ruten_api.RutenSearchAPIScraper': RutenSearchAPIScraper, # <--- 新增的 API Scraper
+    'ruten_api.RutenSearchHTTPScraper': RutenSearchHTTPScraper,
     'ruten.RutenProductPageScraper': RutenProductPageScraper,
     'ruten_api.RutenProductPageAPIScraper': RutenProductPageAPIScraper,
 }
@@ -29,6 +31,7 @@ CHECKERS = {
     'product.ProductChecker': ProductChecker,
     'keyword.KeywordChecker': KeywordChecker,
     'stock.StockChecker': StockChecker,
+    'pipeline.PipelineChecker': PipelineChecker,
 }
 
 NOTIFIERS = {
@@ -1,33 +1,146 @@
-
 # logger_config.py
+import atexit
+import contextvars
+import json
 import logging
+import logging.handlers
+import queue
 import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Union
+
+# Set per task run / per stage; asyncio copies them into every task it creates.
+current_task: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('log_task', default=None)
+current_stage: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('log_stage', default=None)
+
+DEFAULT_LOGGER_LEVELS = {
+    # To prevent third-party library logs from being too verbose
+    "selenium": logging.WARNING,
+    "urllib3": logging.WARNING,
+}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class ContextFilter(logging.Filter):
+    """Copies the current task and stage onto each record, in the thread that logs it."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'task'):
+            record.task = current_task.get()
+        if not hasattr(record, 'stage'):
+            record.stage = current_stage.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key in ('task', 'stage', 'latency_ms'):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+@contextmanager
+def task_context(task_name: str):
+    """Tags every record logged inside the block with `task_name`."""
+    token = current_task.set(task_name)
+    try:
+        yield
+    finally:
+        current_task.reset(token)
 
-def setup_logger(level=logging.INFO):
+
+@contextmanager
+def stage_context(stage: str, logger: Optional[logging.Logger] = None):
+    """Tags records with `stage` and logs the stage latency at DEBUG when it ends."""
+    logger = logger or logging.getLogger(__name__)
+    token = current_stage.set(stage)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if logger.isEnabledFor(logging.DEBUG):
+            latency_ms = round((time.perf_counter() - start) * 1000, 3)
+            logger.debug("階段 %s 完成，耗時 %.1f ms", stage, latency_ms, extra={'latency_ms': latency_ms})
+        current_stage.reset(token)
+
+
+def setup_logger(
+    level=logging.INFO,
+    use_queue: bool = False,
+    json_format: bool = False,
+    logger_levels: Optional[Dict[str, Union[int, str]]] = None,
+):
     """
     Configures the root logger for the application.
+
+    Args:
+        level: Minimum level of logs to capture on the root logger.
+        use_queue: Hand records to a QueueHandler and write them to stdout from a
+            background QueueListener thread, so logging never blocks the event loop.
+        json_format: Emit one JSON object per line with task/stage/latency fields.
+        logger_levels: Per-logger levels, e.g. {'scrapers.ruten': 'WARNING'}.
     """
+    global _listener
+    shutdown_logger()
+
     # Get the root logger
     logger = logging.getLogger()
     logger.setLevel(level)  # Set the minimum level of logs to capture
 
     # Create a formatter (without timestamp, as Docker provides it)
-    formatter = logging.Formatter(
-        '%(levelname)s - %(message)s'
-    )
+    if json_format:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            '%(levelname)s - %(message)s'
+        )
 
     # Create a handler for console output (stdout)
     stream_handler = logging.StreamHandler(sys.stdout)
     stream_handler.setFormatter(formatter)
-    
+
     # Clear existing handlers to avoid duplicate logs
     if logger.hasHandlers():
         logger.handlers.clear()
-        
-    logger.addHandler(stream_handler)
 
-    # Optional: To prevent third-party library logs from being too verbose
-    logging.getLogger("selenium").setLevel(logging.WARNING)
-    logging.getLogger("urllib3").setLevel(logging.WARNING)
+    if use_queue:
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
+        logger.addHandler(queue_handler)
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+    else:
+        stream_handler.addFilter(ContextFilter())
+        logger.addHandler(stream_handler)
+
+    for name, logger_level in {**DEFAULT_LOGGER_LEVELS, **(logger_levels or {})}.items():
+        logging.getLogger(name).setLevel(logger_level)
 
     return logger
+
+
+def shutdown_logger():
+    """Stops the background listener, flushing any queued records."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logger)
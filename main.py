@@ -1,31 +1,61 @@
 # main.py
 import asyncio
 import logging
+import time
 import config
-from logger_config import setup_logger
+import metrics
+import profiling
+import tracing
+from logger_config import setup_logger, shutdown_logger
 from task_config_manager import task_config_manager
-from processors import process_pulamo_task, process_ruten_task
+from processors import process_task
+
+
+async def run_with_deadline(coro, task_name: str):
+    """Awaits one task run, cancelling it once TASK_TIMEOUT_SECONDS have passed."""
+    try:
+        await asyncio.wait_for(coro, config.TASK_TIMEOUT_SECONDS or None)
+    except asyncio.TimeoutError:
+        logging.warning(f"任務 '{task_name}' 超過 {config.TASK_TIMEOUT_SECONDS:g} 秒仍未完成，已取消。")
 
 async def main():
     """
     Main function to initialize and run the scraper and checks in a loop.
     """
-    setup_logger()
+    setup_logger(use_queue=config.LOG_USE_QUEUE, json_format=config.LOG_JSON, logger_levels=config.LOG_LEVELS)
+    tracing.configure_tracing(config.TRACE_FILE, config.TRACE_MAX_BYTES, config.TRACE_BACKUP_COUNT)
     task_config_manager.load_configs()
     logging.info("--- 開始執行持續監控任務 ---")
+    metrics_server = None
     try:
+        if config.METRICS_PORT:
+            metrics_server = await metrics.start_metrics_server(config.METRICS_HOST, config.METRICS_PORT)
+
+        profiler = profiling.CycleProfiler(
+            config.PROFILE_DIR, config.PROFILE_MODE, config.PROFILE_SAMPLE_INTERVAL, config.PROFILE_TRACEMALLOC
+        )
+        profiler.install_signal_handler(asyncio.get_running_loop())
+        if config.PROFILE_CYCLES:
+            profiler.request(config.PROFILE_CYCLES)
+
         while True:
             logging.info("--- 開始新一輪檢查 ---")
+            cycle_start = time.perf_counter()
             
-            tasks_to_run = []
-            for task in task_config_manager.get_tasks():
-                task_type = task.get('type', 'pulamo') # Default to pulamo
-                if task_type == 'ruten':
-                    tasks_to_run.append(process_ruten_task(task))
-                elif task_type == 'pulamo':
-                    tasks_to_run.append(process_pulamo_task(task))
-            
-            await asyncio.gather(*tasks_to_run)
+            tasks_to_run = [
+                run_with_deadline(process_task(task), task['name'])
+                for task in task_config_manager.get_tasks()
+            ]
+
+            with profiler.profile_cycle():
+                await asyncio.gather(*tasks_to_run)
+
+            cycle_seconds = time.perf_counter() - cycle_start
+            metrics.CYCLE_SECONDS.observe(cycle_seconds)
+            if cycle_seconds > config.CHECK_INTERVAL_SECONDS:
+                metrics.CYCLE_OVERRUNS.inc()
+                logging.warning(f"本輪檢查耗時 {cycle_seconds:.1f} 秒，超過檢查間隔 {config.CHECK_INTERVAL_SECONDS} 秒。")
+            tracing.flush_traces()
 
             logging.info(f"--- 等待 {config.CHECK_INTERVAL_SECONDS} 秒後進行下一次檢查 ---")
             await asyncio.sleep(config.CHECK_INTERVAL_SECONDS)
@@ -35,7 +65,11 @@ async def main():
     except Exception as e:
         logging.critical(f"執行過程中發生未預期的錯誤: {e}", exc_info=True)
     finally:
+        if metrics_server is not None:
+            metrics_server.close()
+        tracing.shutdown_tracing()
         logging.info("--- 監控任務執行完畢 ---")
+        shutdown_logger()
 
 if __name__ == '__main__':
     asyncio.run(main())
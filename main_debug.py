@@ -3,7 +3,7 @@ import asyncio
 import logging
 import config
 from logger_config import setup_logger
-from processors import process_pulamo_task, process_ruten_task
+from processors import process_task
 
 async def main():
     """
@@ -13,14 +13,7 @@ async def main():
     logging.info("--- 開始執行測試任務 ---\n") # Added newline for better readability
 
     try:
-        tasks_to_run = []
-        for task in config.TEST_TASKS:
-            task_type = task.get('type', 'simple') # Default to simple
-            if task_type == 'ruten':
-                tasks_to_run.append(process_ruten_task(task))
-            elif task_type == 'pulamo':
-                tasks_to_run.append(process_pulamo_task(task))
-        await asyncio.gather(*tasks_to_run)
+        await asyncio.gather(*(process_task(task) for task in config.TEST_TASKS))
     except Exception as e:
         logging.critical(f"執行測試任務時發生未預期的錯誤: {e}", exc_info=True)
     finally:
@@ -0,0 +1,269 @@
+# metrics.py
+"""
+A small in-process metrics registry rendered in the Prometheus text format,
+plus an asyncio HTTP endpoint that serves it at /metrics.
+"""
+import asyncio
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    metric_type = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} 需要標籤 {self.labelnames}，收到 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """A monotonically increasing value per label set."""
+    metric_type = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    """A value that can go up and down."""
+    metric_type = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Counts observations into cumulative buckets, with a running sum and count."""
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[LabelValues, List[float]] = {}  # bucket counts..., sum, count
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the wall time spent in the block, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return series[-1] if series else 0
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, series):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    """Holds metrics by name and renders them all for a scrape."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Adds `metric`; a name already taken raises ValueError rather than hiding the earlier metric."""
+        if metric.name in self._metrics:
+            raise ValueError(f"指標名稱 '{metric.name}' 已註冊")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# --- Application metrics ---
+STAGE_SECONDS = REGISTRY.histogram(
+    'scraper_stage_duration_seconds', 'Time spent in each processing stage.', ['task', 'stage'])
+HTTP_REQUESTS = REGISTRY.counter(
+    'scraper_http_requests_total', 'HTTP requests sent, per upstream host.', ['host'])
+HTTP_ERRORS = REGISTRY.counter(
+    'scraper_http_errors_total', 'HTTP requests that failed or returned status >= 400, per upstream host.', ['host'])
+HTTP_RECEIVED_BYTES = REGISTRY.counter(
+    'scraper_http_received_bytes_total', 'Response body bytes received, per upstream host.', ['host'])
+HTTP_CACHE_REQUESTS = REGISTRY.counter(
+    'scraper_http_cache_requests_total', 'GET requests through the HTTP cache, per upstream host: answered by a 304 and served from the cache (hit), or fetched in full (miss).', ['host', 'result'])
+HTTP_CACHE_HIT_RATIO = REGISTRY.gauge(
+    'scraper_http_cache_hit_ratio', 'Share of GET requests served from the HTTP cache, per upstream host.', ['host'])
+HTTP_CACHE_SAVED_BYTES = REGISTRY.counter(
+    'scraper_http_cache_saved_bytes_total', 'Response body bytes served from the HTTP cache instead of downloaded, per upstream host.', ['host'])
+HTTP_CACHE_BYTES = REGISTRY.gauge(
+    'scraper_http_cache_bytes', 'Response body bytes stored in the on-disk HTTP cache.')
+WEBDRIVER_SESSION_SECONDS = REGISTRY.histogram(
+    'scraper_webdriver_session_create_seconds', 'Time to obtain a WebDriver session from the grid.', ['browser'])
+GRID_QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    'scraper_grid_queue_wait_seconds', 'Time a session request waited for a free Selenium Grid slot.', ['browser'])
+GRID_QUEUED_REQUESTS = REGISTRY.gauge(
+    'scraper_grid_queued_requests', 'Session requests waiting for a free Selenium Grid slot.', ['browser'])
+GRID_FREE_SLOTS = REGISTRY.gauge(
+    'scraper_grid_free_slots', 'Free Selenium Grid slots at the last status poll.', ['browser'])
+ROUTED_REQUESTS = REGISTRY.counter(
+    'scraper_routing_served_total', 'Requests served by each backend of a routed scraper.', ['backend'])
+ROUTING_BACKEND_FAILURES = REGISTRY.counter(
+    'scraper_routing_backend_failures_total', 'Requests a routed scraper backend failed (error or unexpected empty result).', ['backend'])
+ROUTING_BACKEND_SECONDS = REGISTRY.histogram(
+    'scraper_routing_backend_seconds', 'Time each routed scraper backend took per request, session setup included.', ['backend'])
+PAGE_LOAD_REQUESTS = REGISTRY.histogram(
+    'scraper_page_load_requests', 'Requests made by each page loaded in a browser.', ['browser'],
+    buckets=(1, 5, 10, 20, 50, 100, 200, 500))
+PAGE_LOAD_BYTES = REGISTRY.histogram(
+    'scraper_page_load_transfer_bytes', 'Bytes transferred by each page loaded in a browser.', ['browser'],
+    buckets=(10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000))
+BLOCKED_REQUESTS = REGISTRY.counter(
+    'scraper_blocked_requests_total', 'Browser requests stopped by the request blocklist, estimated from the ones the browser recorded (a lower bound).', ['browser'])
+SEARCH_DETAILS_REQUESTED = REGISTRY.counter(
+    'scraper_search_details_requested_total', 'Product IDs the Ruten search asked the details API for, by search mode (full or incremental).', ['mode'])
+SEARCH_PRICE_BANDS = REGISTRY.counter(
+    'scraper_search_price_bands_total', 'Price bands of fanned-out Ruten searches, by result (searched, or split for overflowing a page).', ['result'])
+SOURCE_PAYLOADS = REGISTRY.counter(
+    'scraper_source_payloads_total', 'Fingerprinted source payloads per task, by whether they were unchanged (parsing and checks short-circuited) or changed.', ['task', 'result'])
+PIPELINE_STAGE_ERRORS = REGISTRY.counter(
+    'scraper_pipeline_stage_errors_total', 'Batches a pipeline stage failed on and dropped.', ['task', 'stage'])
+PIPELINE_CACHE_LOOKUPS = REGISTRY.counter(
+    'scraper_pipeline_cache_lookups_total', 'Stage result cache lookups, by result (hit or miss).', ['task', 'stage', 'result'])
+CYCLE_SECONDS = REGISTRY.histogram(
+    'monitor_cycle_duration_seconds', 'Wall time of one full monitoring cycle.')
+CYCLE_OVERRUNS = REGISTRY.counter(
+    'monitor_cycle_overruns_total', 'Cycles that took longer than CHECK_INTERVAL_SECONDS.')
+RESTOCK_ALERT_SECONDS = REGISTRY.histogram(
+    'scraper_restock_alert_seconds', 'Time from first seeing a product in stock to its acknowledged notification.', ['task'],
+    buckets=(1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120, 180, 300, 600, 1800, 3600))
+RESTOCK_ALERT_P50_SECONDS = REGISTRY.gauge(
+    'scraper_restock_alert_p50_seconds', 'Rolling median restock-to-alert latency.', ['task'])
+RESTOCK_ALERT_P95_SECONDS = REGISTRY.gauge(
+    'scraper_restock_alert_p95_seconds', 'Rolling 95th percentile restock-to-alert latency.', ['task'])
+RESTOCK_ALERT_TARGET_BREACHES = REGISTRY.counter(
+    'scraper_restock_alert_target_breaches_total', 'Task runs whose rolling p95 restock-to-alert latency exceeded the target.', ['task'])
+
+
+async def _handle_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, registry: Registry):
+    try:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Drain the headers; the endpoint takes no input
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b'\r\n', b'\n', b''):
+                pass
+        except (ValueError, asyncio.LimitOverrunError):  # A line over the stream's limit
+            status, body = '400 Bad Request', b'Bad Request\n'
+        else:
+            parts = request_line.decode('latin-1').split()
+            if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] == '/metrics':
+                status, body = '200 OK', registry.render().encode('utf-8')
+            else:
+                status, body = '404 Not Found', b'Not Found\n'
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            f"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode('latin-1') + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError) as e:
+        logging.debug("Metrics request aborted: %s", e)
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(host: str, port: int, registry: Optional[Registry] = None) -> asyncio.AbstractServer:
+    """Serves `registry` at http://host:port/metrics from the running event loop."""
+    registry = registry or REGISTRY
+    server = await asyncio.start_server(lambda r, w: _handle_request(r, w, registry), host, port)
+    logging.info(f"Metrics endpoint 已啟動於 http://{host}:{port}/metrics")
+    return server
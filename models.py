@@ -1,22 +1,108 @@
 # models.py
-from dataclasses import dataclass
-from typing import Optional
+import sys
+from enum import Enum, IntFlag
+from typing import Iterable, Optional, Tuple
+
+
+class PaymentMethod(Enum):
+    CREDIT_CARD = "PP_CRD"
+    SEVEN_ELEVEN_COD = "SEVEN_COD"
+    FAMILY_MART_COD = "FAMI_COD"
+    HILIFE_COD = "HILIFE_COD"
+
+    @property
+    def flag(self) -> "PaymentFlag":
+        """The bit this payment method occupies in `Product.payment_mask`."""
+        return PaymentFlag[self.name]
+
+
+# One bit per PaymentMethod, so the two can never drift apart.
+PaymentFlag = IntFlag('PaymentFlag', [method.name for method in PaymentMethod])
+PaymentFlag.__doc__ = "Bitmask form of PaymentMethod, used for compact storage and fast filtering."
+
+_PAYMENT_CODE_FLAGS = {method.value: PaymentFlag[method.name] for method in PaymentMethod}
+
+
+def payment_mask_for(codes: Iterable[str]) -> int:
+    """Returns the PaymentFlag bits for every known payment code in `codes`."""
+    mask = 0
+    for code in codes:
+        mask |= _PAYMENT_CODE_FLAGS.get(code, 0)
+    return mask
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
 
-from dataclasses import dataclass, field
-from typing import List, Optional
 
-@dataclass
 class Product:
-    """Represents a scraped product."""
-    title: str
-    price: int
-    in_stock: bool
-    url: str
-    seller: Optional[str] = None
-    payment_methods: List[str] = field(default_factory=list)
+    """
+    Represents a scraped product.
+
+    Uses __slots__ instead of a per-instance __dict__, interns the strings that
+    repeat across listings (seller, URL, payment codes) and keeps the payment
+    methods as a tuple plus a PaymentFlag bitmask for the stock checker.
+    """
+    __slots__ = ('title', 'price', 'in_stock', '_url', '_seller', '_payment_methods', 'payment_mask')
+    __hash__ = None  # Mutable and compared by value, like the dataclass it replaces
+
+    def __init__(
+        self,
+        title: str,
+        price: int,
+        in_stock: bool,
+        url: str,
+        seller: Optional[str] = None,
+        payment_methods: Optional[Iterable[str]] = None,
+    ):
+        self.title = title
+        self.price = price
+        self.in_stock = in_stock
+        self.url = url
+        self.seller = seller
+        self.payment_methods = payment_methods
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    @url.setter
+    def url(self, value: str):
+        self._url = _intern(value)
+
+    @property
+    def seller(self) -> Optional[str]:
+        return self._seller
+
+    @seller.setter
+    def seller(self, value: Optional[str]):
+        self._seller = _intern(value)
+
+    @property
+    def payment_methods(self) -> Tuple[str, ...]:
+        """Read-only: assign a new sequence to change it, which also updates `payment_mask`."""
+        return self._payment_methods
+
+    @payment_methods.setter
+    def payment_methods(self, value: Optional[Iterable[str]]):
+        codes = tuple(_intern(code) for code in value) if value else ()
+        self._payment_methods = codes
+        self.payment_mask = payment_mask_for(codes)
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (
+            self.title == other.title
+            and self.price == other.price
+            and self.in_stock == other.in_stock
+            and self._url == other._url
+            and self._seller == other._seller
+            and self._payment_methods == other._payment_methods
+        )
 
     def __repr__(self) -> str:
         stock_status = "有貨" if self.in_stock else "缺貨"
         seller_info = f", seller='{self.seller}'" if self.seller else ""
-        payment_info = f", payment_methods={self.payment_methods}" if self.payment_methods else ""
-        return f"Product(title='{self.title}', price={self.price}, stock='{stock_status}', url='{self.url}'{seller_info}{payment_info})"
\ No newline at end of file
+        payment_info = f", payment_methods={list(self._payment_methods)}" if self._payment_methods else ""
+        return f"Product(title='{self.title}', price={self.price}, stock='{stock_status}', url='{self.url}'{seller_info}{payment_info})"
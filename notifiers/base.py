@@ -9,5 +9,6 @@ class BaseNotifier(ABC):
     async def notify(self, product: Product, params: dict):
         """
         Sends a notification about a found product.
+        Returns True once the notification is delivered.
         """
         pass
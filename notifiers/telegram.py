@@ -6,6 +6,7 @@ from telegram.error import TelegramError
 from notifiers.base import BaseNotifier
 from models import Product
 import config
+import tracing
 from datetime import datetime
 import pytz
 
@@ -16,7 +17,7 @@ class TelegramNotifier(BaseNotifier):
         if bot:
             self.bot = bot
         elif config.TELEGRAM_BOT_TOKEN:
-            self.bot = Bot(token=config.TELEGRAM_BOT_TOKEN)
+            self.bot = Bot(token=config.TELEGRAM_BOT_TOKEN, base_url=config.TELEGRAM_API_BASE_URL)
         else:
             self.bot = None
         
@@ -27,13 +28,15 @@ class TelegramNotifier(BaseNotifier):
             self.semaphore = None
             logging.warning("Telegram Bot Token 未設定，將不會發送通知。")
 
+    @tracing.traced('TelegramNotifier.notify', lambda self, product, params: {'product': product.title})
     async def notify(self, product: Product, params: dict):
         """
         Sends a notification about a found product, using a semaphore to ensure durability.
+        Returns True once Telegram has accepted the message.
         """
         if not self.bot or not self.semaphore or not config.TELEGRAM_CHAT_ID:
             logging.warning("Bot instance, semaphore, or Chat ID 未提供，無法發送通知。")
-            return
+            return False
 
         product_name = params.get("name", "商品")
         store_name = params.get("store_name", "店家")
@@ -50,5 +53,7 @@ class TelegramNotifier(BaseNotifier):
             try:
                 await self.bot.send_message(chat_id=config.TELEGRAM_CHAT_ID, text=message, parse_mode='HTML')
                 logging.info(f"已成功為 '{product.title}' 發送 Telegram 通知。")
+                return True
             except TelegramError as e:
                 logging.error(f"為 '{product.title}' 發送 Telegram 通知時發生錯誤: {e}")
+                return False
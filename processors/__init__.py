@@ -1,3 +1,36 @@
 # processors/__init__.py
+import logging
+from typing import Callable, Optional
+
+from .pipeline import process_pipeline_task, run_pipeline
 from .pulamo import process_pulamo_task
 from .ruten import process_ruten_task
+
+# Processors of the tasks that don't declare their own 'stages', by task 'type'
+TASK_TYPES = {
+    'pulamo': process_pulamo_task,
+    'ruten': process_ruten_task,
+}
+
+
+async def process_task(
+    task: dict,
+    get_scraper: Optional[Callable] = None,
+    get_checker: Optional[Callable] = None,
+    get_notifier: Optional[Callable] = None
+):
+    """Runs one task once: its own 'stages' if it declares them, otherwise the processor for its type."""
+    factories = {
+        name: factory for name, factory in
+        (('get_scraper', get_scraper), ('get_checker', get_checker), ('get_notifier', get_notifier))
+        if factory is not None
+    }
+    if 'stages' in task:
+        await process_pipeline_task(task, **factories)
+        return
+    task_type = task.get('type', 'pulamo')  # Default to pulamo
+    processor = TASK_TYPES.get(task_type)
+    if processor is None:
+        logging.warning(f"任務 '{task['name']}' 的類型 '{task_type}' 不受支援，已略過。")
+        return
+    await processor(task, **factories)
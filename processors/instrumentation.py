@@ -0,0 +1,56 @@
+# processors/instrumentation.py
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+import metrics
+import tracing
+from alert_latency import alert_latency_tracker
+from logger_config import current_task, stage_context, task_context
+
+# Durations of the stages completed so far in the current task run
+current_stage_seconds: ContextVar[Optional[Dict[str, float]]] = ContextVar('stage_seconds', default=None)
+
+
+@contextmanager
+def task_run(task_name: str):
+    """
+    Marks one run of a task: tags log records with the task name and opens
+    the root trace span on a track of its own.
+    """
+    token = current_stage_seconds.set({})
+    try:
+        with task_context(task_name), tracing.track(task_name), tracing.span('task', task=task_name):
+            yield
+    finally:
+        current_stage_seconds.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Marks one processing stage: tags log records with it, records its
+    duration in the stage latency histogram and traces it as a span,
+    all labelled with the current task.
+    """
+    task_name = current_task.get() or ''
+    start = time.perf_counter()
+    try:
+        with stage_context(name), metrics.STAGE_SECONDS.time(task=task_name, stage=name), tracing.span(name, task=task_name):
+            yield
+    finally:
+        stage_seconds = current_stage_seconds.get()
+        if stage_seconds is not None:
+            stage_seconds[name] = time.perf_counter() - start
+
+
+async def notify_tracked(notifier, product, params: dict):
+    """
+    Sends one notification and, once the notifier confirms delivery, records
+    the product's restock-to-alert latency for the current task.
+    """
+    delivered = await notifier.notify(product, params)
+    if delivered:
+        alert_latency_tracker.acknowledged(current_task.get() or '', product, dict(current_stage_seconds.get() or {}))
+    return delivered
@@ -0,0 +1,434 @@
+# processors/pipeline.py
+"""
+The pipeline engine every monitoring task runs on.
+
+A task is a list of stages, each naming its component in the `factory`
+registries:
+
+    'stages': [
+        {'stage': 'scrape', 'scraper': 'pulamo.PulamoScraper', 'params': {...}},
+        {'stage': 'check', 'checker': 'product.ProductChecker', 'params': {...}},
+        {'stage': 'notify', 'notifier': 'telegram.TelegramNotifier', 'params': {...}},
+    ]
+
+The first stage is the source (`scrape`). Its products stream through the
+others over bounded `Channel`s, each stage passing a batch on as soon as
+it is done with it. For every stage the engine handles:
+
+- concurrency: up to `workers` batches in flight, `batch_size` products
+  per batch (each stage type has sensible defaults);
+- timing: each batch runs in a `stage()` (log tag, latency histogram and
+  trace span) labelled with the stage's `name` (default: its type);
+- caching: with `'cache': True`, a filter or check stage reuses its last
+  result for a batch it has already seen unchanged (`StageResultCache`).
+  The stage fed by the source keys its batches by the fingerprint of the
+  payload the source parsed, when the scraper reports one (see
+  `scrapers.fingerprint`), so an unchanged page costs a fetch and a hash;
+  with `'cache': 'source'` it caches only then;
+- error isolation: a batch that raises is logged and its products are
+  dropped, and the other batches and stages carry on. A failing source,
+  or a component that can't be created, still fails the run.
+
+A stage creates its component when its first batch arrives, so a run
+that finds nothing opens no page scraper and no notifier.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple, Type
+
+import config
+import metrics
+from alert_latency import alert_latency_tracker
+from checkers.base import summary_log_level
+from models import Product
+from processors.dedup import notification_manager
+from processors.instrumentation import notify_tracked, stage, task_run
+from processors.sessions import open_scraper
+from processors.streaming import Channel, run_stages
+from scrapers.async_driver import run_scrape
+from scrapers.base import ScrapeResult
+from factory import get_scraper as default_get_scraper, get_checker as default_get_checker, get_notifier as default_get_notifier
+
+
+@dataclass
+class StageReport:
+    """What one stage did during a run."""
+    received: int = 0
+    emitted: int = 0
+    failed_batches: int = 0
+    cached_batches: int = 0
+    stats: Dict[str, int] = field(default_factory=dict)  # The component's stats, as counts
+
+    def add_stats(self, stats: Dict[str, int]):
+        for key, count in stats.items():
+            self.stats[key] = self.stats.get(key, 0) + count
+
+
+class PipelineReport:
+    """Per-stage reports of one run, by stage name."""
+
+    def __init__(self):
+        self.stages: Dict[str, StageReport] = {}
+
+    def __getitem__(self, name: str) -> StageReport:
+        return self.stages.setdefault(name, StageReport())
+
+    def log_summary(self, task_name: str):
+        steps = []
+        for name, report in self.stages.items():
+            step = f"{name} {report.emitted} 件"
+            if report.failed_batches:
+                step += f" ({report.failed_batches} 批失敗)"
+            steps.append(step)
+        logging.info(f"任務 '{task_name}' 各階段輸出: {' → '.join(steps) or '無'}")
+
+
+def count_stats(stats: dict) -> Dict[str, int]:
+    """A component's stats (lists or samples of titles, or numbers) as counts."""
+    return {key: value if isinstance(value, (int, float)) else len(value) for key, value in stats.items()}
+
+
+class StageResultCache:
+    """
+    The results of filter and check stages by batch fingerprint (the
+    products' fields and the stage params), kept across runs, least
+    recently used evicted first. A result is stored as the positions of
+    the passing products in the batch, so a hit hands on the current
+    objects.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple[str, str, bytes], Tuple[List[int], Dict[str, int]]]' = OrderedDict()
+
+    @staticmethod
+    def fingerprint(products: Sequence[Product], params: dict) -> bytes:
+        digest = hashlib.blake2b(repr(params).encode(), digest_size=16)
+        for product in products:
+            digest.update(repr((product.title, product.price, product.in_stock, product.url,
+                                product.seller, product.payment_mask)).encode())
+        return digest.digest()
+
+    def get(self, key: Tuple[str, str, bytes]) -> Optional[Tuple[List[int], Dict[str, int]]]:
+        entry = self._entries.get(key)
+        metrics.PIPELINE_CACHE_LOOKUPS.inc(task=key[0], stage=key[1], result='hit' if entry else 'miss')
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Tuple[str, str, bytes], positions: List[int], stats: Dict[str, int]):
+        self._entries[key] = (positions, stats)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+@dataclass
+class PipelineContext:
+    """What the stages of one run share."""
+    task: dict
+    get_scraper: Callable
+    get_checker: Callable
+    get_notifier: Callable
+    report: PipelineReport
+    seen_at: float = 0.0  # When the source's products were scraped
+    source_fingerprint: Optional[str] = None  # Of the payload the source parsed, when the scraper reports it
+
+
+class Stage:
+    """
+    One step of a pipeline. Subclasses create their component in `open()`
+    and turn a batch of products into the products they pass on, plus
+    stats counts, in `process()`.
+    """
+    source = False
+    default_workers = 1
+    default_batch_size: Optional[int] = None  # None: PIPELINE_QUEUE_SIZE
+
+    def __init__(self, spec: dict, context: PipelineContext):
+        self.spec = spec
+        self.context = context
+        self.name = spec.get('name', spec['stage'])
+        self.params = spec.get('params', {})
+        self.workers = spec.get('workers', self.default_workers)
+        self.batch_size = spec.get('batch_size') or self.default_batch_size or config.PIPELINE_QUEUE_SIZE
+        self.report = context.report[self.name]
+        self.resources = AsyncExitStack()  # Closed when the stage ends
+        self.follows_source = False  # Set for the stage fed by the source, whose batches its payload determines
+        self._batches_taken = 0
+        self._opened = False
+        self._opening = asyncio.Lock()
+
+    @property
+    def task_name(self) -> str:
+        return self.context.task['name']
+
+    async def open(self):
+        """Creates the stage's component."""
+
+    async def process(self, batch: List[Product]) -> Tuple[List[Product], Dict[str, int]]:
+        raise NotImplementedError
+
+    def accepted(self, products: List[Product]):
+        """Called with the products of each batch the stage passes on, cached or not."""
+
+    async def finish(self):
+        """Called once the stage has processed every batch."""
+
+    async def run(self, inbox: Optional[Channel], outbox: Optional[Channel]):
+        try:
+            await run_stages(*(self._work(inbox, outbox) for _ in range(self.workers)))
+            await self.finish()
+        finally:
+            await self.resources.aclose()
+            if outbox is not None:
+                await outbox.close()
+
+    async def _work(self, inbox: Channel, outbox: Optional[Channel]):
+        async for batch in inbox.batches(self.batch_size):
+            batch_number = self._batches_taken
+            self._batches_taken += 1
+            self.report.received += len(batch)
+            if not self._opened:
+                async with self._opening:
+                    if not self._opened:
+                        await self.open()
+                        self._opened = True
+            try:
+                with stage(self.name):
+                    products = await self._process_cached(batch, batch_number)
+            except Exception as e:
+                self.report.failed_batches += 1
+                metrics.PIPELINE_STAGE_ERRORS.inc(task=self.task_name, stage=self.name)
+                logging.error(f"階段 '{self.name}' 處理 {len(batch)} 件商品時發生錯誤，略過這批商品: {e}", exc_info=True)
+                continue
+            self.report.emitted += len(products)
+            self.accepted(products)
+            if outbox is not None:
+                await outbox.put_many(products)
+
+    async def _process_cached(self, batch: List[Product], batch_number: int) -> List[Product]:
+        mode = self.spec.get('cache')
+        source_keyed = self.follows_source and self.context.source_fingerprint
+        if not mode or (mode == 'source' and not source_keyed):
+            products, stats = await self.process(batch)
+            self.report.add_stats(stats)
+            return products
+
+        if source_keyed:
+            # Same source payload, same batches: no need to hash the products
+            key = (self.task_name, self.name, StageResultCache.fingerprint(
+                (), (self.context.source_fingerprint, self.params, self.batch_size, batch_number, len(batch))))
+        else:
+            key = (self.task_name, self.name, StageResultCache.fingerprint(batch, self.params))
+        cached = stage_result_cache.get(key)
+        if cached is not None:
+            positions, stats = cached
+            self.report.cached_batches += 1
+            self.report.add_stats(stats)
+            return [batch[i] for i in positions]
+
+        products, stats = await self.process(batch)
+        self.report.add_stats(stats)
+        index = {id(product): i for i, product in enumerate(batch)}
+        if all(id(product) in index for product in products):  # Only results that select from the batch
+            stage_result_cache.put(key, [index[id(product)] for product in products], stats)
+        return products
+
+
+class ScrapeStage(Stage):
+    """The source: one scraper call (or a routed list of scrapers) whose products start the stream."""
+    source = True
+
+    async def run(self, inbox: Optional[Channel], outbox: Optional[Channel]):
+        try:
+            async with open_scraper(self.context.get_scraper, self.spec['scraper'], self.context.task) as scraper:
+                with stage(self.name):
+                    products = await run_scrape(scraper, self.params)
+            self.context.seen_at = time.time()
+            self.report.emitted = len(products)
+            if isinstance(products, ScrapeResult) and products.fingerprint:
+                self._record_payload(products)
+            if outbox is not None:
+                await outbox.put_many(products)
+        finally:
+            if outbox is not None:
+                await outbox.close()
+
+    def _record_payload(self, products: ScrapeResult):
+        self.context.source_fingerprint = products.fingerprint
+        metrics.SOURCE_PAYLOADS.inc(task=self.task_name, result='unchanged' if products.unchanged else 'changed')
+        if products.unchanged:
+            self.report.add_stats({'unchanged': 1})
+            unchanged = metrics.SOURCE_PAYLOADS.value(task=self.task_name, result='unchanged')
+            rate = unchanged / (unchanged + metrics.SOURCE_PAYLOADS.value(task=self.task_name, result='changed'))
+            logging.info(f"內容與上次相同，沿用上次解析的 {len(products)} 件商品與檢查結果 (短路比例 {rate:.0%})。")
+
+
+class FilterStage(Stage):
+    """Keeps the products a checker passes; checkers return them, or (them, stats)."""
+    default_batch_size = config.PIPELINE_CHECK_BATCH_SIZE
+
+    async def open(self):
+        self.checker = self.context.get_checker(self.spec['checker'])
+
+    async def process(self, batch):
+        # Batches streamed in from a stage other than the source may be single products: summaries go to DEBUG
+        level = summary_log_level.set(logging.INFO if self.follows_source else logging.DEBUG)
+        try:
+            result = self.checker.check(batch, self.params)
+        finally:
+            summary_log_level.reset(level)
+        if isinstance(result, tuple):
+            products, stats = result
+            return products, count_stats(stats)
+        return result, {}
+
+
+class CheckStage(FilterStage):
+    """The final filter: the products it passes are restocks to alert on, tracked for alert latency."""
+
+    def __init__(self, spec: dict, context: PipelineContext):
+        super().__init__(spec, context)
+        self.accepted_urls: Set[str] = set()
+
+    def accepted(self, products):
+        # Recorded as they pass, since they may be notified before the last batch is checked
+        alert_latency_tracker.seen(self.task_name, products, self.context.seen_at)
+        self.accepted_urls.update(product.url for product in products)
+
+    async def finish(self):
+        alert_latency_tracker.retain(self.task_name, self.accepted_urls)
+
+
+class EnrichStage(Stage):
+    """Completes products from their own pages with a page scraper, which returns (products, stats)."""
+    default_batch_size = 1
+
+    async def open(self):
+        self.scraper = await self.resources.enter_async_context(
+            open_scraper(self.context.get_scraper, self.spec['scraper'], self.context.task))
+
+    async def process(self, batch):
+        products, stats = await run_scrape(self.scraper, batch, self.params)
+        return products, count_stats(stats)
+
+
+class DedupStage(Stage):
+    """Drops products notified within the cooldown of `notification_manager`."""
+
+    async def process(self, batch):
+        products = []
+        for product in batch:
+            if notification_manager.can_notify(product.url):
+                products.append(product)
+            else:
+                logging.info(f"商品 '{product.title}' 在冷卻期間，本次不通知。")
+        return products, {'on_cooldown': len(batch) - len(products)}
+
+
+class NotifyStage(Stage):
+    """
+    Sends a notification per product, concurrently within a batch; passes on
+    the ones the notifier confirmed (returned True). Only those go on cooldown.
+    """
+
+    async def open(self):
+        self.notifier = self.context.get_notifier(self.spec['notifier'])
+
+    async def process(self, batch):
+        results = await asyncio.gather(
+            *(notify_tracked(self.notifier, product, self.params) for product in batch), return_exceptions=True)
+        sent = []
+        for product, result in zip(batch, results):
+            if isinstance(result, BaseException):
+                logging.error(f"發送商品 '{product.title}' 的通知時發生錯誤: {result}", exc_info=result)
+                continue
+            if result is not True:
+                logging.warning(f"商品 '{product.title}' 的通知未送達，下一輪再試。")
+                continue
+            notification_manager.record_notification(product.url)
+            sent.append(product)
+        return sent, {'failed_to_notify': len(batch) - len(sent)}
+
+    async def finish(self):
+        if self.report.emitted:
+            alert_latency_tracker.report(self.task_name)
+
+
+STAGE_TYPES: Dict[str, Type[Stage]] = {
+    'scrape': ScrapeStage,
+    'filter': FilterStage,
+    'enrich': EnrichStage,
+    'check': CheckStage,
+    'dedup': DedupStage,
+    'notify': NotifyStage,
+}
+
+
+async def run_pipeline(
+    task: dict,
+    stages: Sequence[dict],
+    get_scraper: Optional[Callable] = None,
+    get_checker: Optional[Callable] = None,
+    get_notifier: Optional[Callable] = None,
+    report: Optional[PipelineReport] = None,
+) -> PipelineReport:
+    """Runs the stages once for the task; raises if the source or a component fails."""
+    report = report if report is not None else PipelineReport()
+    context = PipelineContext(
+        task,
+        get_scraper or default_get_scraper,
+        get_checker or default_get_checker,
+        get_notifier or default_get_notifier,
+        report,
+    )
+    built = []
+    for spec in stages:
+        if spec.get('stage') not in STAGE_TYPES:
+            raise ValueError(f"未知的處理階段類型: '{spec.get('stage')}'，可用的類型: {', '.join(STAGE_TYPES)}")
+        built.append(STAGE_TYPES[spec['stage']](spec, context))
+    if not built or not built[0].source:
+        raise ValueError("處理流程的第一個階段必須是資料來源 (scrape)。")
+
+    if len(built) > 1:
+        built[1].follows_source = True
+    # A stage's inbox holds at least one full batch, so it can take a whole one at once
+    channels = [Channel(max(config.PIPELINE_QUEUE_SIZE, s.batch_size)) for s in built[1:]]
+    inboxes = [None] + channels
+    outboxes = channels + [None]
+    await run_stages(*(s.run(inbox, outbox) for s, inbox, outbox in zip(built, inboxes, outboxes)))
+    return report
+
+
+async def process_pipeline_task(
+    task: dict,
+    get_scraper: Optional[Callable] = None,
+    get_checker: Optional[Callable] = None,
+    get_notifier: Optional[Callable] = None
+):
+    """
+    Processes a task that declares its own 'stages'.
+    """
+    task_name = task['name']
+    with task_run(task_name):
+        logging.info(f"--- 開始執行任務: {task_name} ---")
+        report = PipelineReport()
+        try:
+            await run_pipeline(task, task['stages'], get_scraper, get_checker, get_notifier, report)
+        except Exception as e:
+            logging.error(f"在處理任務 '{task_name}' 時發生錯誤: {e}", exc_info=True)
+        finally:
+            report.log_summary(task_name)
+
+
+# Singleton instance
+stage_result_cache = StageResultCache(config.PIPELINE_CACHE_ENTRIES)
@@ -1,9 +1,17 @@
 # processors/pulamo.py
-import asyncio
 import logging
-from typing import Callable, Optional
-import config
-from factory import get_scraper as default_get_scraper, get_checker as default_get_checker, get_notifier as default_get_notifier
+from typing import Callable, List, Optional
+from processors.instrumentation import task_run
+from processors.pipeline import run_pipeline
+
+
+def pulamo_stages(task: dict) -> List[dict]:
+    """A Pulamo task as pipeline stages: scrape, check, notify."""
+    return [
+        {'stage': 'scrape', 'scraper': task['scraper'], 'params': task['scraper_params']},
+        {'stage': 'check', 'checker': task['checker'], 'params': task['checker_params'], 'cache': 'source'},
+        {'stage': 'notify', 'notifier': task['notifier'], 'params': task['notifier_params']},
+    ]
 
 async def process_pulamo_task(
     task: dict,
@@ -14,36 +22,19 @@ async def process_pulamo_task(
     """
     Processes a single, simple monitoring task for Pulamo.
     """
-    # Use default factory functions if no mocks are provided
-    get_scraper = get_scraper or default_get_scraper
-    get_checker = get_checker or default_get_checker
-    get_notifier = get_notifier or default_get_notifier
     task_name = task['name']
-    logging.info(f"--- 開始執行 Pulamo 任務: {task_name} ---")
-
-    try:
-        scraper = get_scraper(task['scraper'], config.SELENIUM_GRID_URL, browser=task.get('browser', 'chrome'))
-        checker = get_checker(task['checker'])
-        notifier = get_notifier(task['notifier'])
+    with task_run(task_name):
+        logging.info(f"--- 開始執行 Pulamo 任務: {task_name} ---")
 
-        with scraper:
-            products = scraper.scrape(task['scraper_params'])
-            if not products:
+        try:
+            report = await run_pipeline(task, pulamo_stages(task), get_scraper, get_checker, get_notifier)
+            scraped, found = report['scrape'].emitted, report['check'].emitted
+            if not scraped:
                 logging.info(f"任務 '{task_name}' 的爬蟲未在頁面上找到任何商品。")
-                return
-
-            found_products = checker.check(products, task['checker_params'])
-
-            if found_products:
-                logging.info(f"在任務 '{task_name}' 中找到 {len(found_products)} 件目標商品。")
-                # Concurrently notify for all found products
-                notification_tasks = [
-                    notifier.notify(product, task['notifier_params'])
-                    for product in found_products
-                ]
-                await asyncio.gather(*notification_tasks)
+            elif found:
+                logging.info(f"在任務 '{task_name}' 中找到 {found} 件目標商品。")
             else:
-                logging.info(f"任務 '{task_name}' 找到了 {len(products)} 件商品，但沒有任何一件符合篩選條件。")
+                logging.info(f"任務 '{task_name}' 找到了 {scraped} 件商品，但沒有任何一件符合篩選條件。")
 
-    except Exception as e:
-        logging.error(f"在處理任務 '{task_name}' 時發生錯誤: {e}", exc_info=True)
+        except Exception as e:
+            logging.error(f"在處理任務 '{task_name}' 時發生錯誤: {e}", exc_info=True)
@@ -1,11 +1,13 @@
 # processors/ruten.py
-import asyncio
 import logging
-import time
-from typing import Dict, Callable, Optional
-from dataclasses import dataclass, field
+from typing import Callable, List
+from dataclasses import dataclass
 
 import config
+from processors.dedup import NotificationManager, notification_manager
+from processors.instrumentation import task_run
+from processors.pipeline import PipelineReport, run_pipeline
+from processors.sessions import is_selenium_scraper
 from factory import get_scraper as default_get_scraper, get_checker as default_get_checker, get_notifier as default_get_notifier
 
 @dataclass
@@ -23,43 +25,62 @@ class RutenTaskStats:
 
     def log_summary(self):
         """Logs a formatted summary of the task statistics."""
-        keyword_filtered = self.keyword_mismatch + self.excluded_keyword
-        summary = (
-            f"Ruten任務總結: 搜尋到 {self.total_searched} 件商品. "
-            f"關鍵字過濾掉 {keyword_filtered} 件. "
-            f"成功抓取 {self.pages_scraped} 個頁面 ({self.pages_failed} 失敗). "
-            f"最終, {self.rejected_due_to_price} 件因價格過高, "
-            f"{self.rejected_due_to_seller} 件因賣家黑名單, "
-            f"{self.out_of_stock} 件無庫存, "
-            f"{self.rejected_due_to_payment_method} 件因付款方式不符."
+        logging.info(
+            "Ruten任務總結: 搜尋到 %d 件商品. 關鍵字過濾掉 %d 件. "
+            "成功抓取 %d 個頁面 (%d 失敗). "
+            "最終, %d 件因價格過高, %d 件因賣家黑名單, %d 件無庫存, %d 件因付款方式不符.",
+            self.total_searched, self.keyword_mismatch + self.excluded_keyword,
+            self.pages_scraped, self.pages_failed,
+            self.rejected_due_to_price, self.rejected_due_to_seller,
+            self.out_of_stock, self.rejected_due_to_payment_method,
         )
-        logging.info(summary)
 
-class NotificationManager:
-    _instance = None
-    _last_notified: Dict[str, float] = {}
-    _cooldown_seconds = 1800  # 30 minutes
-
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(NotificationManager, cls).__new__(cls)
-        return cls._instance
+    @classmethod
+    def from_report(cls, report: PipelineReport) -> "RutenTaskStats":
+        keyword_stats = report['keyword_filter'].stats
+        page_stats = report['enrich'].stats
+        stock_stats = report['stock_check'].stats
+        return cls(
+            total_searched=report['search'].emitted,
+            keyword_mismatch=keyword_stats.get('rejected_keyword_mismatch', 0),
+            excluded_keyword=keyword_stats.get('rejected_excluded_keyword', 0),
+            pages_scraped=report['enrich'].emitted - page_stats.get('failed_to_scrape', 0),
+            pages_failed=page_stats.get('failed_to_scrape', 0),
+            out_of_stock=stock_stats.get('out_of_stock_titles', 0),
+            rejected_due_to_price=stock_stats.get('rejected_due_to_price', 0),
+            rejected_due_to_seller=stock_stats.get('rejected_due_to_seller', 0),
+            rejected_due_to_payment_method=stock_stats.get('rejected_due_to_payment_method', 0),
+        )
 
-    def can_notify(self, product_url: str) -> bool:
-        """Checks if a notification can be sent for the given product URL."""
-        last_notified_time = self._last_notified.get(product_url)
-        if last_notified_time:
-            elapsed_time = time.time() - last_notified_time
-            if elapsed_time < self._cooldown_seconds:
-                return False
-        return True
+def enrich_batch_size(task: dict) -> int:
+    """Products per page-scraper call: a batch per tab set for the Selenium page scraper, else one at a time."""
+    if task.get('enrich_batch_size'):
+        return task['enrich_batch_size']
+    if config.RUTEN_ENRICH_BATCH_SIZE:
+        return config.RUTEN_ENRICH_BATCH_SIZE
+    page_scraper = task['page_scraper']
+    primary = page_scraper if isinstance(page_scraper, str) else page_scraper[0]
+    return max(1, config.RUTEN_PAGE_TABS) if is_selenium_scraper(primary) else 1
 
-    def record_notification(self, product_url: str):
-        """Records that a notification has been sent for the given product URL."""
-        self._last_notified[product_url] = time.time()
 
-# Singleton instance
-notification_manager = NotificationManager()
+def ruten_stages(task: dict) -> List[dict]:
+    """
+    A Ruten task as pipeline stages: search, keyword filter, product pages
+    (streamed, `enrich_batch_size` per call and `enrich_workers` calls at
+    once), stock check, notification cooldown, notify.
+    """
+    stock_params = task.get('stock_checker_params', {})
+    return [
+        {'stage': 'scrape', 'name': 'search', 'scraper': task['search_scraper'], 'params': task['search_scraper_params']},
+        {'stage': 'filter', 'name': 'keyword_filter', 'checker': task['keyword_checker'], 'params': task['keyword_checker_params'],
+         'cache': 'source'},
+        {'stage': 'enrich', 'scraper': task['page_scraper'], 'params': stock_params,
+         'batch_size': enrich_batch_size(task),
+         'workers': task.get('enrich_workers', config.RUTEN_ENRICH_WORKERS)},
+        {'stage': 'check', 'name': 'stock_check', 'checker': task['stock_checker'], 'params': stock_params},
+        {'stage': 'dedup'},
+        {'stage': 'notify', 'notifier': task['notifier'], 'params': task['notifier_params']},
+    ]
 
 async def process_ruten_task(
     task: dict,
@@ -71,66 +92,22 @@ async def process_ruten_task(
     Processes a multi-step task specifically for Ruten.
     """
     task_name = task['name']
-    logging.info(f"--- 開始執行露天任務: {task_name} ---")
-    stats = RutenTaskStats()
-
-    try:
-        # Step 1: Scrape the search result page
-        search_scraper = get_scraper(task['search_scraper'], config.SELENIUM_GRID_URL, browser=task.get('browser', 'chrome'))
-        with search_scraper:
-            all_products = search_scraper.scrape(task['search_scraper_params'])
-        stats.total_searched = len(all_products)
-
-        if not all_products:
-            return
-
-        # Step 2: Filter by keywords
-        keyword_checker = get_checker(task['keyword_checker'])
-        filtered_products, keyword_stats = keyword_checker.check(all_products, task['keyword_checker_params'])
-        stats.keyword_mismatch = len(keyword_stats['rejected_keyword_mismatch'])
-        stats.excluded_keyword = len(keyword_stats['rejected_excluded_keyword'])
-
-        if not filtered_products:
-            return
-
-        # Step 3: Scrape product pages for stock info
-        page_scraper = get_scraper(task['page_scraper'], config.SELENIUM_GRID_URL, browser=task.get('browser', 'chrome'))
-        with page_scraper:
-            detailed_products, page_scrape_stats = page_scraper.scrape(filtered_products, task.get('stock_checker_params', {}))
-        stats.pages_scraped = len(detailed_products) - len(page_scrape_stats['failed_to_scrape'])
-        stats.pages_failed = len(page_scrape_stats['failed_to_scrape'])
-
-        # Step 4: Check for stock
-        stock_checker = get_checker(task['stock_checker'])
-        found_products, stock_stats = stock_checker.check(detailed_products, task.get('stock_checker_params', {}))
-        stats.out_of_stock = len(stock_stats['out_of_stock_titles'])
-        stats.rejected_due_to_price = len(stock_stats.get('rejected_due_to_price', []))
-        stats.rejected_due_to_seller = len(stock_stats.get('rejected_due_to_seller', []))
-        stats.rejected_due_to_payment_method = len(stock_stats.get('rejected_due_to_payment_method', []))
-
-        # Step 5: Filter out recently notified products and notify
-        if found_products:
-            products_to_notify = [p for p in found_products if notification_manager.can_notify(p.url)]
-            
-            for product in found_products:
-                if product not in products_to_notify:
-                    logging.info(f"商品 '{product.title}' 在冷卻期間，本次不通知。")
-
-            if products_to_notify:
-                logging.info(f"在任務 '{task_name}' 中找到 {len(products_to_notify)} 件新商品。")
-                notifier = get_notifier(task['notifier'])
-                
-                notification_tasks = [notifier.notify(p, task['notifier_params']) for p in products_to_notify]
-                await asyncio.gather(*notification_tasks)
-
-                for product in products_to_notify:
-                    notification_manager.record_notification(product.url)
-            elif found_products: # Found products, but all were on cooldown
-                logging.info(f"所有找到的商品都在冷卻期間，本次不通知。")
-        else:
-            logging.info(f"未找到符合條件且有庫存的商品。")
-
-    except Exception as e:
-        logging.error(f"在處理任務 '{task_name}' 時發生錯誤: {e}", exc_info=True)
-    finally:
-        stats.log_summary()
+    with task_run(task_name):
+        logging.info(f"--- 開始執行露天任務: {task_name} ---")
+        report = PipelineReport()
+
+        try:
+            await run_pipeline(task, ruten_stages(task), get_scraper, get_checker, get_notifier, report)
+
+            notified_count = report['notify'].emitted
+            if notified_count:
+                logging.info(f"在任務 '{task_name}' 中找到並通知了 {notified_count} 件新商品。")
+            elif report['stock_check'].emitted:
+                logging.info("所有找到的商品都在冷卻期間，本次不通知。")
+            else:
+                logging.info("未找到符合條件且有庫存的商品。")
+
+        except Exception as e:
+            logging.error(f"在處理任務 '{task_name}' 時發生錯誤: {e}", exc_info=True)
+        finally:
+            RutenTaskStats.from_report(report).log_summary()
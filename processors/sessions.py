@@ -0,0 +1,55 @@
+# processors/sessions.py
+from contextlib import asynccontextmanager, nullcontext
+from typing import Callable, Sequence, Union
+
+import config
+from factory import SCRAPERS
+from scrapers.async_driver import create_scraper
+from scrapers.grid_scheduler import grid_scheduler
+from scrapers.routing import RoutingScraper
+from scrapers.selenium_scraper import SeleniumScraper
+
+
+def is_selenium_scraper(scraper_name: str) -> bool:
+    """Whether the named scraper drives a WebDriver session."""
+    scraper_class = SCRAPERS.get(scraper_name) if isinstance(scraper_name, str) else None
+    return scraper_class is not None and issubclass(scraper_class, SeleniumScraper)
+
+
+def needs_grid_slot(scraper_name: str) -> bool:
+    """Whether the named scraper opens a WebDriver session on the grid."""
+    return config.GRID_SCHEDULER and is_selenium_scraper(scraper_name)
+
+
+@asynccontextmanager
+async def open_scraper(get_scraper: Callable, scraper_name: Union[str, Sequence[str]], task: dict):
+    """
+    Creates one of the task's scrapers and closes it after the block. For
+    Selenium scrapers, a grid slot is held from creation to close, so the
+    session only starts once the grid has room for it.
+
+    A list of scraper names yields a `RoutingScraper` over them, which
+    opens each backend this way only once it routes a request to it, and
+    closes them after the block.
+    """
+    if not isinstance(scraper_name, str):
+        router = RoutingScraper(
+            scraper_name,
+            lambda backend: open_scraper(get_scraper, backend, task),
+            route=f"{task['name']}:{','.join(scraper_name)}",
+        )
+        try:
+            yield router
+        finally:
+            await router.aclose()
+        return
+
+    browser = task.get('browser', 'chrome')
+    if needs_grid_slot(scraper_name):
+        slot = grid_scheduler.session(browser, task=task['name'], priority=task.get('priority', 0))
+    else:
+        slot = nullcontext()
+    async with slot:
+        scraper = await create_scraper(get_scraper, scraper_name, config.SELENIUM_GRID_URL, browser=browser)
+        with scraper:
+            yield scraper
@@ -0,0 +1,94 @@
+# processors/streaming.py
+"""
+Building blocks for streaming pipelines between processing stages.
+
+Stages run as concurrent coroutines connected by bounded `Channel`s: a
+stage hands each item to the next one as soon as it's ready, and blocks
+when the next stage falls behind (backpressure). `run_stages` runs them
+together and cancels the rest when one fails, so no stage is left
+waiting on a channel nobody reads.
+"""
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Awaitable, Deque, Generic, List, Sequence, TypeVar
+
+T = TypeVar('T')
+
+
+class Channel(Generic[T]):
+    """A bounded queue between two stages; `close()` ends its consumers' iteration."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: Deque[T] = deque()
+        self._closed = False
+        self._getters: List[asyncio.Future] = []
+        self._putters: List[asyncio.Future] = []
+
+    async def put(self, item: T):
+        await self.put_many((item,))
+
+    async def put_many(self, items: Sequence[T]):
+        """Puts the items in order, as many at a time as there is room for."""
+        start = 0
+        while start < len(items):
+            while len(self._items) >= self.maxsize:
+                await self._wait(self._putters)
+            end = start + self.maxsize - len(self._items)
+            self._items.extend(items[start:end])
+            start = end
+            self._wake(self._getters)
+
+    async def close(self):
+        self._closed = True
+        self._wake(self._getters)
+
+    async def batches(self, max_size: int) -> AsyncIterator[List[T]]:
+        """
+        Yields items as soon as they arrive, together with whatever else is
+        already queued, up to `max_size` at once. Several consumers can read
+        the same channel.
+        """
+        items = self._items
+        while True:
+            while not items:
+                if self._closed:
+                    return
+                await self._wait(self._getters)
+            batch = [items.popleft() for _ in range(min(max_size, len(items)))]
+            self._wake(self._putters)
+            yield batch
+
+    async def __aiter__(self) -> AsyncIterator[T]:
+        async for batch in self.batches(1):
+            yield batch[0]
+
+    @staticmethod
+    async def _wait(waiters: List[asyncio.Future]):
+        waiter = asyncio.get_running_loop().create_future()
+        waiters.append(waiter)
+        try:
+            await waiter
+        finally:
+            if waiter in waiters:
+                waiters.remove(waiter)
+
+    @staticmethod
+    def _wake(waiters: List[asyncio.Future]):
+        # Every waiter checks again; those that find nothing wait anew
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        waiters.clear()
+
+
+async def run_stages(*stages: Awaitable):
+    """Runs the stages concurrently; if one raises, cancels the others and re-raises."""
+    tasks = [asyncio.ensure_future(stage) for stage in stages]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
@@ -0,0 +1,162 @@
+# profiling.py
+"""
+On-demand profiling of monitoring cycles.
+
+A running monitor can be asked to profile its next cycle(s), either with
+SIGUSR1 or with PROFILE_CYCLES at startup. Each profiled cycle writes, to
+PROFILE_DIR:
+    - `cycle-<time>.pstats` (cProfile mode, load with `pstats` or snakeviz), or
+    - `cycle-<time>.collapsed` (sampling mode, one `frame;frame;... count`
+      line per stack, for flamegraph.pl or speedscope), and
+    - `cycle-<time>.tracemalloc.txt` when PROFILE_TRACEMALLOC is on: the
+      allocation growth since the previous profiled cycle, for finding leaks.
+
+cProfile only sees the event loop thread; the sampling profiler also covers
+worker threads (Selenium calls run there) and costs less.
+"""
+import cProfile
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+
+PROFILE_MODES = ('cprofile', 'sampling')
+
+
+class StackSampler:
+    """Samples the stacks of all threads at a fixed interval from a background thread."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    name = getattr(code, 'co_qualname', code.co_name)  # co_qualname is new in Python 3.11
+                    stack.append(f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def write_collapsed(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class CycleProfiler:
+    """
+    Profiles the cycles requested via `request()` and writes the results to `output_dir`.
+
+    Wrap each cycle in `with profiler.profile_cycle():`; cycles run at full
+    speed unless profiling was requested.
+    """
+
+    def __init__(self, output_dir: str, mode: str = 'cprofile', sample_interval: float = 0.005,
+                 trace_allocations: bool = False, tracemalloc_frames: int = 10, top_allocations: int = 25):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"未知的效能分析模式: {mode} (可用: {', '.join(PROFILE_MODES)})")
+        self.output_dir = output_dir
+        self.mode = mode
+        self.sample_interval = sample_interval
+        self.trace_allocations = trace_allocations
+        self.top_allocations = top_allocations
+        self.pending_cycles = 0
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+        if trace_allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(tracemalloc_frames)
+            self._last_snapshot = tracemalloc.take_snapshot()
+
+    def request(self, cycles: int = 1):
+        """Profiles the next `cycles` cycles."""
+        self.pending_cycles = max(self.pending_cycles, cycles)
+        logging.info(f"已排定對接下來 {self.pending_cycles} 輪檢查進行效能分析 ({self.mode})。")
+
+    def install_signal_handler(self, loop, signum: Optional[int] = None, cycles: int = 1) -> bool:
+        """Makes `signum` (SIGUSR1 by default) request profiling; returns False where unsupported."""
+        signum = signum if signum is not None else getattr(signal, 'SIGUSR1', None)
+        if signum is None:
+            return False
+        try:
+            loop.add_signal_handler(signum, self.request, cycles)
+        except (NotImplementedError, RuntimeError, ValueError):
+            return False
+        return True
+
+    @contextmanager
+    def profile_cycle(self):
+        if self.pending_cycles <= 0:
+            yield
+            return
+
+        self.pending_cycles -= 1
+        prefix = os.path.join(self.output_dir, f"cycle-{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 1_000_000:06d}")
+        profiler = cProfile.Profile() if self.mode == 'cprofile' else None
+        sampler = StackSampler(self.sample_interval) if self.mode == 'sampling' else None
+        if profiler is not None:
+            profiler.enable()
+        else:
+            sampler.start()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            else:
+                sampler.stop()
+            try:
+                os.makedirs(self.output_dir, exist_ok=True)
+                if profiler is not None:
+                    profiler.dump_stats(f"{prefix}.pstats")
+                    logging.info(f"已寫入效能分析結果: {prefix}.pstats")
+                else:
+                    sampler.write_collapsed(f"{prefix}.collapsed")
+                    logging.info(f"已寫入取樣分析結果: {prefix}.collapsed ({sum(sampler.samples.values())} 個樣本)")
+                if self.trace_allocations:
+                    self._write_allocation_diff(f"{prefix}.tracemalloc.txt")
+            except OSError as e:
+                logging.error(f"無法寫入效能分析結果至 {self.output_dir}: {e}")
+
+    def _write_allocation_diff(self, path: str):
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        stats = snapshot.compare_to(self._last_snapshot, 'traceback')
+        self._last_snapshot = snapshot
+        growth = sum(stat.size_diff for stat in stats)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"Total growth since previous snapshot: {growth / 1024:.1f} KiB\n\n")
+            for stat in stats[:self.top_allocations]:
+                f.write(f"{stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} blocks), now {stat.size / 1024:.1f} KiB\n")
+                for line in stat.traceback.format():
+                    f.write(f"    {line}\n")
+        logging.info(f"已寫入記憶體配置差異: {path} (自上次快照增加 {growth / 1024:.1f} KiB)")
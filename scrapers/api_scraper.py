@@ -1,8 +1,17 @@
 # scrapers/api_scraper.py
 from scrapers.base import BaseScraper
+from scrapers.http_adapters import create_session
 
 class APIScraper(BaseScraper):
     """Base class for scrapers that use APIs."""
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        # An injected session (e.g. a mock in tests) is used as-is and left open
+        self._owns_session = kwargs.get('session') is None
+        self.session = kwargs.get('session') or create_session()
+
+    def close(self):
+        """Closes the session this scraper created, saving any cassette being recorded."""
+        if self._owns_session:
+            self.session.close()
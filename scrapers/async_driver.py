@@ -0,0 +1,131 @@
+# scrapers/async_driver.py
+"""
+Async access to blocking scrapers and WebDriver sessions.
+
+WebDriver calls block for as long as the browser takes (page loads allow
+up to two minutes), so running them on the event loop stalls every other
+task. `AsyncDriver` gives each session a dedicated worker thread and an
+async API; the processors create scrapers and run `scrape` through
+`create_scraper` / `run_scrape`, which keep the loop free.
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+
+
+class DriverAbortedError(RuntimeError):
+    """Raised for commands on a session that was ended by a cancellation."""
+
+
+class AsyncDriver:
+    """
+    Runs the commands of one WebDriver session on its own worker thread.
+
+    Sessions aren't thread-safe, so a single thread keeps their commands in
+    order. When the awaiting task is cancelled (e.g. its deadline expired)
+    while a command is running, the session is quit from another thread:
+    the blocked command then fails fast and frees the worker. The session
+    can't be used after that.
+    """
+
+    def __init__(self, driver, name: str = 'webdriver'):
+        self.driver = driver
+        self.aborted = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Calls `func(*args, **kwargs)` on the session's worker thread, with the caller's context."""
+        if self.aborted:
+            raise DriverAbortedError("WebDriver session 已因取消而結束。")
+        future = self._executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if not future.cancel():
+                self.abort()
+            raise
+
+    async def get(self, url: str):
+        return await self.run(self.driver.get, url)
+
+    async def execute_script(self, script: str, *args) -> Any:
+        return await self.run(self.driver.execute_script, script, *args)
+
+    async def page_source(self) -> str:
+        return await self.run(lambda: self.driver.page_source)
+
+    async def wait_until(self, condition: Callable, timeout: float, poll_frequency: float = 0.5) -> Any:
+        """
+        The async counterpart of `WebDriverWait(driver, timeout).until(condition)`:
+        polls between awaits, so the worker thread is only busy while a check runs.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            try:
+                value = await self.run(condition, self.driver)
+            except NoSuchElementException:
+                value = None
+            if value:
+                return value
+            if loop.time() >= deadline:
+                raise TimeoutException(f"等待條件逾時 ({timeout} 秒)")
+            await asyncio.sleep(poll_frequency)
+
+    def abort(self):
+        """Ends the session from a separate thread, failing any command in flight."""
+        if self.aborted:
+            return
+        self.aborted = True
+        logging.warning("WebDriver 指令執行中遭取消，結束此 session。")
+        threading.Thread(target=self._quit, name='webdriver-abort', daemon=True).start()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logging.debug(f"結束已中止的 WebDriver session 時發生錯誤: {e}")
+
+    def shutdown(self):
+        """Stops the worker thread once any command in flight has finished."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _close_quietly(future: asyncio.Future):
+    if future.cancelled() or future.exception() is not None:
+        return
+    try:
+        future.result().close()
+    except Exception as e:
+        logging.error(f"關閉已取消任務的爬蟲時發生錯誤: {e}", exc_info=True)
+
+
+async def create_scraper(factory: Callable, *args, **kwargs):
+    """
+    Calls the blocking scraper `factory` (which may wait for a Grid session)
+    in a worker thread. If the caller is cancelled first, the scraper is
+    closed as soon as it has been created.
+    """
+    future = asyncio.get_running_loop().run_in_executor(None, contextvars.copy_context().run, lambda: factory(*args, **kwargs))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        future.add_done_callback(_close_quietly)
+        raise
+
+
+async def run_scrape(scraper, *args):
+    """
+    Awaits `scraper.ascrape(*args)` when the scraper has one, so blocking
+    work happens off the event loop; falls back to calling `scrape` directly
+    (e.g. for test doubles).
+    """
+    if asyncio.iscoroutinefunction(getattr(type(scraper), 'ascrape', None)):
+        return await scraper.ascrape(*args)
+    return scraper.scrape(*args)
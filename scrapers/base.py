@@ -1,8 +1,29 @@
 # scrapers/base.py
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Iterable, List, Optional
 from models import Product
 
+class ScrapeResult(list):
+    """
+    Products scraped from a payload with a known `fingerprint`. When
+    `unchanged`, the payload was the same as on the previous call and the
+    products were reused instead of parsed again.
+    """
+
+    def __init__(self, products: Iterable[Product] = (), fingerprint: Optional[str] = None, unchanged: bool = False):
+        super().__init__(products)
+        self.fingerprint = fingerprint
+        self.unchanged = unchanged
+
+
+class ScrapeDelta(list):
+    """
+    The products an incremental scrape found since its last call. Empty
+    means nothing new was listed, not that the search came back empty.
+    """
+
+
 class BaseScraper(ABC):
     """Abstract base class for all scrapers."""
 
@@ -25,4 +46,8 @@ class BaseScraper(ABC):
         The main method to scrape a website.
         It should be implemented by each concrete scraper.
         """
-        pass
\ No newline at end of file
+        pass
+
+    async def ascrape(self, *args):
+        """Runs `scrape` in a worker thread, so blocking I/O doesn't stall the event loop."""
+        return await asyncio.to_thread(self.scrape, *args)
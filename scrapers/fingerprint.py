@@ -0,0 +1,87 @@
+# scrapers/fingerprint.py
+"""
+Payload fingerprints, so a scraper can skip parsing a page or API response
+it has already parsed.
+
+A scraper hashes the part of the payload its products come from (the
+product list markup, or the API JSON) and asks `payload_cache` for the
+products it parsed from that payload last time. On a match it returns
+copies of them as an unchanged `ScrapeResult`, instead of parsing again;
+the pipeline then reuses the check results for them as well.
+"""
+import copy
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Pattern, Tuple, Union
+
+import config
+from models import Product
+
+_TAG = re.compile(r'<(/?)div\b', re.IGNORECASE)
+
+
+def fingerprint(payload: Union[str, bytes]) -> str:
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8', 'surrogatepass')
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def element_region(html: str, opening_tag: Pattern) -> str:
+    """
+    The markup from the first `<div>` matching `opening_tag` to the end of
+    the last one, e.g. a page's product cards without the scripts and
+    tokens around them; '' if there is none.
+    """
+    first = opening_tag.search(html)
+    if first is None:
+        return ''
+    last = first
+    for last in opening_tag.finditer(html, last.end()):
+        pass
+    depth = 0
+    for tag in _TAG.finditer(html, last.start()):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            return html[first.start():html.find('>', tag.end()) + 1]
+    return html[first.start():]
+
+
+class PayloadCache:
+    """The last payload fingerprint and products of each source (a scraper and its URL or query)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[str, List[Product]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def reuse(self, source: str, digest: str) -> Optional[List[Product]]:
+        """Copies of the products last parsed from this exact payload, or None."""
+        if not config.PAYLOAD_FINGERPRINTS:
+            return None
+        with self._lock:
+            entry = self._entries.get(source)
+            if entry is None or entry[0] != digest:
+                return None
+            self._entries.move_to_end(source)
+            products = entry[1]
+        # Copies, since later stages may update the products they get
+        return [copy.copy(product) for product in products]
+
+    def store(self, source: str, digest: str, products: List[Product]):
+        if not config.PAYLOAD_FINGERPRINTS:
+            return
+        with self._lock:
+            self._entries[source] = (digest, [copy.copy(product) for product in products])
+            self._entries.move_to_end(source)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Singleton instance
+payload_cache = PayloadCache(config.PAYLOAD_CACHE_ENTRIES)
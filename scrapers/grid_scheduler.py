@@ -0,0 +1,209 @@
+# scrapers/grid_scheduler.py
+"""
+Client-side scheduling of WebDriver sessions against the Selenium Grid.
+
+Each node only runs `SE_NODE_MAX_SESSIONS` browsers at once; session
+requests beyond that queue inside the hub, where they count against the
+scrapers' connection retries. `GridSessionScheduler` instead holds them
+here: it polls the grid `/status` endpoint for free slots per browser and
+grants them to waiting requests, higher `priority` first and, within a
+priority, to the task currently holding the fewest sessions.
+
+If the status endpoint can't be reached, requests are let through
+unthrottled, as before; the scrapers' own retries then apply.
+"""
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+import config
+import metrics
+
+STATUS_TIMEOUT_SECONDS = 2
+
+
+@dataclass
+class GridCapacity:
+    """Slots on the grid's available nodes for one browser."""
+    total: int = 0
+    busy: int = 0
+
+
+def parse_grid_status(status: dict) -> Dict[str, GridCapacity]:
+    """
+    Per-browser capacity from a Selenium 4 `/status` response. A node runs
+    at most `maxSessions` sessions, however many slots it advertises.
+    """
+    capacity: Dict[str, GridCapacity] = {}
+    for node in (status.get('value') or {}).get('nodes') or []:
+        if node.get('availability') != 'UP':
+            continue
+        slots = node.get('slots') or []
+        node_busy = sum(1 for slot in slots if slot.get('session'))
+        node_free = max(0, node.get('maxSessions', len(slots)) - node_busy)
+        per_browser: Dict[str, List[int]] = {}
+        for slot in slots:
+            browser = ((slot.get('stereotype') or {}).get('browserName') or '').lower()
+            counts = per_browser.setdefault(browser, [0, 0])
+            counts[0] += 1
+            counts[1] += 1 if slot.get('session') else 0
+        for browser, (slot_count, busy) in per_browser.items():
+            entry = capacity.setdefault(browser, GridCapacity())
+            entry.busy += busy
+            entry.total += busy + min(slot_count - busy, node_free)
+    return capacity
+
+
+@dataclass
+class _Request:
+    browser: str
+    task: str
+    priority: int
+    seq: int
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    granted: bool = False
+
+
+class GridSessionScheduler:
+    """Grants Selenium Grid session slots to tasks, fairly and by priority."""
+
+    def __init__(self, grid_url: Optional[str] = None, poll_seconds: Optional[float] = None,
+                 fetch_status: Optional[Callable[[str], dict]] = None):
+        self.grid_url = grid_url
+        self.poll_seconds = poll_seconds
+        self._fetch_status = fetch_status or self._fetch_status_http
+        self._waiting: List[_Request] = []
+        self._active: Dict[str, int] = {}  # Sessions we hold, per browser
+        self._task_active: Dict[str, int] = {}  # ... and per task
+        self._capacity: Optional[Dict[str, GridCapacity]] = None
+        self._polled_at = float('-inf')
+        self._status_failed = False
+        self._seq = itertools.count()
+        self._loop = None
+        self._changed: Optional[asyncio.Condition] = None
+        self._poll_lock: Optional[asyncio.Lock] = None
+
+    @asynccontextmanager
+    async def session(self, browser: str, task: str = '', priority: int = 0):
+        """Holds one grid slot for `browser` while the block runs."""
+        request = await self.acquire(browser, task, priority)
+        try:
+            yield
+        finally:
+            self.release(request)
+
+    async def acquire(self, browser: str, task: str = '', priority: int = 0) -> _Request:
+        """Waits until a slot for `browser` is granted to this request."""
+        self._bind_loop()
+        request = _Request(browser.lower(), task, priority, next(self._seq))
+        self._waiting.append(request)
+        metrics.GRID_QUEUED_REQUESTS.set(self._queued(request.browser), browser=request.browser)
+        try:
+            while True:
+                await self._refresh()
+                self._dispatch()
+                if request.granted:
+                    break
+                async with self._changed:
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), self._poll_interval())
+                    except asyncio.TimeoutError:
+                        pass
+        except BaseException:
+            if request.granted:
+                self.release(request)
+            else:
+                self._waiting.remove(request)
+            raise
+        finally:
+            metrics.GRID_QUEUED_REQUESTS.set(self._queued(request.browser), browser=request.browser)
+
+        waited = time.perf_counter() - request.enqueued_at
+        metrics.GRID_QUEUE_WAIT_SECONDS.observe(waited, browser=request.browser)
+        if waited >= 1:
+            logging.info(f"任務 '{task}' 等待 {request.browser} Grid 空位 {waited:.1f} 秒。")
+        return request
+
+    def release(self, request: _Request):
+        if not request.granted:
+            return
+        request.granted = False
+        self._active[request.browser] -= 1
+        self._task_active[request.task] -= 1
+        if self._changed is not None and self._loop is asyncio.get_running_loop():
+            self._dispatch()
+            asyncio.ensure_future(self._notify_all())
+
+    def _dispatch(self):
+        """Grants free slots to the waiting requests, in scheduling order."""
+        for request in sorted(self._waiting, key=self._order):
+            if self._free_slots(request.browser) > 0:
+                self._waiting.remove(request)
+                request.granted = True
+                self._active[request.browser] = self._active.get(request.browser, 0) + 1
+                self._task_active[request.task] = self._task_active.get(request.task, 0) + 1
+
+    def _order(self, request: _Request):
+        return (-request.priority, self._task_active.get(request.task, 0), request.seq)
+
+    def _free_slots(self, browser: str) -> float:
+        if self._capacity is None:
+            return float('inf')  # Grid status unknown: don't throttle
+        capacity = self._capacity.get(browser, GridCapacity())
+        # Sessions we were granted may not show up as busy yet
+        in_use = max(capacity.busy, self._active.get(browser, 0))
+        return capacity.total - in_use
+
+    def _queued(self, browser: str) -> int:
+        return sum(1 for request in self._waiting if request.browser == browser)
+
+    async def _refresh(self):
+        """Re-reads the grid status once per poll interval, shared by all waiters."""
+        async with self._poll_lock:
+            if time.monotonic() - self._polled_at < self._poll_interval():
+                return
+            grid_url = self.grid_url or config.SELENIUM_GRID_URL
+            try:
+                status = await asyncio.to_thread(self._fetch_status, grid_url)
+                self._capacity = parse_grid_status(status)
+                if self._status_failed:
+                    logging.info("已恢復讀取 Selenium Grid 狀態。")
+                self._status_failed = False
+            except Exception as e:
+                self._capacity = None
+                if not self._status_failed:
+                    logging.warning(f"無法讀取 Selenium Grid 狀態 ({e})，暫不限制 session 數量。")
+                self._status_failed = True
+            self._polled_at = time.monotonic()
+            for browser, capacity in (self._capacity or {}).items():
+                metrics.GRID_FREE_SLOTS.set(max(0, capacity.total - capacity.busy), browser=browser)
+
+    def _poll_interval(self) -> float:
+        return self.poll_seconds if self.poll_seconds is not None else config.GRID_STATUS_POLL_SECONDS
+
+    async def _notify_all(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._changed = asyncio.Condition()
+            self._poll_lock = asyncio.Lock()
+
+    @staticmethod
+    def _fetch_status_http(grid_url: str) -> dict:
+        response = requests.get(f"{grid_url.rstrip('/')}/status", timeout=STATUS_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        return response.json()
+
+
+# Singleton instance
+grid_scheduler = GridSessionScheduler()
@@ -0,0 +1,492 @@
+# scrapers/http_adapters.py
+"""
+Transport adapters mounted on the API scrapers' requests session.
+
+Adapters wrap an inner adapter, so they stack: the session created by
+`create_session()` is always instrumented, and per HTTP_CASSETTE_MODE it
+records real traffic to a cassette or replays a cassette without network.
+Otherwise it can revalidate GET responses cached on disk (HTTP_CACHE_DIR).
+"""
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import mmap
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+import config
+import metrics
+import tracing
+
+
+class InstrumentedAdapter(BaseAdapter):
+    """
+    Counts requests, failures and received body bytes per upstream host.
+
+    Failures are both raised transport errors and responses with status >= 400.
+    """
+
+    def __init__(self, inner: Optional[BaseAdapter] = None):
+        super().__init__()
+        self.inner = inner or HTTPAdapter()
+
+    def send(self, request, **kwargs):
+        host = urlparse(request.url).hostname or 'unknown'
+        metrics.HTTP_REQUESTS.inc(host=host)
+        with tracing.span('http.request', method=request.method, host=host) as request_span:
+            try:
+                response = self.inner.send(request, **kwargs)
+            except requests.exceptions.RequestException:
+                metrics.HTTP_ERRORS.inc(host=host)
+                raise
+            request_span.set('status', response.status_code)
+        if response.status_code >= 400:
+            metrics.HTTP_ERRORS.inc(host=host)
+        if not kwargs.get('stream'):
+            # Non-streamed bodies are read here anyway, so this costs no extra I/O
+            metrics.HTTP_RECEIVED_BYTES.inc(len(response.content or b''), host=host)
+        return response
+
+    def close(self):
+        self.inner.close()
+
+
+class Cassette:
+    """
+    Recorded HTTP interactions, stored as gzip-compressed JSON lines.
+
+    Each line holds the method, URL (with query string), status, headers,
+    body and the original elapsed time. Text bodies are stored as text,
+    anything else base64-encoded.
+    """
+    _open_cassettes: Dict[str, 'Cassette'] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+        self.interactions: Dict[Tuple[str, str], List[dict]] = {}
+        self._pending: List[dict] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path: str) -> 'Cassette':
+        """Returns the cassette for `path`, shared by every session in the process."""
+        with cls._registry_lock:
+            cassette = cls._open_cassettes.get(path)
+            if cassette is None:
+                cassette = cls._open_cassettes[path] = cls(path)
+                if os.path.exists(path):
+                    cassette.load()
+            return cassette
+
+    def load(self):
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    self._index(json.loads(line))
+
+    def _index(self, entry: dict):
+        self.interactions.setdefault((entry['method'], entry['url']), []).append(entry)
+
+    def record(self, request, response):
+        content = response.content or b''
+        entry = {
+            'method': request.method,
+            'url': request.url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': dict(response.headers),
+            'elapsed': response.elapsed.total_seconds() if response.elapsed else 0.0,
+        }
+        try:
+            entry['body'] = content.decode('utf-8')
+        except UnicodeDecodeError:
+            entry['body_b64'] = base64.b64encode(content).decode('ascii')
+        with self._lock:
+            self._index(entry)
+            self._pending.append(entry)
+
+    def save(self):
+        """Appends the interactions recorded since the last save to the file."""
+        with self._lock:
+            entries, self._pending = self._pending, []
+        if not entries:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Each save adds a gzip member; gzip readers concatenate them transparently
+        with gzip.open(self.path, 'at', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        logging.info(f"已將 {len(entries)} 筆 HTTP 互動寫入 {self.path}")
+
+    @property
+    def pending(self) -> int:
+        """Number of recorded interactions not yet saved."""
+        return len(self._pending)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self.interactions.values())
+
+
+class RecordingAdapter(BaseAdapter):
+    """Passes requests to the inner adapter and records every response to a cassette."""
+
+    def __init__(self, cassette: Cassette, inner: Optional[BaseAdapter] = None, save_every: int = 100):
+        super().__init__()
+        self.cassette = cassette
+        self.inner = inner or HTTPAdapter()
+        self.save_every = save_every
+
+    def send(self, request, **kwargs):
+        response = self.inner.send(request, **kwargs)
+        self.cassette.record(request, response)
+        if self.cassette.pending >= self.save_every:
+            self.cassette.save()
+        return response
+
+    def close(self):
+        self.cassette.save()
+        self.inner.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Serves responses from a cassette instead of the network.
+
+    Requests are matched by method and full URL. When the same request was
+    recorded several times, the recordings are served in order and the last
+    one repeats. Each response is delayed by `latency` seconds plus uniform
+    jitter of up to +/- `jitter`; with `recorded_latency` the original
+    elapsed time is used as the base latency instead.
+    Unrecorded requests raise ConnectionError, so a replay never silently
+    reaches a real upstream.
+    """
+
+    def __init__(self, cassette: Cassette, latency: float = 0.0, jitter: float = 0.0,
+                 recorded_latency: bool = False, seed: Optional[int] = None):
+        super().__init__()
+        self.cassette = cassette
+        self.latency = latency
+        self.jitter = jitter
+        self.recorded_latency = recorded_latency
+        self._rng = random.Random(seed)
+        self._positions: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        key = (request.method, request.url)
+        entries = self.cassette.interactions.get(key)
+        if not entries:
+            raise requests.exceptions.ConnectionError(f"{request.method} {request.url} 不在 cassette 中", request=request)
+        with self._lock:
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            entry = entries[min(position, len(entries) - 1)]
+            delay = entry['elapsed'] if self.recorded_latency else self.latency
+            if self.jitter:
+                delay += self._rng.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        return self._build_response(request, entry, delay)
+
+    @staticmethod
+    def _build_response(request, entry: dict, delay: float) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = entry.get('reason')
+        response.headers = CaseInsensitiveDict(entry.get('headers', {}))
+        # The recorded body is already decoded, so drop transfer encodings
+        response.headers.pop('Content-Encoding', None)
+        if 'body_b64' in entry:
+            response._content = base64.b64decode(entry['body_b64'])
+        else:
+            response._content = entry.get('body', '').encode('utf-8')
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(seconds=max(delay, 0.0))
+        return response
+
+    def close(self):
+        pass
+
+
+class HTTPCache:
+    """
+    Response bodies and their validators (ETag / Last-Modified) by URL, kept
+    on disk so they survive restarts.
+
+    Each body is a file in `directory`, read back memory-mapped; an index
+    file holds the validators and headers. Up to `max_bytes` of bodies are
+    kept, least recently used evicted first.
+    """
+    INDEX_FILE = 'index.json'
+    _open_caches: Dict[str, 'HTTPCache'] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, directory: str, max_bytes: int, save_every: int = 100):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.save_every = save_every
+        self._entries: 'OrderedDict[str, dict]' = OrderedDict()
+        self._bytes = 0
+        self._unsaved = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, directory: str, max_bytes: int) -> 'HTTPCache':
+        """Returns the cache in `directory`, shared by every session in the process."""
+        with cls._registry_lock:
+            cache = cls._open_caches.get(directory)
+            if cache is None:
+                cache = cls._open_caches[directory] = cls(directory, max_bytes)
+                cache.load()
+            return cache
+
+    def load(self):
+        """Reads the index, skipping entries whose body file is gone or truncated."""
+        try:
+            with open(os.path.join(self.directory, self.INDEX_FILE), encoding='utf-8') as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning(f"無法讀取 HTTP 快取索引，將重新建立: {e}")
+            return
+        with self._lock:
+            for url, entry in entries:
+                try:
+                    size = os.path.getsize(self._body_path(url))
+                except OSError:
+                    continue
+                if size == entry['size']:
+                    self._entries[url] = entry
+                    self._bytes += size
+            self._evict()
+        metrics.HTTP_CACHE_BYTES.set(self._bytes)
+
+    def _body_path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.blake2b(url.encode(), digest_size=16).hexdigest())
+
+    def validators(self, url: str) -> Optional[dict]:
+        """The conditional-request headers for a cached `url`, or None."""
+        entry = self._entries.get(url)
+        if entry is None:
+            return None
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def read(self, url: str) -> Optional[Tuple[Dict[str, str], bytes]]:
+        """The cached headers and body of `url`, marking it recently used; None if it is gone."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            self._entries.move_to_end(url)
+        try:
+            with open(self._body_path(url), 'rb') as f:
+                if entry['size'] == 0:
+                    body = b''
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                        body = view[:]
+        except (OSError, ValueError):
+            self._drop(url)
+            return None
+        return entry['headers'], body
+
+    def store(self, url: str, headers: Dict[str, str], body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        entry = {
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            # The body is stored decoded, so its transfer headers no longer apply
+            'headers': {name: value for name, value in headers.items()
+                        if name.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')},
+            'size': len(body),
+        }
+        path = self._body_path(url)
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        os.makedirs(self.directory, exist_ok=True)
+        with open(temporary, 'wb') as f:
+            f.write(body)
+        with self._lock:
+            os.replace(temporary, path)
+            previous = self._entries.pop(url, None)
+            if previous is not None:
+                self._bytes -= previous['size']
+            self._entries[url] = entry
+            self._bytes += entry['size']
+            self._evict()
+            self._unsaved += 1
+            save = self._unsaved >= self.save_every
+        metrics.HTTP_CACHE_BYTES.set(self._bytes)
+        if save:
+            self.save()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            url, entry = self._entries.popitem(last=False)
+            self._bytes -= entry['size']
+            try:
+                os.remove(self._body_path(url))
+            except OSError:
+                pass
+
+    def _drop(self, url: str):
+        with self._lock:
+            entry = self._entries.pop(url, None)
+            if entry is not None:
+                self._bytes -= entry['size']
+        metrics.HTTP_CACHE_BYTES.set(self._bytes)
+
+    def save(self):
+        """Writes the index, least recently used entry first."""
+        with self._lock:
+            entries = list(self._entries.items())
+            self._unsaved = 0
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, self.INDEX_FILE)
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(temporary, path)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ConditionalCacheAdapter(BaseAdapter):
+    """
+    Revalidates cached GET responses with If-None-Match / If-Modified-Since.
+
+    A 304 is served from the cache as the full response, so an unchanged
+    page costs a round trip but no body. 200 responses carrying an ETag or
+    Last-Modified (and no `Cache-Control: no-store`) are cached. Mounted
+    outside `InstrumentedAdapter`, so received bytes count only what came
+    over the wire.
+    """
+
+    def __init__(self, cache: HTTPCache, inner: Optional[BaseAdapter] = None):
+        super().__init__()
+        self.cache = cache
+        self.inner = inner or HTTPAdapter()
+        self._lock = threading.Lock()
+        self._lookups: Dict[str, List[int]] = {}  # Per host: hits, lookups
+
+    def send(self, request, **kwargs):
+        if request.method != 'GET' or kwargs.get('stream'):
+            return self.inner.send(request, **kwargs)
+
+        url = request.url
+        validators = self.cache.validators(url)
+        if validators:
+            request = request.copy()  # The caller's request keeps its headers
+            request.headers.update(validators)
+        response = self.inner.send(request, **kwargs)
+
+        host = urlparse(url).hostname or 'unknown'
+        if response.status_code == 304 and validators:
+            cached = self.cache.read(url)
+            if cached is None:  # Evicted meanwhile: fetch it in full
+                for name in validators:
+                    del request.headers[name]
+                return self.send(request, **kwargs)
+            self._count(host, hit=True)
+            metrics.HTTP_CACHE_SAVED_BYTES.inc(len(cached[1]), host=host)
+            return self._from_cache(request, response, *cached)
+
+        self._count(host, hit=False)
+        if response.status_code == 200 and self._cacheable(response):
+            self.cache.store(url, response.headers, response.content)
+        return response
+
+    @staticmethod
+    def _cacheable(response) -> bool:
+        headers = response.headers
+        return bool(headers.get('ETag') or headers.get('Last-Modified')) and \
+            'no-store' not in headers.get('Cache-Control', '').lower()
+
+    def _count(self, host: str, hit: bool):
+        metrics.HTTP_CACHE_REQUESTS.inc(host=host, result='hit' if hit else 'miss')
+        with self._lock:
+            counts = self._lookups.setdefault(host, [0, 0])
+            counts[0] += hit
+            counts[1] += 1
+            ratio = counts[0] / counts[1]
+        metrics.HTTP_CACHE_HIT_RATIO.set(ratio, host=host)
+
+    @staticmethod
+    def _from_cache(request, not_modified, headers: Dict[str, str], body: bytes) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(headers)
+        # A 304 may carry fresher validators and caching headers
+        for name, value in not_modified.headers.items():
+            if name.lower() not in ('content-length', 'content-encoding', 'transfer-encoding', 'connection'):
+                response.headers[name] = value
+        response._content = body
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.elapsed = not_modified.elapsed
+        response.connection = getattr(not_modified, 'connection', None)
+        return response
+
+    def close(self):
+        self.cache.save()
+        self.inner.close()
+
+
+def create_session() -> requests.Session:
+    """
+    Creates a requests session with instrumented HTTP(S) adapters mounted,
+    recording to or replaying from HTTP_CASSETTE_PATH per HTTP_CASSETTE_MODE.
+    Otherwise, with HTTP_CACHE_DIR set, GET responses are cached there and
+    revalidated with conditional requests (cassettes keep full responses,
+    so the cache is off while recording or replaying).
+    """
+    mode = getattr(config, 'HTTP_CASSETTE_MODE', 'off')
+    if mode == 'record':
+        transport = RecordingAdapter(Cassette.open(config.HTTP_CASSETTE_PATH))
+    elif mode == 'replay':
+        transport = ReplayAdapter(
+            Cassette.open(config.HTTP_CASSETTE_PATH),
+            latency=config.HTTP_REPLAY_LATENCY_SECONDS,
+            jitter=config.HTTP_REPLAY_JITTER_SECONDS,
+        )
+    else:
+        transport = HTTPAdapter()
+
+    session = requests.Session()
+    adapter = InstrumentedAdapter(transport)
+    if mode not in ('record', 'replay') and getattr(config, 'HTTP_CACHE_DIR', ''):
+        adapter = ConditionalCacheAdapter(HTTPCache.open(config.HTTP_CACHE_DIR, config.HTTP_CACHE_MAX_BYTES), adapter)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
@@ -2,14 +2,22 @@
 import re
 import logging
 from typing import List, Optional
+from urllib.parse import urlparse
 
 from bs4 import BeautifulSoup, Tag
 from selenium.common.exceptions import TimeoutException
 import time
 
+from scrapers.base import ScrapeResult
+from scrapers.fingerprint import element_region, fingerprint, payload_cache
 from scrapers.selenium_scraper import SeleniumScraper
 from models import Product
 import config
+import tracing
+
+PRODUCT_CARD_CLASS = 'meepshop-meep-ui__productList-index__productCard'
+PRODUCT_CARD_TAG = re.compile(r'<div\b[^>]*\bclass="[^"]*\b' + PRODUCT_CARD_CLASS + r'\b')
+
 
 class PulamoScraper(SeleniumScraper):
     """A scraper for the Pulamo website."""
@@ -30,7 +38,8 @@ class PulamoScraper(SeleniumScraper):
         for attempt in range(getattr(config, 'MAX_RETRIES', 10)):
             try:
                 logging.info(f"Scraping URL: {url} (Attempt {attempt + 1}/{getattr(config, 'MAX_RETRIES', 10)})")
-                self.driver.get(url)
+                with tracing.span('driver.get', host=urlparse(url).hostname):
+                    self.driver.get(url)
                 break
             except TimeoutException:
                 if attempt < getattr(config, 'MAX_RETRIES', 10) - 1:
@@ -40,8 +49,21 @@ class PulamoScraper(SeleniumScraper):
                     logging.error(f"Failed to load page {url} after {getattr(config, 'MAX_RETRIES', 10)} attempts.")
                     return []
 
-        soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-        product_cards = soup.find_all('div', class_='meepshop-meep-ui__productList-index__productCard')
+        self._record_page_load()
+        page_source = self.driver.page_source
+        # Only the product cards, so tokens and scripts elsewhere on the page don't change the fingerprint
+        cards_html = element_region(page_source, PRODUCT_CARD_TAG)
+        digest = fingerprint(cards_html)
+        source = f"{type(self).__name__}:{url}"
+        reused = payload_cache.reuse(source, digest) if cards_html else None
+        if reused is not None:
+            logging.debug(f"{url} 的商品列表與上次相同，沿用上次解析的 {len(reused)} 件商品。")
+            return ScrapeResult(reused, digest, unchanged=True)
+
+        with tracing.span('html.parse') as parse_span:
+            soup = BeautifulSoup(cards_html or page_source, 'html.parser')
+            product_cards = soup.find_all('div', class_=PRODUCT_CARD_CLASS)
+            parse_span.set('items', len(product_cards))
 
         if not product_cards:
             logging.info(f"在 {url} 上沒有找到任何商品卡片。")
@@ -52,7 +74,8 @@ class PulamoScraper(SeleniumScraper):
             product = self._parse_product_card(card, url)
             if product:
                 products.append(product)
-        return products
+        payload_cache.store(source, digest, products)
+        return ScrapeResult(products, digest)
 
     def _parse_product_card(self, card: Tag, page_url: str) -> Optional[Product]:
         """Parses a single product card to extract its details."""
@@ -0,0 +1,245 @@
+# scrapers/routing.py
+"""
+Routing between interchangeable scraper backends.
+
+A task can list several scrapers for the same job, cheapest first, e.g.
+`'search_scraper': ['ruten_api.RutenSearchAPIScraper', 'ruten.RutenSearchScraper']`.
+`RoutingScraper` sends each request to the cheapest healthy backend, by
+its measured latency and success rate, and falls back down the list when
+one raises or comes back empty where it used to return results (e.g. an
+API schema change or a 403 that the API scraper logs and turns into `[]`).
+
+`BackendHealth` keeps each backend's recent outcomes and latencies across
+cycles. After `ROUTING_FAILURE_THRESHOLD` consecutive failures a backend
+is skipped for `ROUTING_COOLDOWN_SECONDS`, then tried again.
+"""
+import asyncio
+import logging
+import statistics
+import time
+from collections import deque
+from contextlib import AsyncExitStack
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import config
+import metrics
+from scrapers.async_driver import run_scrape
+from scrapers.base import BaseScraper, ScrapeDelta
+
+logger = logging.getLogger(__name__)
+
+# Backend costs closer than this are treated as equal, so timing noise
+# doesn't reorder backends and the declared order breaks the tie.
+COST_RESOLUTION_SECONDS = 0.1
+
+
+class BackendHealth:
+    """Recent success rate and latency of each scraper backend."""
+
+    def __init__(self):
+        self._outcomes: Dict[str, Deque[Tuple[bool, float]]] = {}
+        self._consecutive_failures: Dict[str, int] = {}
+        self._skip_until: Dict[str, float] = {}
+        self._returned_results: Dict[Tuple[str, str], bool] = {}
+
+    def record(self, backend: str, ok: bool, seconds: float):
+        outcomes = self._outcomes.setdefault(backend, deque(maxlen=config.ROUTING_WINDOW))
+        outcomes.append((ok, seconds))
+        if ok:
+            self._consecutive_failures[backend] = 0
+            self._skip_until.pop(backend, None)
+            return
+        failures = self._consecutive_failures.get(backend, 0) + 1
+        self._consecutive_failures[backend] = failures
+        if failures >= config.ROUTING_FAILURE_THRESHOLD:
+            self._skip_until[backend] = time.monotonic() + config.ROUTING_COOLDOWN_SECONDS
+            logger.warning(
+                f"爬蟲後端 '{backend}' 連續失敗 {failures} 次 ({self.describe(backend)})，"
+                f"{config.ROUTING_COOLDOWN_SECONDS:g} 秒內改用其他後端。"
+            )
+
+    def is_healthy(self, backend: str) -> bool:
+        return time.monotonic() >= self._skip_until.get(backend, 0)
+
+    def success_rate(self, backend: str) -> Optional[float]:
+        outcomes = self._outcomes.get(backend)
+        if not outcomes:
+            return None
+        return sum(1 for ok, _ in outcomes if ok) / len(outcomes)
+
+    def median_seconds(self, backend: str) -> Optional[float]:
+        outcomes = self._outcomes.get(backend)
+        if not outcomes:
+            return None
+        return statistics.median(seconds for _, seconds in outcomes)
+
+    def cost(self, backend: str) -> Optional[float]:
+        """
+        Expected seconds per successful result: the median latency over the
+        success rate. The rate is smoothed (one success and one failure are
+        assumed up front), so a few failures raise the cost without ruling
+        the backend out for good.
+        """
+        outcomes = self._outcomes.get(backend)
+        if not outcomes:
+            return None
+        successes = sum(1 for ok, _ in outcomes if ok)
+        return self.median_seconds(backend) * (len(outcomes) + 2) / (successes + 1)
+
+    def describe(self, backend: str) -> str:
+        rate, seconds = self.success_rate(backend), self.median_seconds(backend)
+        if rate is None:
+            return "尚無紀錄"
+        return f"最近成功率 {rate:.0%}，中位耗時 {seconds:.1f} 秒"
+
+    def expects_results(self, route: str, backend: str) -> bool:
+        """
+        Whether `backend` returned results the last time it served `route`,
+        or hasn't served it yet: an upstream may already be failing at
+        startup, so a first empty result is checked too.
+        """
+        return self._returned_results.get((route, backend), True)
+
+    def served(self, route: str, backend: str, had_results: bool):
+        self._returned_results[(route, backend)] = had_results
+
+    def reset(self):
+        self._outcomes.clear()
+        self._consecutive_failures.clear()
+        self._skip_until.clear()
+        self._returned_results.clear()
+
+
+def is_empty_result(result: Any) -> bool:
+    """An empty search, or a page scrape in which every page failed. Nothing new in an incremental search is not."""
+    if isinstance(result, ScrapeDelta):
+        return False
+    if isinstance(result, tuple):
+        products, stats = result
+        return bool(products) and len(stats.get('failed_to_scrape', [])) >= len(products)
+    return not result
+
+
+class RoutingScraper(BaseScraper):
+    """
+    Serves each request from the cheapest healthy backend, falling back to
+    the next candidate on failure. `backends` lists them cheapest first,
+    which decides until they have been measured and whenever costs tie.
+
+    `open_backend(name)` returns an async context manager yielding a ready
+    scraper. A backend is opened the first time a request is routed to it
+    and kept for later requests until `aclose()`, which closes them all
+    (releasing their grid slots).
+    """
+
+    def __init__(self, backends: Sequence[str], open_backend: Callable, route: str = '',
+                 health: Optional[BackendHealth] = None):
+        super().__init__()
+        self.backends: List[str] = list(backends)
+        self.open_backend = open_backend
+        self.route = route or ','.join(self.backends)
+        self.health = health or backend_health
+        self._opened: Dict[str, Any] = {}
+        self._opening: Dict[str, asyncio.Lock] = {}
+        self._stack = AsyncExitStack()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def candidates(self) -> List[str]:
+        """
+        Healthy backends by cost, cheapest first, then the skipped ones as a
+        last resort. A backend without history counts as free, so it gets
+        measured.
+        """
+        def rank(index: int) -> Tuple[int, int]:
+            cost = self.health.cost(self.backends[index]) or 0.0
+            return round(cost / COST_RESOLUTION_SECONDS), index
+
+        healthy = [i for i, b in enumerate(self.backends) if self.health.is_healthy(b)]
+        ranked = [self.backends[i] for i in sorted(healthy, key=rank)]
+        return ranked + [b for b in self.backends if b not in ranked]
+
+    async def ascrape(self, *args):
+        candidates = self.candidates()
+        suspects: List[Tuple[str, float]] = []  # Came back empty where they used to (or may) return results
+        empty_result = None
+        last_error: Optional[Exception] = None
+
+        for index, backend in enumerate(candidates):
+            start = time.perf_counter()
+            try:
+                scraper = await self._backend(backend)
+                result = await run_scrape(scraper, *args)
+            except Exception as e:
+                seconds = time.perf_counter() - start
+                logger.warning(f"爬蟲後端 '{backend}' 發生錯誤: {e}", exc_info=True)
+                self._record(backend, False, seconds)
+                last_error = e
+                continue
+            seconds = time.perf_counter() - start
+
+            empty = is_empty_result(result)
+            if empty and index < len(candidates) - 1 and self.health.expects_results(self.route, backend):
+                logger.warning(f"爬蟲後端 '{backend}' 沒有回傳結果，改用下一個後端確認。")
+                suspects.append((backend, seconds))
+                empty_result = result
+                continue
+
+            # An empty result elsewhere too means the suspects were right
+            for suspect, suspect_seconds in suspects:
+                self._record(suspect, empty, suspect_seconds)
+                self.health.served(self.route, suspect, not empty)
+            self._record(backend, True, seconds)
+            self.health.served(self.route, backend, not empty)
+            metrics.ROUTED_REQUESTS.inc(backend=backend)
+            if index > 0:
+                logger.info(f"由備援爬蟲後端 '{backend}' 提供結果 ({self.health.describe(backend)})。")
+            return result
+
+        for suspect, suspect_seconds in suspects:
+            self._record(suspect, True, suspect_seconds)
+        if empty_result is not None:
+            metrics.ROUTED_REQUESTS.inc(backend=suspects[-1][0])
+            return empty_result
+        raise last_error or RuntimeError("沒有可用的爬蟲後端。")
+
+    def scrape(self, *args):
+        """
+        Blocking counterpart of `ascrape`, for callers without an event loop.
+        Runs on a loop kept for the router, since the opened backends stay
+        bound to it until `close()`.
+        """
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(self.ascrape(*args))
+
+    def close(self):
+        if self._loop is None:
+            return
+        try:
+            self._loop.run_until_complete(self.aclose())
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    async def aclose(self):
+        """Closes the backends opened so far."""
+        self._opened.clear()
+        self._opening.clear()
+        await self._stack.aclose()
+
+    async def _backend(self, backend: str):
+        # Concurrent requests share one opened scraper per backend
+        async with self._opening.setdefault(backend, asyncio.Lock()):
+            if backend not in self._opened:
+                self._opened[backend] = await self._stack.enter_async_context(self.open_backend(backend))
+        return self._opened[backend]
+
+    def _record(self, backend: str, ok: bool, seconds: float):
+        self.health.record(backend, ok, seconds)
+        metrics.ROUTING_BACKEND_SECONDS.observe(seconds, backend=backend)
+        if not ok:
+            metrics.ROUTING_BACKEND_FAILURES.inc(backend=backend)
+
+
+# Singleton instance
+backend_health = BackendHealth()
@@ -2,7 +2,9 @@
 import logging
 import re
 import time
+from collections import deque
 from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 
 from bs4 import BeautifulSoup, Tag
 from selenium.common.exceptions import TimeoutException
@@ -11,10 +13,67 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
 import config
+import tracing
 from models import Product
 from scrapers.selenium_scraper import SeleniumScraper
 from task_config_manager import task_config_manager
 
+logger = logging.getLogger(__name__)
+
+PAGE_READY_TIMEOUT_SECONDS = 20
+TAB_POLL_SECONDS = 0.2
+# Marks the current document before navigating away, so a tab isn't read
+# as ready while the previous product's page is still showing
+NAVIGATE_SCRIPT = "document.documentElement.setAttribute('data-stale', '1'); window.location.href = arguments[0];"
+PAGE_READY_SCRIPT = (
+    "return !document.documentElement.hasAttribute('data-stale')"
+    " && document.querySelector(\"meta[name='description']\") !== null;"
+)
+
+
+def parse_product_card(item: Tag) -> Optional[Product]:
+    """Parses one `.product-item` card of a search result page."""
+    try:
+        name_wrap = item.find('a', class_='rt-product-card-name-wrap')
+        if not name_wrap:
+            return None
+
+        title = name_wrap.find('p', class_='rt-product-card-name').text.strip()
+        product_url = name_wrap['href']
+
+        price_element = item.find('span', class_='rt-text-price')
+        price_text = price_element.text.strip() if price_element else '0'
+        price_match = re.search(r'([0-9,]+)', price_text)
+        price = int(price_match.group(1).replace(',', '')) if price_match else 0
+
+        return Product(
+            title=title,
+            price=price,
+            url=product_url,
+            in_stock=False  # Placeholder, will be checked by another component
+        )
+    except (AttributeError, ValueError, TypeError, KeyError) as e:
+        logger.warning("Could not parse a product card: %s", e)
+        logger.debug("無法解析商品卡片，HTML 內容: \n%s", item)
+        return None
+
+
+def parse_search_page(page_source: str) -> List[Product]:
+    """
+    Parses the product cards of a search result page. Shared by the browser
+    and the HTTP search scrapers, so both return the same products.
+    """
+    with tracing.span('html.parse') as parse_span:
+        soup = BeautifulSoup(page_source, 'html.parser')
+        product_items = soup.find_all('div', class_='product-item')
+        parse_span.set('items', len(product_items))
+    products = []
+    for item in product_items:
+        product = parse_product_card(item)
+        if product:
+            products.append(product)
+    return products
+
 
 class RutenSearchScraper(SeleniumScraper):
     """A scraper for the Ruten search result page."""
@@ -25,19 +84,20 @@ class RutenSearchScraper(SeleniumScraper):
         """
         url = params.get("search_url")
         if not url:
-            logging.error("search_url not provided in params.")
+            logger.error("search_url not provided in params.")
             return []
 
         if not self.driver:
-            logging.error("WebDriver not initialized. Cannot scrape.")
+            logger.error("WebDriver not initialized. Cannot scrape.")
             return []
 
         for attempt in range(getattr(config, 'MAX_RETRIES', 10)):
             try:
-                self.driver.get(url)
-                WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "product-item"))
-                )
+                with tracing.span('driver.get', host=urlparse(url).hostname):
+                    self.driver.get(url)
+                    WebDriverWait(self.driver, 20).until(
+                        EC.presence_of_element_located((By.CLASS_NAME, "product-item"))
+                    )
 
                 # Get scroll height
                 last_height = self.driver.execute_script("return document.body.scrollHeight")
@@ -51,55 +111,27 @@ class RutenSearchScraper(SeleniumScraper):
                 break
             except TimeoutException:
                 if attempt < getattr(config, 'MAX_RETRIES', 10) - 1:
-                    logging.warning(f"Timeout waiting for product items on page {url}. Retrying in {config.RETRY_DELAY_SECONDS} seconds...")
+                    logger.warning(f"Timeout waiting for product items on page {url}. Retrying in {config.RETRY_DELAY_SECONDS} seconds...")
                     time.sleep(config.RETRY_DELAY_SECONDS)
                 else:
-                    logging.error(f"Failed to load page {url} after {getattr(config, 'MAX_RETRIES', 10)} attempts.")
+                    logger.error(f"Failed to load page {url} after {getattr(config, 'MAX_RETRIES', 10)} attempts.")
                     return []
 
-        soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-        product_items = soup.find_all('div', class_='product-item')
-
-        if not product_items:
+        self._record_page_load()
+        page_source = self.driver.page_source
+        products = parse_search_page(page_source)
+        if not products:
             with open(f"/tmp/ruten_page_source_{time.time()}.html", "w") as f:
-                f.write(self.driver.page_source)
-            logging.warning(f"在 {url} 上沒有找到任何商品 (class='product-item')")
+                f.write(page_source)
+            logger.warning(f"在 {url} 上沒有找到任何商品 (class='product-item')")
             return []
 
-        products = []
-        for item in product_items:
-            product = self._parse_product_item(item)
-            if product:
-                products.append(product)
-        
-        logging.info(f"在 {url} 上共找到 {len(products)} 件商品。")
+        logger.info(f"在 {url} 上共找到 {len(products)} 件商品。")
         return products
 
     def _parse_product_item(self, item: Tag) -> Optional[Product]:
         """Parses a single product item to extract its details."""
-        try:
-            name_wrap = item.find('a', class_='rt-product-card-name-wrap')
-            if not name_wrap:
-                return None
-
-            title = name_wrap.find('p', class_='rt-product-card-name').text.strip()
-            product_url = name_wrap['href']
-
-            price_element = item.find('span', class_='rt-text-price')
-            price_text = price_element.text.strip() if price_element else '0'
-            price_match = re.search(r'([0-9,]+)', price_text)
-            price = int(price_match.group(1).replace(',', '')) if price_match else 0
-
-            return Product(
-                title=title,
-                price=price,
-                url=product_url,
-                in_stock=False  # Placeholder, will be checked by another component
-            )
-        except (AttributeError, ValueError, TypeError) as e:
-            logging.warning(f"Could not parse a product card: {e}")
-            logging.warning(f"無法解析商品卡片，HTML 內容: \n{item.prettify()}")
-            return None
+        return parse_product_card(item)
 
 class RutenProductPageScraper(SeleniumScraper):
     """
@@ -120,41 +152,135 @@ class RutenProductPageScraper(SeleniumScraper):
         }
 
         if not self.driver:
-            logging.error("WebDriver not initialized. Cannot scrape.")
+            logger.error("WebDriver not initialized. Cannot scrape.")
             stats['failed_to_scrape'] = [p.title for p in products]
             return products, stats
 
-        updated_products = []
-        for product in products:
-            try:
-                self.driver.get(product.url)
-                WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "meta[name='description']"))
-                )
-                soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-                
-                # Update product with stock info, seller and payment methods
-                product.in_stock = self._parse_stock_status(soup)
-                product.seller = self._parse_seller_id(soup)
-                product.payment_methods = self._parse_payment_methods(soup)
-
-                if product.seller and product.seller in blacklisted_sellers:
-                    logging.info(f"Product '{product.title}' seller '{product.seller}' is blacklisted, skipping.")
+        tabs = max(1, int(params.get('page_tabs', config.RUTEN_PAGE_TABS)))
+        if tabs > 1 and len(products) > 1:
+            updated_products = self._scrape_in_tabs(products, min(tabs, len(products)), blacklisted_sellers, stats)
+        else:
+            updated_products = []
+            for product in products:
+                try:
+                    with tracing.span('driver.get', host=urlparse(product.url).hostname):
+                        self.driver.get(product.url)
+                        WebDriverWait(self.driver, PAGE_READY_TIMEOUT_SECONDS).until(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, "meta[name='description']"))
+                        )
+                    self._record_page_load()
+                    self._apply_page(product, self.driver.page_source, blacklisted_sellers, stats)
+                except Exception as e:
+                    logger.error("Failed to scrape product page %s: %s", product.url, e, exc_info=True)
                     product.in_stock = False
-
-                if not product.in_stock:
-                    stats['out_of_stock_after_scrape'].append(product.title)
+                    stats['failed_to_scrape'].append(product.title)
                 updated_products.append(product)
 
-            except Exception as e:
-                logging.error(f"Failed to scrape product page {product.url}: {e}", exc_info=True)
-                product.in_stock = False
-                stats['failed_to_scrape'].append(product.title)
-                updated_products.append(product)
-        
-        logging.info(f"Scraped {len(updated_products)} product pages. {len(stats['failed_to_scrape'])} failed, {len(stats['out_of_stock_after_scrape'])} out of stock.")
+        logger.info(
+            "Scraped %d product pages. %d failed, %d out of stock.",
+            len(updated_products), len(stats['failed_to_scrape']), len(stats['out_of_stock_after_scrape'])
+        )
         return updated_products, stats
 
+    def _apply_page(self, product: Product, page_source: str, blacklisted_sellers: List[str], stats: Dict[str, Any]):
+        """Updates `product` with the stock, seller and payment methods on its page."""
+        with tracing.span('html.parse'):
+            soup = BeautifulSoup(page_source, 'html.parser')
+
+        product.in_stock = self._parse_stock_status(soup)
+        product.seller = self._parse_seller_id(soup)
+        product.payment_methods = self._parse_payment_methods(soup)
+
+        if product.seller and product.seller in blacklisted_sellers:
+            logger.info("Product '%s' seller '%s' is blacklisted, skipping.", product.title, product.seller)
+            product.in_stock = False
+
+        if not product.in_stock:
+            stats['out_of_stock_after_scrape'].append(product.title)
+
+    def _scrape_in_tabs(self, products: List[Product], tabs: int, blacklisted_sellers: List[str],
+                        stats: Dict[str, Any]) -> List[Product]:
+        """
+        Loads product pages in `tabs` tabs of this session at once.
+
+        Navigations are started from a script, so they don't block, and tabs
+        are polled in turn; whichever page is ready is parsed and its tab
+        moves on to the next product. Results keep the input order.
+        """
+        pending = deque(enumerate(products))
+        in_flight: Dict[str, Tuple[int, Product, float]] = {}
+        results: List[Optional[Product]] = [None] * len(products)
+
+        def start(handle: str):
+            """Starts the tab on the next product whose navigation doesn't raise, failing those that do."""
+            while pending:
+                index, product = pending.popleft()
+                try:
+                    self.driver.switch_to.window(handle)
+                    self.driver.execute_script(NAVIGATE_SCRIPT, product.url)
+                except Exception as e:
+                    fail(index, product, e)
+                    continue
+                in_flight[handle] = (index, product, time.monotonic())
+                return
+
+        def fail(index: int, product: Product, reason):
+            logger.error("Failed to scrape product page %s: %s", product.url, reason)
+            product.in_stock = False
+            stats['failed_to_scrape'].append(product.title)
+            results[index] = product
+
+        original_handle = self.driver.current_window_handle
+        handles = [original_handle]
+        try:
+            for _ in range(tabs - 1):
+                self.driver.switch_to.new_window('tab')
+                handles.append(self.driver.current_window_handle)
+
+            with tracing.span('ruten.tabs', tabs=tabs, pages=len(products)):
+                for handle in handles:
+                    start(handle)
+
+                while in_flight:
+                    harvested = False
+                    for handle, (index, product, started) in list(in_flight.items()):
+                        try:
+                            self.driver.switch_to.window(handle)
+                            ready = self.driver.execute_script(PAGE_READY_SCRIPT)
+                            if ready:
+                                self._record_page_load()
+                                self._apply_page(product, self.driver.page_source, blacklisted_sellers, stats)
+                                results[index] = product
+                            elif time.monotonic() - started >= PAGE_READY_TIMEOUT_SECONDS:
+                                fail(index, product, f"page not ready after {PAGE_READY_TIMEOUT_SECONDS} seconds")
+                            else:
+                                continue
+                        except Exception as e:
+                            fail(index, product, e)
+                        del in_flight[handle]
+                        harvested = True
+                        start(handle)
+                    if not harvested:
+                        time.sleep(TAB_POLL_SECONDS)
+        except Exception as e:
+            logger.error("Multi-tab scraping failed: %s", e, exc_info=True)
+            for index, product, _ in in_flight.values():
+                fail(index, product, e)
+            while pending:
+                fail(*pending.popleft(), e)
+        finally:
+            for handle in handles[1:]:
+                try:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+                except Exception as e:
+                    logger.warning("Could not close tab: %s", e)
+            try:
+                self.driver.switch_to.window(original_handle)
+            except Exception as e:
+                logger.warning("Could not switch back to the original tab: %s", e)
+        return results
+
     def _parse_stock_status(self, soup: BeautifulSoup) -> bool:
         """Parses the soup of a product page to determine stock status."""
         # Method 1: Check meta description for stock count
@@ -164,18 +290,18 @@ class RutenProductPageScraper(SeleniumScraper):
             stock_match = re.search(r'庫存: (\d+)', content)
             if stock_match:
                 stock_count = int(stock_match.group(1))
-                logging.info(f"Meta tag shows stock count: {stock_count}")
+                logger.debug("Meta tag shows stock count: %d", stock_count)
                 return stock_count > 0
 
         # Method 2: Check for "sold out" button as a fallback
         sold_out_button = soup.find('input', class_='item-soldout-action')
         if sold_out_button:
-            logging.info("Found 'sold out' button.")
+            logger.debug("Found 'sold out' button.")
             return False
 
         # If neither the meta tag provides info nor a sold-out button is found,
         # assume it's in stock as a reasonable default.
-        logging.warning("Could not determine stock status from meta tag or button, assuming in stock.")
+        logger.warning("Could not determine stock status from meta tag or button, assuming in stock.")
         return True
 
     def _parse_seller_id(self, soup: BeautifulSoup) -> Optional[str]:
@@ -187,7 +313,7 @@ class RutenProductPageScraper(SeleniumScraper):
             if seller_link and seller_link.get('href'):
                 href = seller_link['href']
                 seller_id = href.split('/')[-1]
-                logging.info(f"Found seller ID: {seller_id}")
+                logger.debug("Found seller ID: %s", seller_id)
                 return seller_id
             
             # Fallback: Try to find it in the script context
@@ -197,13 +323,13 @@ class RutenProductPageScraper(SeleniumScraper):
                     match = re.search(r'"nick":"(.*?)"', script.string)
                     if match:
                         seller_id = match.group(1)
-                        logging.info(f"Found seller ID from script context: {seller_id}")
+                        logger.debug("Found seller ID from script context: %s", seller_id)
                         return seller_id
 
-            logging.warning("Could not find seller ID on the page.")
+            logger.warning("Could not find seller ID on the page.")
             return None
         except Exception as e:
-            logging.error(f"Error parsing seller ID: {e}", exc_info=True)
+            logger.error(f"Error parsing seller ID: {e}", exc_info=True)
             return None
 
     def _parse_payment_methods(self, soup: BeautifulSoup) -> List[str]:
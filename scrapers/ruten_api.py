@@ -3,23 +3,131 @@ import logging
 import requests
 import re
 import json
-from typing import List, Tuple, Dict, Any
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import List, Tuple, Dict, Any, Optional
 from urllib.parse import urlparse, parse_qs
 
+import config
+import metrics
+from logger_config import current_task
 from models import Product
+import tracing
 from scrapers.api_scraper import APIScraper
+from scrapers.base import ScrapeDelta, ScrapeResult
+from scrapers.fingerprint import fingerprint, payload_cache
+from scrapers.ruten import parse_search_page
+
+logger = logging.getLogger(__name__)
+
+PriceBand = Tuple[int, Optional[int]]  # Inclusive low and high price; no high: open-ended
+
+
+def parse_price_band(price_range: Optional[str]) -> PriceBand:
+    """A `prc.now` value such as '900-1400' (or '900-', or none) as a band."""
+    low, _, high = (price_range or '').partition('-')
+    return int(low) if low.strip() else 0, int(high) if high.strip() else None
+
+
+def format_price_band(band: PriceBand) -> str:
+    low, high = band
+    return f"{low}-{high}" if high is not None else f"{low}-"
+
+
+def split_price_band(band: PriceBand, parts: int) -> List[PriceBand]:
+    """
+    Splits a band into up to `parts` adjacent bands covering the same
+    prices. An open-ended band keeps an open-ended last part, above
+    `RUTEN_PRICE_BAND_CEILING` (or twice its low price, once above that).
+    """
+    low, high = band
+    if high is None:
+        if parts < 2:
+            return [band]
+        ceiling = max(config.RUTEN_PRICE_BAND_CEILING, low * 2, low + parts)
+        return split_price_band((low, ceiling), parts - 1) + [(ceiling + 1, None)]
+    parts = max(1, min(parts, high - low + 1))
+    bounds = [low + (high - low + 1) * i // parts for i in range(parts + 1)]
+    return [(bounds[i], bounds[i + 1] - 1) for i in range(parts)]
+
+
+@dataclass
+class SearchWatermark:
+    """The newest listing seen for one search query, and when its full sweep last ran."""
+    high_id: int
+    swept_at: float
+
+
+class SearchWatermarks:
+    """
+    High-water marks of incremental searches, by task and query: tasks
+    sharing a query each need to see its new listings.
+    """
+
+    def __init__(self):
+        self._marks: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], SearchWatermark] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(api_params: dict, task_name: Optional[str] = None) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+        """The mark's key; `task_name` defaults to the task running (see `logger_config.current_task`)."""
+        query = tuple(sorted((k, v) for k, v in api_params.items() if k not in ('sort', 'limit', 'offset')))
+        return (current_task.get() or '' if task_name is None else task_name), query
+
+    def get(self, key) -> Optional[SearchWatermark]:
+        with self._lock:
+            return self._marks.get(key)
+
+    def advance(self, key, ids: List[str], swept: bool = False):
+        """Raises the mark to the newest of `ids`; after a full sweep, also restarts the sweep interval."""
+        with self._lock:
+            mark = self._marks.get(key)
+            high_id = max([int(i) for i in ids if i.isdigit()] + ([mark.high_id] if mark else [0]))
+            swept_at = time.monotonic() if swept or mark is None else mark.swept_at
+            self._marks[key] = SearchWatermark(high_id, swept_at)
+
+    def clear(self):
+        with self._lock:
+            self._marks.clear()
+
 
 class RutenSearchAPIScraper(APIScraper):
     """
     Scrapes Ruten search results using a two-step API call process,
     which is much faster than using Selenium.
+
+    With `'incremental': True` in the params (default
+    `RUTEN_INCREMENTAL_SEARCH`), only listings newer than the query's
+    high-water mark are returned: the search is sorted newest first and
+    paged until it reaches a known ID, and details are fetched for the new
+    IDs only. Every `RUTEN_FULL_SWEEP_SECONDS` (and on the first call) the
+    query runs in full instead, to catch stock changes on older listings.
+
+    With `'price_bands': N` (default `RUTEN_PRICE_BANDS`, 0 for off), a full
+    query is split into N adjacent `prc.now` price bands searched
+    concurrently, so a broad query isn't cut off at the API's result limit:
+    a band with more results than one page is split in two until it fits
+    (one that can't be split is paged through). The IDs are merged, deduped
+    by ProdId, and their details fetched in concurrent chunks.
     """
-    SEARCH_API_URL = "https://rtapi.ruten.com.tw/api/search/v3/index.php/core/prod"
-    DETAILS_API_URL = "https://rtapi.ruten.com.tw/api/prod/v2/index.php/prod"
+    SEARCH_API_PATH = "/api/search/v3/index.php/core/prod"
+    DETAILS_API_PATH = "/api/prod/v2/index.php/prod"
+    NEWEST_FIRST = 'new/dc'
+    HEADERS = {
+        'accept': 'application/json, text/plain, */*',
+        'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36',
+    }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.session = kwargs.get('session', requests.Session())
+    @property
+    def search_api_url(self) -> str:
+        return config.RUTEN_API_BASE_URL + self.SEARCH_API_PATH
+
+    @property
+    def details_api_url(self) -> str:
+        return config.RUTEN_API_BASE_URL + self.DETAILS_API_PATH
 
     def scrape(self, params: dict) -> List[Product]:
         """
@@ -28,14 +136,14 @@ class RutenSearchAPIScraper(APIScraper):
         """
         search_url = params.get("search_url")
         if not search_url:
-            logging.error("RutenSearchAPIScraper: 'search_url' not provided in params.")
+            logger.error("RutenSearchAPIScraper: 'search_url' not provided in params.")
             return []
 
         try:
             parsed_url = urlparse(search_url)
             query_params = parse_qs(parsed_url.query)
         except Exception as e:
-            logging.error(f"Could not parse search URL '{search_url}': {e}")
+            logger.error(f"Could not parse search URL '{search_url}': {e}")
             return []
 
         default_api_params = {
@@ -47,66 +155,211 @@ class RutenSearchAPIScraper(APIScraper):
         user_api_params = {k: v[0] for k, v in query_params.items()}
         api_params = {**default_api_params, **user_api_params}
 
-        headers = {
-            'accept': 'application/json, text/plain, */*',
-            'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36',
-        }
-
         try:
-            id_response = self.session.get(self.SEARCH_API_URL, params=api_params, headers=headers)
-            id_response.raise_for_status()
-            id_data = id_response.json()
-
-            if not id_data.get("Rows"):
-                logging.info("Ruten Search API returned no products.")
-                return []
-
-            product_ids = [item["Id"] for item in id_data["Rows"]]
+            if params.get('incremental', config.RUTEN_INCREMENTAL_SEARCH):
+                return self._scrape_incremental(api_params, params)
+            product_ids = self._search_full(api_params, params)
             if not product_ids:
+                logger.info("Ruten Search API returned no products.")
                 return []
-            
-            details_params = {'id': ','.join(product_ids)}
-            details_response = self.session.get(self.DETAILS_API_URL, params=details_params, headers=headers)
-            details_response.raise_for_status()
-            details_data = details_response.json()
-
-            products = []
-            for item in details_data:
-                price = int(item.get("PriceRange", [0])[0] / 100)
-                product = Product(
-                    title=item.get("ProdName"),
-                    price=price,
-                    in_stock=(item.get("StockStatus", 0) > 0),
-                    url=f"https://www.ruten.com.tw/item/show?{item.get('ProdId')}",
-                    seller=item.get("SellerId"),
-                    payment_methods=item.get("Payment", "").split(',')
-                )
-                products.append(product)
-            
-            return products
+            return self._fetch_details(product_ids, 'full')
 
         except requests.exceptions.RequestException as e:
-            logging.error(f"Error fetching Ruten API: {e}")
+            logger.error(f"Error fetching Ruten API: {e}")
             return []
         except (json.JSONDecodeError, ValueError) as e:
-            logging.error(f"Error parsing JSON response from Ruten API: {e}")
+            logger.error(f"Error parsing JSON response from Ruten API: {e}")
+            return []
+
+    def _scrape_incremental(self, api_params: dict, params: dict) -> List[Product]:
+        full_sweep_seconds = params.get('full_sweep_seconds', config.RUTEN_FULL_SWEEP_SECONDS)
+        key = search_watermarks.key(api_params)
+        mark = search_watermarks.get(key)
+        if mark is None or time.monotonic() - mark.swept_at >= full_sweep_seconds:
+            product_ids = self._search_full(api_params, params)
+            products = self._fetch_details(product_ids, 'full') if product_ids else []
+            # The newest listing may rank below the full sweep's page
+            newest = self._search_ids({**api_params, 'sort': self.NEWEST_FIRST, 'limit': '1', 'offset': '1'})
+            search_watermarks.advance(key, product_ids + newest, swept=True)
+            return products
+
+        page_size = config.RUTEN_INCREMENTAL_PAGE_SIZE
+        new_ids: List[str] = []
+        for page in range(config.RUTEN_INCREMENTAL_MAX_PAGES):
+            page_params = {**api_params, 'sort': self.NEWEST_FIRST, 'limit': str(page_size), 'offset': str(page * page_size + 1)}
+            page_ids = self._search_ids(page_params)
+            fresh = [i for i in page_ids if not i.isdigit() or int(i) > mark.high_id]
+            new_ids.extend(i for i in fresh if i not in new_ids)  # Pages shift as listings arrive
+            if len(fresh) < len(page_ids) or len(page_ids) < page_size:
+                break
+        else:
+            logger.warning(
+                f"露天增量搜尋翻了 {config.RUTEN_INCREMENTAL_MAX_PAGES} 頁仍未遇到已知商品，"
+                f"較舊的新商品留待下次完整掃描。"
+            )
+
+        products = ScrapeDelta(self._fetch_details(new_ids, 'incremental') if new_ids else [])
+        search_watermarks.advance(key, new_ids)
+        logger.debug(f"露天增量搜尋找到 {len(products)} 件新商品。")
+        return products
+
+    def _search_full(self, api_params: dict, params: dict) -> List[str]:
+        band_count = params.get('price_bands', config.RUTEN_PRICE_BANDS)
+        if not band_count:
+            return self._search_ids(api_params)
+        return self._search_price_bands(api_params, band_count)
+
+    def _search_ids(self, api_params: dict) -> List[str]:
+        return self._search_page(api_params)[0]
+
+    def _search_page(self, api_params: dict) -> Tuple[List[str], int]:
+        """One page of search result IDs, and the query's total number of results."""
+        id_response = self.session.get(self.search_api_url, params=api_params, headers=self.HEADERS)
+        id_response.raise_for_status()
+        id_data = id_response.json()
+        ids = [item["Id"] for item in id_data.get("Rows") or []]
+        return ids, int(id_data.get("TotalRows") or len(ids))
+
+    def _search_price_bands(self, api_params: dict, band_count: int) -> List[str]:
+        bands = split_price_band(parse_price_band(api_params.get('prc.now')), band_count)
+        ids_by_band: Dict[PriceBand, List[str]] = {}
+
+        def search_band(band: PriceBand) -> Tuple[List[str], int]:
+            return self._search_page({**api_params, 'prc.now': format_price_band(band), 'offset': '1'})
+
+        with ThreadPoolExecutor(config.RUTEN_SEARCH_CONCURRENCY) as pool:
+            pending = {self._submit(pool, search_band, band): band for band in bands}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    band = pending.pop(future)
+                    ids, total = future.result()
+                    halves = split_price_band(band, 2) if total > len(ids) else [band]
+                    if len(halves) > 1:
+                        metrics.SEARCH_PRICE_BANDS.inc(result='split')
+                        pending.update({self._submit(pool, search_band, half): half for half in halves})
+                        continue
+                    metrics.SEARCH_PRICE_BANDS.inc(result='searched')
+                    if total > len(ids):  # A single price with more listings than a page
+                        ids += self._page_through(api_params, band, len(ids), total)
+                    ids_by_band[band] = ids
+
+        product_ids = list(dict.fromkeys(i for band in sorted(ids_by_band) for i in ids_by_band[band]))
+        logger.debug(f"露天搜尋分成 {len(ids_by_band)} 個價格區間，共 {len(product_ids)} 件商品。")
+        return product_ids
+
+    def _page_through(self, api_params: dict, band: PriceBand, fetched: int, total: int) -> List[str]:
+        ids: List[str] = []
+        for _ in range(config.RUTEN_BAND_MAX_PAGES - 1):
+            if fetched >= total:
+                break
+            page_ids = self._search_ids({**api_params, 'prc.now': format_price_band(band), 'offset': str(fetched + 1)})
+            if not page_ids:
+                break
+            ids += page_ids
+            fetched += len(page_ids)
+        return ids
+
+    @staticmethod
+    def _submit(pool: ThreadPoolExecutor, fn, *args):
+        # Keeps the task's log context in the worker thread
+        return pool.submit(contextvars.copy_context().run, fn, *args)
+
+    def _fetch_details(self, product_ids: List[str], mode: str) -> ScrapeResult:
+        """The products' details; unchanged when every details response was the same as last time."""
+        metrics.SEARCH_DETAILS_REQUESTED.inc(len(product_ids), mode=mode)
+        chunk = config.RUTEN_DETAILS_CHUNK_SIZE
+        if len(product_ids) <= chunk:
+            results = [self._fetch_details_chunk(product_ids)]
+        else:
+            chunks = [product_ids[i:i + chunk] for i in range(0, len(product_ids), chunk)]
+            with ThreadPoolExecutor(config.RUTEN_SEARCH_CONCURRENCY) as pool:
+                futures = [self._submit(pool, self._fetch_details_chunk, ids) for ids in chunks]
+                results = [future.result() for future in futures]
+        return ScrapeResult(
+            [product for result in results for product in result],
+            fingerprint(''.join(result.fingerprint for result in results)),
+            unchanged=all(result.unchanged for result in results),
+        )
+
+    def _fetch_details_chunk(self, product_ids: List[str]) -> ScrapeResult:
+        details_params = {'id': ','.join(product_ids)}
+        details_response = self.session.get(self.details_api_url, params=details_params, headers=self.HEADERS)
+        details_response.raise_for_status()
+        digest = fingerprint(details_response.content)
+        source = f"{type(self).__name__}:{fingerprint(details_params['id'])}"
+        reused = payload_cache.reuse(source, digest)
+        if reused is not None:
+            return ScrapeResult(reused, digest, unchanged=True)
+        details_data = details_response.json()
+
+        products = []
+        for item in details_data:
+            price = int(item.get("PriceRange", [0])[0] / 100)
+            product = Product(
+                title=item.get("ProdName"),
+                price=price,
+                in_stock=(item.get("StockStatus", 0) > 0),
+                url=f"{config.RUTEN_BASE_URL}/item/show?{item.get('ProdId')}",
+                seller=item.get("SellerId"),
+                payment_methods=item.get("Payment", "").split(',')
+            )
+            products.append(product)
+
+        payload_cache.store(source, digest, products)
+        return ScrapeResult(products, digest)
+
+class RutenSearchHTTPScraper(RutenSearchAPIScraper):
+    """
+    An HTTP-only drop-in for the Selenium `RutenSearchScraper`: fetches the
+    search page and parses its product cards with the same parser, so both
+    return the same products, without a browser, scrolling or sleeps.
+
+    Ruten currently serves the cards as empty placeholders that the page
+    fills in from the search API (see `temp/ruten_search.html`); when no
+    card can be parsed, the products are fetched from that API directly.
+    """
+    PAGE_HEADERS = {
+        'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36',
+    }
+
+    def scrape(self, params: dict) -> List[Product]:
+        search_url = params.get("search_url")
+        if not search_url:
+            logger.error("RutenSearchHTTPScraper: 'search_url' not provided in params.")
             return []
 
+        try:
+            response = self.session.get(search_url, headers=self.PAGE_HEADERS)
+            response.raise_for_status()
+            products = parse_search_page(response.text)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"無法取得露天搜尋頁 {search_url}: {e}，改用搜尋 API。")
+            products = []
+
+        if products:
+            logger.info(f"在 {search_url} 上共找到 {len(products)} 件商品。")
+            return products
+        logger.debug(f"搜尋頁 {search_url} 沒有伺服器端渲染的商品卡片，改用搜尋 API。")
+        return super().scrape(params)
+
 class RutenProductPageAPIScraper(APIScraper):
     """
     Scrapes individual Ruten product pages to get the true price range.
     """
-    PRICE_API_URL = "https://rapi.ruten.com.tw/api/items/v2/list"
+    PRICE_API_PATH = "/api/items/v2/list"
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.session = kwargs.get('session', requests.Session())
+    @property
+    def price_api_url(self) -> str:
+        return config.RUTEN_RAPI_BASE_URL + self.PRICE_API_PATH
 
+    @tracing.traced('ruten.accurate_price', lambda self, product_id: {'product_id': product_id})
     def _get_accurate_price(self, product_id: str) -> int:
         try:
             params = {'gno': product_id, 'level': 'simple'}
             headers = {'User-Agent': 'Mozilla/5.0'}
-            response = self.session.get(self.PRICE_API_URL, params=params, headers=headers)
+            response = self.session.get(self.price_api_url, params=params, headers=headers)
             response.raise_for_status()
             json_data = response.json()
             product_list = json_data.get('data', [])
@@ -115,7 +368,7 @@ class RutenProductPageAPIScraper(APIScraper):
                 if min_price is not None:
                     return min_price
         except (requests.exceptions.RequestException, json.JSONDecodeError, IndexError, KeyError) as e:
-            logging.warning(f"Could not fetch/parse accurate price for {product_id}: {e}")
+            logger.warning("Could not fetch/parse accurate price for %s: %s", product_id, e)
         return None
 
     def scrape(self, products: List[Product], params: dict) -> Tuple[List[Product], Dict[str, Any]]:
@@ -134,7 +387,7 @@ class RutenProductPageAPIScraper(APIScraper):
 
                 match = re.search(r'RT\.context = (\{.*?\});', html_content, re.DOTALL)
                 if not match:
-                    logging.warning(f"Could not find RT.context for {product.url}")
+                    logger.warning("Could not find RT.context for %s", product.url)
                     stats['failed_to_scrape'].append(product.title)
                     product.in_stock = False
                     updated_products.append(product)
@@ -165,9 +418,13 @@ class RutenProductPageAPIScraper(APIScraper):
                 updated_products.append(product)
 
             except Exception as e:
-                logging.error(f"An unexpected error occurred while scraping {product.url}: {e}", exc_info=True)
+                logger.error("An unexpected error occurred while scraping %s: %s", product.url, e, exc_info=True)
                 stats['failed_to_scrape'].append(product.title)
                 product.in_stock = False
                 updated_products.append(product)
         
-        return updated_products, stats
\ No newline at end of file
+        return updated_products, stats
+
+
+# Singleton instance
+search_watermarks = SearchWatermarks()
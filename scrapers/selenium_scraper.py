@@ -9,8 +9,12 @@ from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 
 import config
+import metrics
+import tracing
 from models import Product
+from scrapers.async_driver import AsyncDriver
 from scrapers.base import BaseScraper
+from scrapers.request_blocking import default_blocklist, page_load_stats
 
 class SeleniumScraper(BaseScraper):
     """Base class for scrapers that use Selenium."""
@@ -19,10 +23,13 @@ class SeleniumScraper(BaseScraper):
         super().__init__(grid_url, browser)
         self.grid_url = grid_url
         self.browser = browser
+        self.blocklist = default_blocklist()
         self.driver = self._initialize_driver()
+        self.async_driver = None
         if self.driver:
             self.driver.set_page_load_timeout(120)
             self.driver.implicitly_wait(10)
+            self.async_driver = AsyncDriver(self.driver, name=f'webdriver-{browser}')
 
     def _initialize_driver(self) -> Optional[WebDriver]:
         """Sets up and connects to the Selenium Grid."""
@@ -30,6 +37,8 @@ class SeleniumScraper(BaseScraper):
             options = FirefoxOptions()
             options.set_preference('permissions.default.image', 2)
             options.set_preference('permissions.default.stylesheet', 2)
+            if config.BLOCK_WEB_FONTS:
+                options.set_preference('gfx.downloadable_fonts.enabled', False)
         else:  # Default to chrome
             options = ChromeOptions()
             options.add_experimental_option("prefs", {
@@ -37,6 +46,9 @@ class SeleniumScraper(BaseScraper):
                 "profile.managed_default_content_settings.stylesheets": 2,
             })
 
+        if self.blocklist is not None:
+            self.blocklist.apply(options, self.browser)
+
         options.add_argument("--headless")
         options.add_argument("--no-sandbox")
         options.add_argument("--disable-dev-shm-usage")
@@ -47,19 +59,11 @@ class SeleniumScraper(BaseScraper):
 
         for attempt in range(getattr(config, 'MAX_RETRIES', 10)):
             try:
-                driver = webdriver.Remote(
-                    command_executor=self.grid_url, options=options
-                )
-                if self.browser == 'chrome':
-                    blocked_urls = [
-                        "*://*.google-analytics.com/*",
-                        "*://*.googletagmanager.com/*",
-                        "*://*.facebook.net/*",
-                        "*://*.fbcdn.net/*",
-                        "*://*.connect.facebook.net/*",
-                    ]
-                    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_urls})
-                    driver.execute_cdp_cmd("Network.enable", {})
+                with metrics.WEBDRIVER_SESSION_SECONDS.time(browser=self.browser), \
+                        tracing.span('webdriver.session', browser=self.browser):
+                    driver = webdriver.Remote(
+                        command_executor=self.grid_url, options=options
+                    )
                 return driver
             except Exception as e:
                 if attempt < getattr(config, 'MAX_RETRIES', 10) - 1:
@@ -70,8 +74,38 @@ class SeleniumScraper(BaseScraper):
                     return None
         return None
 
+    def _record_page_load(self):
+        """Records the requests and bytes of the page just loaded, and the estimated requests blocked."""
+        if not config.PAGE_LOAD_STATS:
+            return
+        try:
+            stats = page_load_stats(self.driver, self.blocklist)
+        except Exception as e:
+            logging.debug(f"無法取得頁面載入統計: {e}")
+            return
+        metrics.PAGE_LOAD_REQUESTS.observe(stats['requests'], browser=self.browser)
+        metrics.PAGE_LOAD_BYTES.observe(stats['bytes'], browser=self.browser)
+        if stats['blocked_requests']:
+            metrics.BLOCKED_REQUESTS.inc(stats['blocked_requests'], browser=self.browser)
+        logging.debug(
+            f"頁面載入: {stats['requests']} 個請求, {stats['bytes'] / 1024:.0f} KiB, 估計至少封鎖 {stats['blocked_requests']} 個請求"
+        )
+
+    async def ascrape(self, *args):
+        """
+        Runs `scrape` on the session's worker thread. Cancelling the caller
+        ends the session, so a stuck page load doesn't outlive the task.
+        """
+        if self.async_driver is None:
+            return self.scrape(*args)
+        return await self.async_driver.run(self.scrape, *args)
+
     def close(self):
         """Close the WebDriver session."""
+        if self.async_driver is not None:
+            self.async_driver.shutdown()
+            if self.async_driver.aborted:
+                return  # Already being quit by the abort
         if self.driver:
             try:
                 self.driver.quit()
@@ -0,0 +1,109 @@
+# tests/test_alert_latency.py
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import metrics
+from alert_latency import AlertLatencyTracker, alert_latency_tracker, percentile
+from models import Product
+from processors.pulamo import process_pulamo_task
+
+
+def _product(url):
+    return Product(title=url, price=100, in_stock=True, url=url)
+
+
+class TestAlertLatencyTracker(unittest.TestCase):
+
+    def test_latency_is_measured_from_first_sighting(self):
+        tracker = AlertLatencyTracker(target_seconds=0)
+        tracker.observe('t', [_product('a')], seen_at=100.0)
+        tracker.observe('t', [_product('a')], seen_at=130.0)  # still in stock, not yet delivered
+
+        self.assertEqual(tracker.acknowledged('t', _product('a'), acked_at=145.0), 45.0)
+        self.assertEqual(tracker.summary('t'), {'count': 1, 'p50': 45.0, 'p95': 45.0})
+
+    def test_product_is_measured_once_per_appearance(self):
+        tracker = AlertLatencyTracker()
+        tracker.observe('t', [_product('a')], seen_at=0.0)
+        tracker.acknowledged('t', _product('a'), acked_at=5.0)
+
+        # Notified again while still listed (e.g. after cooldown): no new sample
+        tracker.observe('t', [_product('a')], seen_at=60.0)
+        self.assertIsNone(tracker.acknowledged('t', _product('a'), acked_at=61.0))
+
+        # Sold out, then restocked: measured afresh
+        tracker.observe('t', [], seen_at=90.0)
+        tracker.observe('t', [_product('a')], seen_at=120.0)
+        self.assertEqual(tracker.acknowledged('t', _product('a'), acked_at=122.0), 2.0)
+        self.assertEqual(tracker.summary('t')['count'], 2)
+
+    def test_batches_of_a_run_add_up_and_the_run_end_prunes(self):
+        tracker = AlertLatencyTracker()
+        tracker.seen('t', [_product('a')], seen_at=0.0)
+        tracker.acknowledged('t', _product('a'), acked_at=1.0)
+        for url in ('b', 'c', 'a'):  # Streamed one product per batch
+            tracker.seen('t', [_product(url)], seen_at=10.0)
+        tracker.retain('t', {'a', 'b', 'c'})
+
+        self.assertIsNone(tracker.acknowledged('t', _product('a'), acked_at=11.0))  # Already alerted
+        self.assertEqual(tracker.acknowledged('t', _product('b'), acked_at=12.0), 2.0)
+        self.assertEqual(tracker.acknowledged('t', _product('c'), acked_at=13.0), 3.0)
+
+        tracker.seen('t', [_product('d')], seen_at=20.0)
+        tracker.retain('t', {'d'})  # a, b and c sold out
+        tracker.seen('t', [_product('a')], seen_at=30.0)
+        self.assertEqual(tracker.acknowledged('t', _product('a'), acked_at=31.0), 1.0)
+
+    def test_rolling_window_and_percentiles(self):
+        tracker = AlertLatencyTracker(window=20)
+        for i in range(40):
+            url = f"u{i}"
+            tracker.observe('t', [_product(url)], seen_at=0.0)
+            tracker.acknowledged('t', _product(url), acked_at=float(i + 1))
+
+        # Only the last 20 samples (21..40) remain
+        self.assertEqual(tracker.summary('t'), {'count': 20, 'p50': 30.0, 'p95': 39.0})
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_report_warns_and_exports_when_p95_is_over_target(self):
+        tracker = AlertLatencyTracker(target_seconds=10)
+        tracker.observe('slow', [_product('a')], seen_at=0.0)
+        tracker.acknowledged('slow', _product('a'), acked_at=30.0)
+        breaches = metrics.RESTOCK_ALERT_TARGET_BREACHES.value(task='slow')
+
+        with self.assertLogs(level='WARNING') as logs:
+            tracker.report('slow')
+
+        self.assertIn('超過目標', logs.output[0])
+        self.assertEqual(metrics.RESTOCK_ALERT_P95_SECONDS.value(task='slow'), 30.0)
+        self.assertEqual(metrics.RESTOCK_ALERT_TARGET_BREACHES.value(task='slow'), breaches + 1)
+
+
+class TestProcessorTracking(unittest.IsolatedAsyncioTestCase):
+
+    def tearDown(self):
+        alert_latency_tracker.reset()
+
+    async def test_only_delivered_notifications_are_measured(self):
+        task = {
+            'name': 'latency', 'scraper': 's', 'scraper_params': {}, 'checker': 'c', 'checker_params': {},
+            'notifier': 'n', 'notifier_params': {},
+        }
+        products = [_product('delivered'), _product('failed')]
+        scraper = MagicMock()
+        scraper.scrape.return_value = products
+        checker = MagicMock()
+        checker.check.return_value = products
+        notifier = MagicMock()
+        notifier.notify = AsyncMock(side_effect=lambda product, params: product.url == 'delivered')
+
+        with patch('processors.pulamo.logging'):
+            await process_pulamo_task(task, MagicMock(return_value=scraper), MagicMock(return_value=checker), MagicMock(return_value=notifier))
+
+        self.assertEqual(alert_latency_tracker.summary('latency')['count'], 1)
+        # The failed one stays pending, measured from its first sighting when a later run delivers it
+        self.assertIn('failed', alert_latency_tracker._first_seen['latency'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+# tests/test_async_driver.py
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+
+from scrapers.async_driver import AsyncDriver, DriverAbortedError, create_scraper, run_scrape
+from scrapers.selenium_scraper import SeleniumScraper
+
+
+class BlockingDriver:
+    """A driver whose page loads block until the page is 'loaded' or the session is quit."""
+
+    def __init__(self, load_seconds=None):
+        self.load_seconds = load_seconds
+        self.quit_called = threading.Event()
+        self.loaded = []
+        self.page_source = '<html></html>'
+
+    def get(self, url):
+        if self.quit_called.wait(self.load_seconds):
+            raise ConnectionError("session deleted")
+        self.loaded.append((url, threading.current_thread().name))
+
+    def quit(self):
+        self.quit_called.set()
+
+
+class TestAsyncDriver(unittest.IsolatedAsyncioTestCase):
+
+    async def test_commands_run_on_the_session_thread_without_blocking_the_loop(self):
+        drivers = [BlockingDriver(load_seconds=0.2) for _ in range(3)]
+        async_drivers = [AsyncDriver(driver, name=f'session-{i}') for i, driver in enumerate(drivers)]
+
+        start = time.perf_counter()
+        await asyncio.gather(*(d.get(f'https://example.com/{i}') for i, d in enumerate(async_drivers)))
+
+        self.assertLess(time.perf_counter() - start, 0.5)  # concurrent, not 3 x 0.2 s
+        for i, driver in enumerate(drivers):
+            self.assertTrue(driver.loaded[0][1].startswith(f'session-{i}'))
+        for d in async_drivers:
+            d.shutdown()
+
+    async def test_cancelling_a_command_quits_the_session(self):
+        driver = BlockingDriver()  # never finishes loading
+        async_driver = AsyncDriver(driver)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(async_driver.get('https://example.com'), 0.05)
+
+        self.assertTrue(async_driver.aborted)
+        self.assertTrue(driver.quit_called.wait(1))
+        with self.assertRaises(DriverAbortedError):
+            await async_driver.page_source()
+
+    async def test_wait_until_polls_and_times_out(self):
+        driver = MagicMock()
+        condition = MagicMock(side_effect=[NoSuchElementException(), False, 'element'])
+        async_driver = AsyncDriver(driver)
+
+        self.assertEqual(await async_driver.wait_until(condition, timeout=1, poll_frequency=0.01), 'element')
+        self.assertEqual(condition.call_count, 3)
+        with self.assertRaises(TimeoutException):
+            await async_driver.wait_until(lambda d: False, timeout=0.05, poll_frequency=0.01)
+        async_driver.shutdown()
+
+
+class TestScraperHelpers(unittest.IsolatedAsyncioTestCase):
+
+    @patch('scrapers.selenium_scraper.webdriver.Remote')
+    async def test_selenium_scrape_runs_off_the_loop_and_close_skips_aborted_session(self, mock_remote):
+        driver = BlockingDriver()
+        mock_remote.return_value = MagicMock(get=MagicMock(side_effect=driver.get), quit=MagicMock(side_effect=driver.quit))
+        scraper = SeleniumScraper(grid_url="http://fake-url", browser='firefox')
+        scraper.scrape = lambda params: scraper.driver.get(params['search_url'])
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(run_scrape(scraper, {'search_url': 'https://example.com'}), 0.05)
+        scraper.close()
+
+        self.assertTrue(driver.quit_called.wait(1))
+        self.assertEqual(mock_remote.return_value.quit.call_count, 1)
+
+    async def test_run_scrape_calls_test_doubles_directly(self):
+        scraper = MagicMock()
+        scraper.scrape.return_value = ['product']
+        self.assertEqual(await run_scrape(scraper, {}), ['product'])
+
+    async def test_scraper_created_after_cancellation_is_closed(self):
+        created = MagicMock()
+
+        def slow_factory(name):
+            time.sleep(0.1)
+            return created
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(create_scraper(slow_factory, 'ruten.RutenSearchScraper'), 0.01)
+        await asyncio.sleep(0.2)
+
+        created.close.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+# tests/test_benchmarks.py
+import json
+import unittest
+
+from benchmarks import scale
+from benchmarks.__main__ import compare, run_suites
+from benchmarks.synthetic import generate_catalog, generate_tasks, search_catalog_by_url
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+
+    def test_quick_run_produces_json_serialisable_results(self):
+        report = run_suites(['parsers', 'checkers', 'cycle'], quick=True, repeat=1)
+
+        names = {result['name'] for result in report['results']}
+        self.assertIn('parse.ruten_search_item[100]', names)
+        self.assertIn('parse.pulamo_product_card[100]', names)
+        self.assertIn('check.StockChecker[100]', names)
+        self.assertIn('cycle.process_ruten_task[100]', names)
+        for result in report['results']:
+            self.assertGreater(result['best_seconds'], 0)
+        json.dumps(report)
+
+    def test_compare_pairs_results_by_name(self):
+        baseline = {'results': [{'name': 'a', 'best_seconds': 2.0}, {'name': 'gone', 'best_seconds': 1.0}]}
+        report = {'results': [{'name': 'a', 'best_seconds': 1.0}, {'name': 'new', 'best_seconds': 1.0}]}
+        self.assertEqual(compare(report, baseline), [('a', 2.0, 1.0, 2.0)])
+
+
+class TestScalingGenerator(unittest.TestCase):
+
+    def test_catalog_and_tasks_are_deterministic_and_overlap(self):
+        catalog = generate_catalog(2000, seed=3)
+        self.assertEqual([p.title for p in catalog], [p.title for p in generate_catalog(2000, seed=3)])
+        tasks = generate_tasks(40, seed=3)
+        self.assertEqual(tasks, generate_tasks(40, seed=3))
+
+        self.assertEqual({task['type'] for task in tasks}, {'ruten', 'pulamo'})
+        self.assertEqual(len({task['name'] for task in tasks}), len(tasks))
+        searches = [task.get('search_scraper_params', task.get('scraper_params'))['search_url'] for task in tasks]
+        self.assertTrue(all(search_catalog_by_url(catalog, url) for url in searches))
+
+    def test_scale_run_reports_per_cycle_measurements(self):
+        report = scale.run([5], catalog_size=500, cycles=2, trace_allocations=True)
+
+        level = report['results'][0]
+        self.assertEqual(len(level['cycles']), 2)
+        for cycle in level['cycles']:
+            self.assertGreater(cycle['listings_checked'], 0)
+            self.assertGreaterEqual(cycle['cpu_seconds'], 0)
+            self.assertGreater(cycle['traced_peak_bytes'], 0)
+        json.dumps(report)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+# tests/test_checker_columnar.py
+import random
+import unittest
+
+from models import Product, PaymentMethod
+from checkers import columnar
+from checkers.product import ProductChecker
+from checkers.stock import StockChecker
+
+
+def make_products(count, seed=42):
+    rng = random.Random(seed)
+    payments = [['SEVEN_COD'], ['FAMI_COD', 'PP_CRD'], ['PP_CRD'], [], ['HILIFE_COD', '面交']]
+    titles = ['MGSD 命運鋼彈', 'MGSD 命運鋼彈 水貼', 'HG 自由鋼彈', 'MGSD 飛翼鋼彈']
+    return [
+        Product(
+            title=f"{rng.choice(titles)} #{i}",
+            price=rng.randint(100, 3000),
+            in_stock=rng.random() < 0.6,
+            url=f"http://example.com/{i}",
+            seller=rng.choice([None, 'seller_a', 'seller_b', 'bad_seller']),
+            payment_methods=rng.choice(payments),
+        )
+        for i in range(count)
+    ]
+
+
+STOCK_PARAMS = {
+    'max_price': 2000,
+    'blacklisted_sellers': ['bad_seller', 'not_present'],
+    'acceptable_payment_methods': [PaymentMethod.SEVEN_ELEVEN_COD, PaymentMethod.FAMILY_MART_COD],
+}
+
+PRODUCT_PARAMS = {
+    'keywords': ['mgsd'],
+    'exclude_keywords': ['水貼'],
+    'min_price': 800,
+}
+
+
+class ColumnarParityMixin:
+    """Runs each checker through both paths and compares the results."""
+
+    def assert_stock_parity(self, products, params):
+        checker = StockChecker()
+        row_found, row_stats = checker.check(products, {**params, 'batch_threshold': len(products) + 1})
+        col_found, col_stats = checker.check(products, {**params, 'batch_threshold': 1})
+        self.assertEqual(col_found, row_found)
+        self.assertEqual(col_stats, row_stats)
+
+    def assert_product_parity(self, products, params):
+        checker = ProductChecker()
+        row_found = checker.check(products, {**params, 'batch_threshold': len(products) + 1})
+        col_found = checker.check(products, {**params, 'batch_threshold': 1})
+        self.assertEqual(col_found, row_found)
+
+    def test_stock_checker_parity(self):
+        self.assert_stock_parity(make_products(500), STOCK_PARAMS)
+
+    def test_stock_checker_parity_without_filters(self):
+        self.assert_stock_parity(make_products(200), {})
+
+    def test_product_checker_parity(self):
+        self.assert_product_parity(make_products(500), PRODUCT_PARAMS)
+
+
+class TestColumnar(ColumnarParityMixin, unittest.TestCase):
+
+    def test_partition_attributes_first_matching_reason(self):
+        products = [
+            Product(title="a", price=10, in_stock=False, url="u1"),
+            Product(title="b", price=99, in_stock=True, url="u2"),
+            Product(title="c", price=99, in_stock=False, url="u3"),
+            Product(title="d", price=10, in_stock=True, url="u4"),
+        ]
+        columns = columnar.ProductColumns(products)
+        rejected, passed = columns.partition([
+            ('stock', columns.out_of_stock()),
+            ('price', columns.price_above(50)),
+        ])
+        self.assertEqual(rejected, {'stock': [0, 2], 'price': [1]})
+        self.assertEqual(passed, [3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+# tests/test_checker_pipeline.py
+import unittest
+from unittest.mock import patch
+
+from models import Product, PaymentMethod
+from checkers.keyword import KeywordChecker
+from checkers.pipeline import FilterPipeline, PipelineChecker, Predicate, build_predicates
+from checkers.stock import StockChecker
+
+
+class TestFilterPipeline(unittest.TestCase):
+
+    def setUp(self):
+        PipelineChecker._pipelines.clear()
+        self.products = [
+            Product(title="MGSD 命運鋼彈", price=1300, in_stock=True, url="u1", seller="good", payment_methods=['SEVEN_COD']),
+            Product(title="MGSD 命運鋼彈 水貼", price=200, in_stock=False, url="u2", seller="good", payment_methods=['SEVEN_COD']),
+            Product(title="HG 命運鋼彈", price=900, in_stock=True, url="u3", seller="bad", payment_methods=['PP_CRD']),
+            Product(title="MGSD 命運鋼彈", price=5000, in_stock=True, url="u4", seller="bad", payment_methods=['FAMI_COD']),
+            Product(title="MGSD 命運鋼彈 限定", price=1200, in_stock=True, url="u5", seller="good", payment_methods=['PP_CRD']),
+            Product(title="MGSD 命運鋼彈 再販", price=1250, in_stock=False, url="u6", seller="bad", payment_methods=[]),
+        ]
+
+    def test_matches_stock_checker(self):
+        """Test that the pipeline returns the same products and stats as StockChecker."""
+        params = {
+            'max_price': 2000,
+            'blacklisted_sellers': ['bad'],
+            'acceptable_payment_methods': [PaymentMethod.SEVEN_ELEVEN_COD, PaymentMethod.FAMILY_MART_COD],
+        }
+        expected_found, expected_stats = StockChecker().check(self.products, params)
+        found, stats = PipelineChecker().check(self.products, {**params, 'filters': ['stock', 'price', 'seller', 'payment']})
+
+        self.assertEqual(found, expected_found)
+        for key in ('out_of_stock_titles', 'rejected_due_to_price', 'rejected_due_to_seller', 'rejected_due_to_payment_method'):
+            self.assertEqual(stats[key], expected_stats[key], key)
+
+    def test_matches_keyword_checker(self):
+        """Test that keyword predicates reject for the same reasons as KeywordChecker."""
+        params = {'keywords': ['mgsd', '命運'], 'exclude_keywords': ['水貼'], 'require_in_stock': False}
+        expected_found, expected_stats = KeywordChecker().check(self.products, params)
+        found, stats = PipelineChecker().check(self.products, params)
+
+        self.assertEqual(found, expected_found)
+        self.assertEqual(stats['rejected_keyword_mismatch'], expected_stats['rejected_keyword_mismatch'])
+        self.assertEqual(stats['rejected_excluded_keyword'], expected_stats['rejected_excluded_keyword'])
+
+    def test_reorders_cheap_selective_predicates_first(self):
+        """Test that a cheap predicate rejecting most items moves ahead of an expensive one."""
+        expensive = Predicate('keyword', lambda p: True)
+        cheap = Predicate('stock', lambda p: p.in_stock)
+        pipeline = FilterPipeline([expensive, cheap])
+        expensive.observe(evaluated=100, rejected=1, elapsed=0.01)
+        cheap.observe(evaluated=100, rejected=80, elapsed=0.0001)
+
+        pipeline.reorder()
+
+        self.assertEqual(pipeline.order_names, ['stock', 'keyword'])
+
+    def test_rejections_follow_execution_order(self):
+        """Test that reordering keeps the survivors and credits each rejection to the predicate that ran first."""
+        params = {'keywords': ['mgsd'], 'max_price': 2000}
+        pipeline = FilterPipeline(build_predicates(params), adaptive=False)
+        expected_found, declared_stats = pipeline.run(self.products)
+        keyword = pipeline.predicates[0]
+        calls = []
+        keyword.test = lambda p, test=keyword.test: calls.append(p) or test(p)
+
+        pipeline.order.reverse()  # stock, price, keyword
+        found, stats = pipeline.run(self.products)
+
+        self.assertEqual(found, expected_found)
+        self.assertEqual(declared_stats['rejected_keyword_mismatch'], ["HG 命運鋼彈"])
+        self.assertEqual(declared_stats['out_of_stock_titles'], ["MGSD 命運鋼彈 水貼", "MGSD 命運鋼彈 再販"])
+        # The keyword predicate now runs last and only sees the in-stock, fairly priced products
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(stats['rejected_keyword_mismatch'], ["HG 命運鋼彈"])
+        self.assertEqual(stats['out_of_stock_titles'], ["MGSD 命運鋼彈 水貼", "MGSD 命運鋼彈 再販"])
+        self.assertEqual(stats['rejected_due_to_price'], ["MGSD 命運鋼彈"])
+
+    def test_failing_several_predicates_counts_under_the_first_run(self):
+        """Test that a product failing both predicates is counted once, under the one executed first."""
+        products = [Product(title="HG 命運鋼彈", price=100, in_stock=False, url="u1")]
+        pipeline = FilterPipeline(build_predicates({'keywords': ['mgsd']}), adaptive=False)
+
+        _, declared = pipeline.run(products)
+        pipeline.order.reverse()
+        _, reordered = pipeline.run(products)
+
+        self.assertEqual((declared['rejected_keyword_mismatch'], declared['out_of_stock_titles']), (["HG 命運鋼彈"], []))
+        self.assertEqual((reordered['rejected_keyword_mismatch'], reordered['out_of_stock_titles']), ([], ["HG 命運鋼彈"]))
+
+    def test_pipeline_state_persists_across_checks(self):
+        """Test that measurements carry over between checker instances with the same params."""
+        params = {'keywords': ['mgsd'], 'max_price': 2000}
+        PipelineChecker().check(self.products, params)
+        PipelineChecker().check(self.products, params)
+
+        self.assertEqual(len(PipelineChecker._pipelines), 1)
+        pipeline = next(iter(PipelineChecker._pipelines.values()))
+        self.assertTrue(all(p.cost is not None for p in pipeline.predicates))
+
+    def test_least_recently_used_pipelines_are_dropped(self):
+        """Test that the per-params pipelines stay bounded, evicting the least recently used."""
+        with patch.object(PipelineChecker, 'MAX_PIPELINES', 2):
+            for price in (100, 200, 100, 300):
+                PipelineChecker().check(self.products, {'max_price': price})
+
+        kept = [key for key in PipelineChecker._pipelines]
+        self.assertEqual(len(kept), 2)
+        self.assertTrue(any('100' in key for key in kept))
+        self.assertFalse(any('200' in key for key in kept))
+
+    def test_unknown_filter_raises(self):
+        with self.assertRaises(ValueError):
+            build_predicates({'filters': ['colour']})
+
+
+if __name__ == '__main__':
+    unittest.main()
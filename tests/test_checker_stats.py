@@ -0,0 +1,68 @@
+# tests/test_checker_stats.py
+import logging
+import unittest
+
+from models import Product
+from checkers.stats import TitleSample, new_title_sample
+from checkers.stock import StockChecker
+
+
+class TestTitleSample(unittest.TestCase):
+
+    def test_keeps_everything_below_limit(self):
+        sample = TitleSample(limit=5)
+        sample.extend(["a", "b", "c"])
+        self.assertEqual(len(sample), 3)
+        self.assertEqual(sample, ["a", "b", "c"])
+        self.assertEqual(sample[0], "a")
+        self.assertIn("b", sample)
+        self.assertFalse(sample.sampled)
+
+    def test_counts_exactly_but_bounds_titles(self):
+        sample = TitleSample(limit=5)
+        sample.extend(str(i) for i in range(10_000))
+        self.assertEqual(len(sample), 10_000)
+        self.assertEqual(len(list(sample)), 5)
+        self.assertTrue(sample.sampled)
+        self.assertTrue(all(0 <= int(title) < 10_000 for title in sample))
+
+    def test_extend_from_matches_append(self):
+        """Test that the index-based fast path samples the same titles as appending one by one."""
+        products = [Product(title=str(i), price=1, in_stock=True, url="u") for i in range(2_000)]
+        indices = list(range(0, 2_000, 3))
+
+        fast = TitleSample(limit=7)
+        fast.extend_from(products, indices[:3])
+        fast.extend_from(products, indices[3:])
+        slow = TitleSample(limit=7)
+        slow.extend(products[i].title for i in indices)
+
+        self.assertEqual(fast, slow)
+        self.assertEqual(len(fast), len(indices))
+
+    def test_zero_limit_only_counts(self):
+        sample = TitleSample(limit=0)
+        sample.extend(["a", "b"])
+        self.assertEqual(len(sample), 2)
+        self.assertEqual(list(sample), [])
+
+    def test_debug_logger_keeps_full_list(self):
+        logger = logging.getLogger('tests.stats.debug')
+        logger.setLevel(logging.DEBUG)
+        self.assertIsNone(new_title_sample({}, logger).limit)
+
+        logger.setLevel(logging.INFO)
+        self.assertEqual(new_title_sample({'stats_sample_size': 3}, logger).limit, 3)
+
+
+class TestCheckerSampledStats(unittest.TestCase):
+
+    def test_stock_checker_counts_with_small_sample(self):
+        products = [Product(title=f"p{i}", price=100, in_stock=False, url=f"u{i}") for i in range(50)]
+        _, stats = StockChecker().check(products, {'stats_sample_size': 4})
+        self.assertEqual(len(stats['out_of_stock_titles']), 50)
+        self.assertLessEqual(len(list(stats['out_of_stock_titles'])), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+# tests/test_grid_scheduler.py
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+
+import metrics
+from processors.sessions import needs_grid_slot, open_scraper
+from scrapers.grid_scheduler import GridSessionScheduler, parse_grid_status
+
+
+def _node(browser, max_sessions, busy, slots=None, availability='UP'):
+    slots = slots if slots is not None else max_sessions
+    return {
+        'availability': availability,
+        'maxSessions': max_sessions,
+        'slots': [
+            {'stereotype': {'browserName': browser}, 'session': {'sessionId': str(i)} if i < busy else None}
+            for i in range(slots)
+        ],
+    }
+
+
+def _status(*nodes):
+    return {'value': {'ready': True, 'nodes': list(nodes)}}
+
+
+class TestParseGridStatus(unittest.TestCase):
+
+    def test_counts_slots_per_browser_on_available_nodes(self):
+        capacity = parse_grid_status(_status(
+            _node('chrome', 5, busy=2),
+            _node('firefox', 5, busy=0),
+            _node('firefox', 5, busy=5, availability='DOWN'),
+        ))
+
+        self.assertEqual((capacity['chrome'].total, capacity['chrome'].busy), (5, 2))
+        self.assertEqual((capacity['firefox'].total, capacity['firefox'].busy), (5, 0))
+
+    def test_max_sessions_caps_advertised_slots(self):
+        capacity = parse_grid_status(_status(_node('chrome', 2, busy=1, slots=8)))
+
+        self.assertEqual((capacity['chrome'].total, capacity['chrome'].busy), (2, 1))
+
+
+class TestGridSessionScheduler(unittest.IsolatedAsyncioTestCase):
+
+    async def test_limits_sessions_to_free_slots_and_reports_wait(self):
+        scheduler = GridSessionScheduler('http://grid', poll_seconds=0.01, fetch_status=lambda url: _status(_node('chrome', 2, busy=0)))
+        active = 0
+        max_active = 0
+        waits_before = metrics.GRID_QUEUE_WAIT_SECONDS.count(browser='chrome')
+
+        async def use_session(task):
+            nonlocal active, max_active
+            async with scheduler.session('chrome', task=task):
+                active += 1
+                max_active = max(max_active, active)
+                await asyncio.sleep(0.02)
+                active -= 1
+
+        await asyncio.gather(*(use_session(f'task-{i}') for i in range(6)))
+
+        self.assertEqual(max_active, 2)
+        self.assertEqual(metrics.GRID_QUEUE_WAIT_SECONDS.count(browser='chrome'), waits_before + 6)
+        self.assertEqual(metrics.GRID_QUEUED_REQUESTS.value(browser='chrome'), 0)
+
+    async def test_grants_by_priority_then_fewest_sessions_per_task(self):
+        scheduler = GridSessionScheduler('http://grid', poll_seconds=10, fetch_status=lambda url: _status(_node('chrome', 2, busy=0)))
+        await scheduler.acquire('chrome', task='busy')  # Held throughout
+        holder = await scheduler.acquire('chrome', task='other')
+        order = []
+
+        async def wait_for_slot(task, priority=0):
+            request = await scheduler.acquire('chrome', task=task, priority=priority)
+            order.append(task)
+            scheduler.release(request)
+
+        waiters = [
+            asyncio.create_task(wait_for_slot('busy')),
+            asyncio.create_task(wait_for_slot('idle')),
+            asyncio.create_task(wait_for_slot('urgent', priority=5)),
+        ]
+        await asyncio.sleep(0.01)
+        scheduler.release(holder)
+        await asyncio.gather(*waiters)
+
+        self.assertEqual(order, ['urgent', 'idle', 'busy'])
+
+    async def test_cancelled_waiter_leaves_the_queue(self):
+        scheduler = GridSessionScheduler('http://grid', poll_seconds=10, fetch_status=lambda url: _status(_node('firefox', 1, busy=1)))
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(scheduler.acquire('firefox', task='t'), 0.05)
+
+        self.assertEqual(scheduler._waiting, [])
+        self.assertEqual(metrics.GRID_QUEUED_REQUESTS.value(browser='firefox'), 0)
+
+    async def test_unreachable_grid_does_not_throttle(self):
+        fetch_status = MagicMock(side_effect=ConnectionError("refused"))
+        scheduler = GridSessionScheduler('http://grid', poll_seconds=10, fetch_status=fetch_status)
+
+        requests = [await scheduler.acquire('chrome', task='t') for _ in range(10)]
+
+        self.assertTrue(all(r.granted for r in requests))
+        fetch_status.assert_called_once()
+
+
+class TestOpenScraper(unittest.IsolatedAsyncioTestCase):
+
+    def test_only_selenium_scrapers_need_a_slot(self):
+        self.assertTrue(needs_grid_slot('ruten.RutenSearchScraper'))
+        self.assertFalse(needs_grid_slot('ruten_api.RutenSearchAPIScraper'))
+        self.assertFalse(needs_grid_slot('unknown.Scraper'))
+
+    async def test_holds_a_slot_while_the_scraper_is_open(self):
+        scheduler = GridSessionScheduler('http://grid', poll_seconds=10, fetch_status=lambda url: _status(_node('firefox', 5, busy=0)))
+        scraper = MagicMock()
+        task = {'name': 'task', 'browser': 'firefox', 'priority': 1}
+
+        with patch('processors.sessions.grid_scheduler', scheduler):
+            async with open_scraper(MagicMock(return_value=scraper), 'pulamo.PulamoScraper', task) as opened:
+                self.assertIs(opened, scraper)
+                self.assertEqual(scheduler._active['firefox'], 1)
+
+        self.assertEqual(scheduler._active['firefox'], 0)
+        scraper.__exit__.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+# tests/test_http_cache.py
+import copy
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import requests
+from requests.adapters import BaseAdapter
+
+import metrics
+from benchmarks.mock_upstream import MockUpstreamServer, MockUpstreamSettings, point_config_at, restore_config
+from benchmarks.synthetic import ruten_product_id
+from models import Product
+from scrapers.http_adapters import ConditionalCacheAdapter, HTTPCache, InstrumentedAdapter, create_session
+from scrapers.ruten_api import RutenProductPageAPIScraper
+
+
+class ValidatingAdapter(BaseAdapter):
+    """Serves `bodies` by URL with an ETag per body, answering a matching If-None-Match with 304."""
+
+    def __init__(self, bodies, headers=None):
+        super().__init__()
+        self.bodies = bodies
+        self.headers = headers if headers is not None else {}
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        body = self.bodies[request.url]
+        etag = f'"{len(body)}-{hash(body)}"'
+        response = requests.Response()
+        response.url = request.url
+        response.headers['Content-Type'] = 'text/html; charset=utf-8'
+        response.headers['ETag'] = etag
+        response.headers.update(self.headers)
+        if request.headers.get('If-None-Match') == etag:
+            response.status_code = 304
+            response._content = b''
+        else:
+            response.status_code = 200
+            response._content = body
+        return response
+
+    def close(self):
+        pass
+
+
+class TestConditionalCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.cache = HTTPCache(self.tmpdir.name, max_bytes=1000)
+
+    def _session(self, upstream):
+        session = requests.Session()
+        session.mount('https://', ConditionalCacheAdapter(self.cache, upstream))
+        return session
+
+    def test_unchanged_page_is_revalidated_and_served_from_cache(self):
+        upstream = ValidatingAdapter({'https://shop.example/item': '飛翼鋼彈'.encode()})
+        session = self._session(upstream)
+        saved_before = metrics.HTTP_CACHE_SAVED_BYTES.value(host='shop.example')
+
+        first = session.get('https://shop.example/item')
+        second = session.get('https://shop.example/item')
+
+        self.assertNotIn('If-None-Match', upstream.requests[0].headers)
+        self.assertEqual(upstream.requests[1].headers['If-None-Match'], first.headers['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.text, '飛翼鋼彈')
+        self.assertEqual(metrics.HTTP_CACHE_SAVED_BYTES.value(host='shop.example'), saved_before + len('飛翼鋼彈'.encode()))
+
+        upstream.bodies['https://shop.example/item'] = '自由鋼彈'.encode()  # Changed: fetched and cached anew
+        self.assertEqual(session.get('https://shop.example/item').text, '自由鋼彈')
+        self.assertEqual(session.get('https://shop.example/item').text, '自由鋼彈')
+        self.assertEqual(metrics.HTTP_CACHE_HIT_RATIO.value(host='shop.example'), 0.5)
+
+    def test_least_recently_used_bodies_are_evicted_by_size(self):
+        urls = [f'https://shop.example/{i}' for i in range(3)]
+        session = self._session(ValidatingAdapter({url: b'x' * 400 for url in urls}))
+
+        session.get(urls[0])
+        session.get(urls[1])
+        session.get(urls[0])  # Now the most recently used
+        session.get(urls[2])
+
+        self.assertIsNone(self.cache.validators(urls[1]))
+        self.assertIsNotNone(self.cache.validators(urls[0]))
+        self.assertEqual(self.cache.size_bytes, 800)
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 2)
+
+    def test_index_survives_a_restart(self):
+        url = 'https://shop.example/item'
+        session = self._session(ValidatingAdapter({url: b'MGSD'}))
+        session.get(url)
+        session.close()
+
+        reopened = HTTPCache(self.tmpdir.name, max_bytes=1000)
+        reopened.load()
+
+        self.assertEqual(reopened.read(url)[1], b'MGSD')
+        self.assertIn('If-None-Match', reopened.validators(url))
+
+    def test_responses_without_validators_or_marked_no_store_are_not_cached(self):
+        for headers in ({'ETag': ''}, {'Cache-Control': 'no-store'}):
+            self._session(ValidatingAdapter({'https://shop.example/a': b'MGSD'}, headers)).get('https://shop.example/a')
+        self.assertEqual(len(self.cache), 0)
+
+    def test_create_session_caches_outside_the_instrumented_adapter(self):
+        with patch.multiple('config', HTTP_CASSETTE_MODE='off', HTTP_CACHE_DIR=self.tmpdir.name, HTTP_CACHE_MAX_BYTES=1000):
+            session = create_session()
+        adapter = session.get_adapter('https://shop.example/')
+        self.assertIsInstance(adapter, ConditionalCacheAdapter)
+        self.assertIsInstance(adapter.inner, InstrumentedAdapter)
+        HTTPCache._open_caches.pop(self.tmpdir.name, None)
+
+
+class TestConditionalCacheAgainstMockUpstream(unittest.TestCase):
+
+    def test_product_pages_are_not_downloaded_again_when_unchanged(self):
+        server = MockUpstreamServer(MockUpstreamSettings(catalog_size=20))
+        base_url = server.start_in_thread()
+        self.addCleanup(server.stop_thread)
+        self.addCleanup(restore_config, point_config_at(base_url))
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.addCleanup(HTTPCache._open_caches.pop, tmpdir.name, None)
+        with patch.multiple('config', HTTP_CASSETTE_MODE='off', HTTP_CACHE_DIR=tmpdir.name):
+            scraper = RutenProductPageAPIScraper()
+        self.addCleanup(scraper.close)
+        products = [Product(title=p.title, price=p.price, in_stock=False, url=f"{base_url}/item/show?{ruten_product_id(p)}")
+                    for p in server.catalog.products[:3]]
+
+        for _ in range(2):
+            updated, stats = scraper.scrape([copy.copy(p) for p in products], {})
+
+        self.assertEqual(stats['failed_to_scrape'], [])
+        self.assertEqual(server.requests['ruten.item_page'], 6)
+        self.assertEqual(server.requests['conditional.304'], 3)
+        for product in updated:
+            self.assertEqual(product.in_stock, server.catalog.by_id[ruten_product_id(product)].in_stock)
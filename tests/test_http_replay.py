@@ -0,0 +1,115 @@
+# tests/test_http_replay.py
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import requests
+from requests.adapters import BaseAdapter
+
+from benchmarks.http_replay import DEFAULT_SEARCH_URL, record_synthetic_cassette
+from scrapers.http_adapters import Cassette, InstrumentedAdapter, RecordingAdapter, ReplayAdapter, create_session
+from scrapers.ruten_api import RutenProductPageAPIScraper, RutenSearchAPIScraper
+
+
+class CountingAdapter(BaseAdapter):
+    """Answers every request with an incrementing counter body."""
+
+    def __init__(self, content_type='text/plain'):
+        super().__init__()
+        self.calls = 0
+        self.content_type = content_type
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = self.content_type
+        response._content = b'\xff\x00' if self.content_type == 'application/octet-stream' else f"call {self.calls}".encode()
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def _session(adapter):
+    session = requests.Session()
+    session.mount('https://', adapter)
+    return session
+
+
+class TestRecordReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'cassette.jsonl.gz')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _record(self, urls, content_type='text/plain'):
+        session = _session(RecordingAdapter(Cassette(self.path), CountingAdapter(content_type)))
+        for url in urls:
+            session.get(url, params={'q': '鋼彈'})
+        session.close()
+        cassette = Cassette(self.path)
+        cassette.load()
+        return cassette
+
+    def test_replay_serves_recordings_in_order_then_repeats_the_last(self):
+        cassette = self._record(['https://api.example/a', 'https://api.example/a', 'https://api.example/b'])
+        self.assertEqual(len(cassette), 3)
+
+        session = _session(ReplayAdapter(cassette))
+        bodies = [session.get('https://api.example/a', params={'q': '鋼彈'}).text for _ in range(3)]
+        self.assertEqual(bodies, ['call 1', 'call 2', 'call 2'])
+        self.assertEqual(session.get('https://api.example/b', params={'q': '鋼彈'}).text, 'call 3')
+
+    def test_binary_bodies_round_trip(self):
+        cassette = self._record(['https://api.example/bin'], content_type='application/octet-stream')
+        response = _session(ReplayAdapter(cassette)).get('https://api.example/bin', params={'q': '鋼彈'})
+        self.assertEqual(response.content, b'\xff\x00')
+
+    def test_unrecorded_request_raises_connection_error(self):
+        cassette = self._record(['https://api.example/a'])
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            _session(ReplayAdapter(cassette)).get('https://api.example/other')
+
+    def test_latency_and_jitter_are_injected(self):
+        cassette = self._record(['https://api.example/a'])
+        adapter = ReplayAdapter(cassette, latency=0.2, jitter=0.1, seed=1)
+        with patch('scrapers.http_adapters.time.sleep') as sleep:
+            _session(adapter).get('https://api.example/a', params={'q': '鋼彈'})
+        delay = sleep.call_args[0][0]
+        self.assertGreaterEqual(delay, 0.1)
+        self.assertLessEqual(delay, 0.3)
+
+    def test_create_session_replays_when_configured(self):
+        self._record(['https://api.example/a'])
+        with patch.multiple('config', HTTP_CASSETTE_MODE='replay', HTTP_CASSETTE_PATH=self.path,
+                            HTTP_REPLAY_LATENCY_SECONDS=0.0, HTTP_REPLAY_JITTER_SECONDS=0.0):
+            session = create_session()
+        adapter = session.get_adapter('https://api.example/a')
+        self.assertIsInstance(adapter, InstrumentedAdapter)
+        self.assertIsInstance(adapter.inner, ReplayAdapter)
+        self.assertEqual(session.get('https://api.example/a', params={'q': '鋼彈'}).text, 'call 1')
+        Cassette._open_cassettes.pop(self.path, None)
+
+    def test_api_scrapers_replay_a_recorded_cycle(self):
+        recorded = record_synthetic_cassette(self.path, 5)
+        self.assertEqual(len(recorded), 1 + 1 + 5 * 2)  # search, details, then page + price per product
+
+        cassette = Cassette(self.path)
+        cassette.load()
+        session = _session(ReplayAdapter(cassette))
+        products = RutenSearchAPIScraper(session=session).scrape({'search_url': DEFAULT_SEARCH_URL})
+        detailed, stats = RutenProductPageAPIScraper(session=session).scrape(products, {})
+
+        self.assertEqual(len(detailed), 5)
+        self.assertEqual(stats['failed_to_scrape'], [])
+        self.assertTrue(all(p.seller for p in detailed))
+
+
+if __name__ == '__main__':
+    unittest.main()
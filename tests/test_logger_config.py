@@ -1,7 +1,11 @@
 # tests/test_logger_config.py
+import io
+import json
 import unittest
 import logging
-from logger_config import setup_logger
+import logging.handlers
+from unittest.mock import patch
+from logger_config import setup_logger, shutdown_logger, task_context, stage_context, JsonFormatter
 
 class TestLoggerConfig(unittest.TestCase):
 
@@ -13,6 +17,7 @@ class TestLoggerConfig(unittest.TestCase):
 
     def tearDown(self):
         """Restore original handlers after each test."""
+        shutdown_logger()
         logging.getLogger().handlers = self.original_handlers
 
     def test_setup_logger_configures_correctly(self):
@@ -55,5 +60,40 @@ class TestLoggerConfig(unittest.TestCase):
         self.assertIsNot(root_logger.handlers[0], dummy_handler, "The handler should be a new instance, not the dummy one.")
         self.assertIsInstance(root_logger.handlers[0], logging.StreamHandler)
 
+    def test_setup_logger_with_queue_writes_from_listener(self):
+        """Test that queue mode installs a QueueHandler and the listener writes the records."""
+        output = io.StringIO()
+        with patch('logger_config.sys.stdout', output):
+            setup_logger(use_queue=True)
+            root_logger = logging.getLogger()
+            self.assertEqual(len(root_logger.handlers), 1)
+            self.assertIsInstance(root_logger.handlers[0], logging.handlers.QueueHandler)
+
+            logging.info("queued message")
+            shutdown_logger()  # Flushes the queue
+
+        self.assertIn("INFO - queued message", output.getvalue())
+
+    def test_json_format_includes_task_stage_and_latency(self):
+        """Test that JSON records carry the task and stage from the logging context."""
+        output = io.StringIO()
+        with patch('logger_config.sys.stdout', output):
+            setup_logger(json_format=True)
+            with task_context("Task A"), stage_context("search"):
+                logging.getLogger("tests").info("hello %s", "world", extra={'latency_ms': 12.5})
+
+        entry = json.loads(output.getvalue().strip())
+        self.assertEqual(entry['message'], "hello world")
+        self.assertEqual(entry['task'], "Task A")
+        self.assertEqual(entry['stage'], "search")
+        self.assertEqual(entry['latency_ms'], 12.5)
+        self.assertIsInstance(logging.getLogger().handlers[0].formatter, JsonFormatter)
+
+    def test_setup_logger_applies_logger_levels(self):
+        """Test that per-logger levels are applied on top of the defaults."""
+        setup_logger(logger_levels={'tests.hot_path': 'WARNING'})
+        self.assertFalse(logging.getLogger('tests.hot_path').isEnabledFor(logging.INFO))
+        self.assertEqual(logging.getLogger('selenium').level, logging.WARNING)
+
 if __name__ == '__main__':
     unittest.main()
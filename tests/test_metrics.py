@@ -0,0 +1,120 @@
+# tests/test_metrics.py
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from metrics import Counter, Histogram, Registry, start_metrics_server
+from logger_config import task_context
+from processors.instrumentation import stage
+from scrapers.http_adapters import create_session
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_counter_renders_labelled_values(self):
+        registry = Registry()
+        counter = registry.counter('requests_total', 'Requests.', ['host'])
+        counter.inc(host='a.example')
+        counter.inc(2, host='a.example')
+        counter.inc(host='b"x')
+
+        text = registry.render()
+
+        self.assertIn('# TYPE requests_total counter', text)
+        self.assertIn('requests_total{host="a.example"} 3', text)
+        self.assertIn('requests_total{host="b\\"x"} 1', text)
+
+    def test_registry_rejects_a_duplicate_name(self):
+        registry = Registry()
+        registry.counter('requests_total', 'Requests.')
+        with self.assertRaises(ValueError):
+            registry.gauge('requests_total', 'Requests in flight.')
+
+    def test_counter_rejects_wrong_labels(self):
+        counter = Counter('c', 'C.', ['host'])
+        with self.assertRaises(ValueError):
+            counter.inc(path='/')
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram('latency_seconds', 'Latency.', buckets=(0.1, 1))
+        for value in (0.05, 0.5, 0.7, 5):
+            histogram.observe(value)
+
+        lines = histogram.render()
+
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{le="1"} 3', lines)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4', lines)
+        self.assertIn('latency_seconds_sum 6.25', lines)
+        self.assertIn('latency_seconds_count 4', lines)
+
+    def test_stage_records_duration_for_current_task(self):
+        before = metrics.STAGE_SECONDS.count(task='metrics-test', stage='search')
+        with task_context('metrics-test'):
+            with self.assertRaises(RuntimeError):
+                with stage('search'):
+                    raise RuntimeError("boom")
+        self.assertEqual(metrics.STAGE_SECONDS.count(task='metrics-test', stage='search'), before + 1)
+
+    def test_server_serves_metrics_endpoint(self):
+        registry = Registry()
+        registry.counter('cycles_total', 'Cycles.').inc()
+
+        async def fetch(path):
+            server = await start_metrics_server('127.0.0.1', 0, registry)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+                await writer.drain()
+                response = await reader.read()
+                writer.close()
+                return response.decode()
+            finally:
+                server.close()
+                await server.wait_closed()
+
+        response = asyncio.run(fetch('/metrics'))
+        self.assertTrue(response.startswith('HTTP/1.1 200 OK'))
+        self.assertIn('cycles_total 1', response)
+
+        self.assertTrue(asyncio.run(fetch('/other')).startswith('HTTP/1.1 404'))
+        self.assertTrue(asyncio.run(fetch('/' + 'x' * 100_000)).startswith('HTTP/1.1 400'))
+
+
+class TestInstrumentedAdapter(unittest.TestCase):
+
+    def _response(self, status_code, content):
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = content
+        return response
+
+    def test_counts_requests_errors_and_bytes_per_host(self):
+        host = 'counted.example'
+        requests_before = metrics.HTTP_REQUESTS.value(host=host)
+        errors_before = metrics.HTTP_ERRORS.value(host=host)
+        bytes_before = metrics.HTTP_RECEIVED_BYTES.value(host=host)
+        session = create_session()
+
+        with patch.object(HTTPAdapter, 'send', side_effect=[
+            self._response(200, b'12345'),
+            self._response(503, b'no'),
+            requests.exceptions.ConnectionError("down"),
+        ]):
+            session.get(f'https://{host}/a')
+            session.get(f'https://{host}/b')
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                session.get(f'https://{host}/c')
+
+        self.assertEqual(metrics.HTTP_REQUESTS.value(host=host), requests_before + 3)
+        self.assertEqual(metrics.HTTP_ERRORS.value(host=host), errors_before + 2)
+        self.assertEqual(metrics.HTTP_RECEIVED_BYTES.value(host=host), bytes_before + 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
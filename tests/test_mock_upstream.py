@@ -0,0 +1,72 @@
+# tests/test_mock_upstream.py
+import asyncio
+import unittest
+
+import requests
+
+from benchmarks.mock_upstream import MockUpstreamServer, MockUpstreamSettings, point_config_at, restore_config
+from benchmarks.synthetic import ruten_product_id
+from models import Product
+from notifiers.telegram import TelegramNotifier
+from scrapers.ruten_api import RutenProductPageAPIScraper, RutenSearchAPIScraper
+
+
+class TestMockUpstream(unittest.TestCase):
+
+    def _start(self, **settings):
+        self.server = MockUpstreamServer(MockUpstreamSettings(catalog_size=60, **settings))
+        self.base_url = self.server.start_in_thread()
+        previous = point_config_at(self.base_url)
+        self.addCleanup(self.server.stop_thread)
+        self.addCleanup(restore_config, previous)
+
+    def test_api_scrapers_read_the_mock_catalog(self):
+        self._start()
+        search = RutenSearchAPIScraper()
+        products = search.scrape({'search_url': f"{self.base_url}/find/?q=MGSD"})
+        search.close()
+
+        expected = {ruten_product_id(p) for p in self.server.catalog.search('MGSD')}
+        self.assertEqual({ruten_product_id(p) for p in products}, expected)
+        self.assertTrue(all(p.url.startswith(self.base_url) for p in products))
+
+        page = RutenProductPageAPIScraper()
+        updated, stats = page.scrape(products[:3], {})
+        page.close()
+        self.assertEqual(stats['failed_to_scrape'], [])
+        for product in updated:
+            source = self.server.catalog.by_id[ruten_product_id(product)]
+            self.assertEqual((product.in_stock, product.price), (source.in_stock, source.price))
+        self.assertEqual(self.server.requests['ruten.price_api'], 3)
+
+    def test_rate_limit_injection(self):
+        self._start(rate_limit_rate=1.0)
+        response = requests.get(f"{self.base_url}/api/items/v2/list", params={'gno': '1'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.assertEqual(self.server.requests['injected.429'], 1)
+
+    def test_flip_records_restock_time(self):
+        self._start(flip_fraction=0.5)
+        before = {ruten_product_id(p): p.in_stock for p in self.server.catalog.products}
+        restocked = self.server.catalog.flip()
+        came_back = [i for i, p in self.server.catalog.by_id.items() if p.in_stock and not before[i]]
+        self.assertEqual(restocked, len(came_back))
+        self.assertEqual(set(self.server.catalog.restocked_at), set(came_back))
+
+    def test_telegram_notifier_posts_to_mock_and_latency_is_recorded(self):
+        self._start()
+        source = self.server.catalog.products[0]
+        self.server.catalog.restocked_at[ruten_product_id(source)] = 0.0  # a restock long ago
+        product = Product(title=source.title, price=source.price, in_stock=True, url=f"{self.base_url}/item/show?{ruten_product_id(source)}")
+
+        asyncio.run(TelegramNotifier().notify(product, {'name': 'MGSD', 'store_name': 'mock'}))
+
+        self.assertEqual(self.server.requests['telegram.sendMessage'], 1)
+        notification = self.server.notifications[0]
+        self.assertEqual(notification['product_id'], ruten_product_id(source))
+        self.assertGreater(notification['latency_seconds'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 # tests/test_models.py
+import sys
 import unittest
-from models import Product
+from models import Product, PaymentMethod, PaymentFlag
 
 class TestProductModel(unittest.TestCase):
 
@@ -50,5 +51,51 @@ class TestProductModel(unittest.TestCase):
         self.assertNotIn("seller='", representation) # Should not show seller if it's None
         self.assertNotIn("payment_methods=['", representation) # Should not show payment methods if empty
 
+    def test_product_has_no_instance_dict(self):
+        """Test that Product is slotted and does not allocate a __dict__ per instance."""
+        product = Product(title="Slotted", price=1, in_stock=True, url="http://example.com/slotted")
+        self.assertFalse(hasattr(product, '__dict__'))
+        with self.assertRaises(AttributeError):
+            product.unknown_field = 1
+
+    def test_payment_mask_tracks_payment_methods(self):
+        """Test that known payment codes are reflected in the bitmask, also after reassignment."""
+        product = Product(title="Pay", price=1, in_stock=True, url="http://example.com/pay",
+                          payment_methods="PP_CRD,SEVEN_COD,面交".split(','))
+        self.assertEqual(product.payment_mask, PaymentFlag.CREDIT_CARD | PaymentFlag.SEVEN_ELEVEN_COD)
+        self.assertEqual(product.payment_methods, ('PP_CRD', 'SEVEN_COD', '面交'))
+
+        with self.assertRaises(AttributeError):
+            product.payment_methods.append('FAMI_COD')  # Would leave payment_mask stale
+
+        product.payment_methods = ['FAMI_COD']
+        self.assertEqual(product.payment_mask, PaymentFlag.FAMILY_MART_COD)
+
+        product.payment_methods = []
+        self.assertEqual(product.payment_mask, 0)
+
+    def test_payment_flags_match_payment_methods(self):
+        """Test that every PaymentMethod has its own flag bit."""
+        flags = [method.flag for method in PaymentMethod]
+        self.assertEqual(len(set(flags)), len(PaymentMethod))
+        self.assertEqual([flag.name for flag in flags], [method.name for method in PaymentMethod])
+
+    def test_seller_and_url_are_interned(self):
+        """Test that repeated seller and URL strings share a single object."""
+        seller = ''.join(['shared', '_seller'])
+        url = ''.join(['http://example.com/', 'shared'])
+        product = Product(title="A", price=1, in_stock=True, url=url, seller=seller)
+        self.assertIs(product.seller, sys.intern('shared_seller'))
+        self.assertIs(product.url, sys.intern('http://example.com/shared'))
+
+    def test_equality_compares_fields(self):
+        """Test that products compare by value like the former dataclass."""
+        a = Product(title="Same", price=1, in_stock=True, url="http://example.com/same", payment_methods=['PP_CRD'])
+        b = Product(title="Same", price=1, in_stock=True, url="http://example.com/same", payment_methods=['PP_CRD'])
+        self.assertEqual(a, b)
+        b.in_stock = False
+        self.assertNotEqual(a, b)
+        self.assertIn(a, [b, a])
+
 if __name__ == '__main__':
     unittest.main()
@@ -20,8 +20,9 @@ class TestTelegramNotifier(unittest.IsolatedAsyncioTestCase):
         product = Product(title="Test Product", price=100, in_stock=True, url="http://example.com")
         params = {'name': 'Test', 'store_name': 'Test Store'}
 
-        await notifier.notify(product, params)
+        delivered = await notifier.notify(product, params)
 
+        self.assertTrue(delivered)
         self.assertTrue(self.mock_bot.send_message.called)
         call_args = self.mock_bot.send_message.call_args
         self.assertEqual(call_args.kwargs['chat_id'], "12345")
@@ -37,8 +38,9 @@ class TestTelegramNotifier(unittest.IsolatedAsyncioTestCase):
         params = {'name': 'Test', 'store_name': 'Test Store'}
 
         # This should not raise an exception
-        await notifier.notify(product, params)
-        
+        delivered = await notifier.notify(product, params)
+
+        self.assertFalse(delivered)
         self.mock_bot.send_message.assert_called_once()
 
     async def test_notify_with_no_chat_id(self):
@@ -0,0 +1,191 @@
+# tests/test_pipeline.py
+import logging
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import metrics
+from alert_latency import alert_latency_tracker
+from checkers.base import summary_log_level
+from models import Product
+from processors import process_task
+from processors.dedup import notification_manager
+from processors.instrumentation import task_run
+from processors.pipeline import run_pipeline, stage_result_cache
+from scrapers.base import ScrapeResult
+
+
+def _products(count):
+    return [Product(title=f"MGSD {i}", price=1000 + i, url=f"https://shop/{i}", in_stock=True) for i in range(count)]
+
+
+class EvenPriceChecker:
+    """Passes even-priced products; raises on any batch containing `poison`."""
+
+    def __init__(self, poison=None):
+        self.poison = poison
+        self.calls = 0
+
+    def check(self, products, params):
+        self.calls += 1
+        if any(p.title == self.poison for p in products):
+            raise ValueError("malformed listing")
+        passed = [p for p in products if p.price % 2 == 0]
+        return passed, {'rejected': [p.title for p in products if p.price % 2]}
+
+
+STAGES = [
+    {'stage': 'scrape', 'scraper': 'fake.scraper', 'params': {}},
+    {'stage': 'check', 'checker': 'fake.checker', 'params': {}, 'batch_size': 2},
+    {'stage': 'notify', 'notifier': 'fake.notifier', 'params': {}},
+]
+
+
+class TestRunPipeline(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        notification_manager._last_notified.clear()
+        stage_result_cache.clear()
+        self.scraper = MagicMock()
+        self.notifier = AsyncMock()
+        self.notifier.notify.return_value = True
+        self.get_scraper = MagicMock(return_value=self.scraper)
+        self.get_notifier = MagicMock(return_value=self.notifier)
+
+    async def test_failed_batch_is_dropped_and_the_rest_go_through(self):
+        self.scraper.scrape.return_value = _products(6)
+        errors_before = metrics.PIPELINE_STAGE_ERRORS.value(task='declared', stage='check')
+
+        report = await run_pipeline({'name': 'declared'}, STAGES, self.get_scraper,
+                                    MagicMock(return_value=EvenPriceChecker(poison="MGSD 2")), self.get_notifier)
+
+        notified = [call.args[0].title for call in self.notifier.notify.call_args_list]
+        self.assertEqual(sorted(notified), ["MGSD 0", "MGSD 4"])  # The batch with MGSD 2 is dropped
+        self.assertEqual(report['check'].failed_batches, 1)
+        self.assertEqual(report['check'].stats, {'rejected': 2})
+        self.assertEqual(report['notify'].emitted, 2)
+        self.assertEqual(metrics.PIPELINE_STAGE_ERRORS.value(task='declared', stage='check'), errors_before + 1)
+
+    async def test_nothing_scraped_creates_no_checker_or_notifier(self):
+        self.scraper.scrape.return_value = []
+        get_checker = MagicMock()
+
+        report = await run_pipeline({'name': 'empty'}, STAGES, self.get_scraper, get_checker, self.get_notifier)
+
+        get_checker.assert_not_called()
+        self.get_notifier.assert_not_called()
+        self.assertEqual(report['scrape'].emitted, 0)
+
+    async def test_cached_stage_reuses_its_result_for_an_unchanged_batch(self):
+        checker = EvenPriceChecker()
+        stages = [dict(spec, cache=True) if spec['stage'] == 'check' else spec for spec in STAGES]
+        stages[1]['batch_size'] = 10
+
+        for _ in range(2):
+            self.scraper.scrape.return_value = _products(4)  # Fresh objects, same listings
+            report = await run_pipeline({'name': 'cached'}, stages, self.get_scraper, MagicMock(return_value=checker), self.get_notifier)
+
+        self.assertEqual(checker.calls, 1)
+        self.assertEqual(report['check'].cached_batches, 1)
+        self.assertEqual(report['check'].stats, {'rejected': 2})
+        self.assertIn(self.notifier.notify.call_args.args[0], self.scraper.scrape.return_value)
+
+        self.scraper.scrape.return_value[0].in_stock = False  # Changed listing: checked again
+        await run_pipeline({'name': 'cached'}, stages, self.get_scraper, MagicMock(return_value=checker), self.get_notifier)
+        self.assertEqual(checker.calls, 2)
+
+    async def test_unchanged_source_payload_reuses_check_results(self):
+        checker = EvenPriceChecker()
+        stages = [dict(spec, cache='source') if spec['stage'] == 'check' else spec for spec in STAGES]
+        unchanged_before = metrics.SOURCE_PAYLOADS.value(task='fingerprinted', result='unchanged')
+
+        self.scraper.scrape.return_value = ScrapeResult(_products(4), 'abc')
+        await run_pipeline({'name': 'fingerprinted'}, stages, self.get_scraper, MagicMock(return_value=checker), self.get_notifier)
+        self.scraper.scrape.return_value = ScrapeResult(_products(4), 'abc', unchanged=True)
+        report = await run_pipeline({'name': 'fingerprinted'}, stages, self.get_scraper, MagicMock(return_value=checker), self.get_notifier)
+
+        self.assertEqual(checker.calls, 2)  # Two batches of two, checked once
+        self.assertEqual(report['check'].cached_batches, 2)
+        self.assertEqual(report['scrape'].stats, {'unchanged': 1})
+        self.assertEqual(self.notifier.notify.call_count, 4)
+        self.assertEqual(metrics.SOURCE_PAYLOADS.value(task='fingerprinted', result='unchanged'), unchanged_before + 1)
+
+    async def test_streamed_check_batches_are_all_tracked_for_alert_latency(self):
+        alert_latency_tracker.reset()
+        self.addCleanup(alert_latency_tracker.reset)
+        self.scraper.scrape.return_value = [Product(title=f"MGSD {i}", price=1000, url=f"u{i}", in_stock=True) for i in range(5)]
+        stages = [STAGES[0], dict(STAGES[1], batch_size=1, workers=2), STAGES[2]]
+
+        with task_run('latency'):
+            await run_pipeline({'name': 'latency'}, stages, self.get_scraper, MagicMock(return_value=EvenPriceChecker()),
+                               self.get_notifier)
+
+        self.assertEqual(alert_latency_tracker.summary('latency')['count'], 5)
+        self.assertEqual(alert_latency_tracker._alerted['latency'], {f"u{i}" for i in range(5)})
+
+    async def test_checker_summaries_of_streamed_batches_log_at_debug(self):
+        levels = {}
+
+        def checker(name):
+            def check(products, params):
+                levels.setdefault(name, set()).add(summary_log_level.get())
+                return products
+            return MagicMock(check=check)
+
+        self.scraper.scrape.return_value = _products(3)
+        stages = [STAGES[0], {'stage': 'filter', 'checker': 'first', 'batch_size': 1}, dict(STAGES[1], checker='second', batch_size=1)]
+
+        await run_pipeline({'name': 'levels'}, stages, self.get_scraper, checker, self.get_notifier)
+
+        self.assertEqual(levels, {'first': {logging.INFO}, 'second': {logging.DEBUG}})
+        self.assertEqual(summary_log_level.get(), logging.INFO)
+
+    async def test_dedup_skips_products_on_cooldown(self):
+        self.scraper.scrape.return_value = _products(2)
+        notification_manager.record_notification("https://shop/0")
+        stages = [STAGES[0], {'stage': 'dedup'}, STAGES[2]]
+
+        report = await run_pipeline({'name': 'dedup'}, stages, self.get_scraper, MagicMock(), self.get_notifier)
+
+        self.notifier.notify.assert_called_once()
+        self.assertEqual(report['dedup'].stats, {'on_cooldown': 1})
+
+    async def test_only_confirmed_notifications_go_on_cooldown(self):
+        self.scraper.scrape.return_value = _products(3)
+        self.notifier.notify.side_effect = [True, False, None]
+
+        report = await run_pipeline({'name': 'undelivered'}, [STAGES[0], STAGES[2]], self.get_scraper, MagicMock(),
+                                    self.get_notifier)
+
+        self.assertEqual(report['notify'].emitted, 1)
+        self.assertEqual(report['notify'].stats, {'failed_to_notify': 2})
+        self.assertEqual(set(notification_manager._last_notified), {"https://shop/0"})
+
+    async def test_rejects_unknown_stages_and_a_missing_source(self):
+        with self.assertRaises(ValueError):
+            await run_pipeline({'name': 'bad'}, [STAGES[0], {'stage': 'translate'}])
+        with self.assertRaises(ValueError):
+            await run_pipeline({'name': 'bad'}, STAGES[1:])
+
+
+class TestProcessTask(unittest.IsolatedAsyncioTestCase):
+
+    async def test_task_with_stages_runs_them(self):
+        scraper = MagicMock()
+        scraper.scrape.return_value = _products(2)
+        notifier = AsyncMock()
+        task = {'name': 'new store', 'type': 'unused', 'stages': STAGES}
+
+        await process_task(task, MagicMock(return_value=scraper), MagicMock(return_value=EvenPriceChecker()),
+                           MagicMock(return_value=notifier))
+
+        notifier.notify.assert_called_once()
+
+    @patch('processors.logging')
+    async def test_unknown_task_type_is_skipped(self, mock_logging):
+        await process_task({'name': 'mystery', 'type': 'shopee'})
+
+        self.assertIn("不受支援", mock_logging.warning.call_args[0][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,7 @@ import unittest
 from unittest.mock import MagicMock, AsyncMock, patch
 
 from processors.pulamo import process_pulamo_task
-from processors.ruten import process_ruten_task, notification_manager
+from processors.ruten import enrich_batch_size, process_ruten_task, notification_manager
 from models import Product
 
 # A sample task config that can be reused across tests
@@ -160,5 +160,15 @@ class TestRutenProcessor(unittest.IsolatedAsyncioTestCase):
         self.mock_stock_checker.check.assert_called_once()
         self.mock_notifier.notify.assert_not_called()
 
+
+class TestEnrichBatchSize(unittest.TestCase):
+
+    @patch('config.RUTEN_ENRICH_BATCH_SIZE', 0)
+    @patch('config.RUTEN_PAGE_TABS', 4)
+    def test_selenium_page_scraper_gets_a_batch_per_tab_set(self):
+        self.assertEqual(enrich_batch_size({'page_scraper': 'ruten.RutenProductPageScraper'}), 4)
+        self.assertEqual(enrich_batch_size({'page_scraper': ['ruten_api.RutenProductPageAPIScraper', 'ruten.RutenProductPageScraper']}), 1)
+        self.assertEqual(enrich_batch_size({'page_scraper': 'ruten.RutenProductPageScraper', 'enrich_batch_size': 2}), 2)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,103 @@
+# tests/test_profiling.py
+import asyncio
+import glob
+import os
+import pstats
+import signal
+import tempfile
+import time
+import tracemalloc
+import unittest
+
+from profiling import CycleProfiler
+
+
+def _busy_work():
+    end = time.perf_counter() + 0.05
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(100))
+    return total
+
+
+class TestCycleProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.output_dir = os.path.join(self.tmpdir.name, 'profiles')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_cycles_are_not_profiled_until_requested(self):
+        profiler = CycleProfiler(self.output_dir)
+        with profiler.profile_cycle():
+            _busy_work()
+        self.assertFalse(os.path.exists(self.output_dir))
+
+    def test_cprofile_writes_pstats_for_requested_cycles_only(self):
+        profiler = CycleProfiler(self.output_dir, mode='cprofile')
+        profiler.request(2)
+        for _ in range(3):
+            with profiler.profile_cycle():
+                _busy_work()
+
+        files = glob.glob(os.path.join(self.output_dir, '*.pstats'))
+        self.assertEqual(len(files), 2)
+        stats = pstats.Stats(files[0])
+        self.assertTrue(any(func[2] == '_busy_work' for func in stats.stats))
+
+    def test_sampling_writes_collapsed_stacks(self):
+        profiler = CycleProfiler(self.output_dir, mode='sampling', sample_interval=0.001)
+        profiler.request()
+        with profiler.profile_cycle():
+            _busy_work()
+
+        [path] = glob.glob(os.path.join(self.output_dir, '*.collapsed'))
+        with open(path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertGreater(int(count), 0)
+        self.assertTrue(any('_busy_work' in line for line in lines))
+
+    def test_tracemalloc_diff_reports_growth(self):
+        was_tracing = tracemalloc.is_tracing()
+        try:
+            profiler = CycleProfiler(self.output_dir, trace_allocations=True)
+            retained = []
+            profiler.request()
+            with profiler.profile_cycle():
+                retained.extend(bytearray(1024) for _ in range(200))
+
+            [path] = glob.glob(os.path.join(self.output_dir, '*.tracemalloc.txt'))
+            with open(path, encoding='utf-8') as f:
+                report = f.read()
+            self.assertIn('test_profiling.py', report)
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            CycleProfiler(self.output_dir, mode='perf')
+
+    @unittest.skipUnless(hasattr(signal, 'SIGUSR1'), "SIGUSR1 not available")
+    def test_signal_requests_profiling(self):
+        profiler = CycleProfiler(self.output_dir)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            self.assertTrue(profiler.install_signal_handler(loop))
+            try:
+                os.kill(os.getpid(), signal.SIGUSR1)
+                await asyncio.sleep(0.05)
+            finally:
+                loop.remove_signal_handler(signal.SIGUSR1)
+
+        asyncio.run(run())
+        self.assertEqual(profiler.pending_cycles, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
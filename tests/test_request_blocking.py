@@ -0,0 +1,111 @@
+# tests/test_request_blocking.py
+import base64
+import unittest
+from unittest.mock import MagicMock, patch
+
+import config
+import metrics
+from scrapers.request_blocking import SINK_PROXY, RequestBlocklist, default_blocklist, page_load_stats
+from scrapers.selenium_scraper import SeleniumScraper
+
+
+class TestRequestBlocklist(unittest.TestCase):
+
+    def setUp(self):
+        self.blocklist = RequestBlocklist(['*.facebook.net', 'fonts.gstatic.com', '*.example.com'], ['cdn.example.com'])
+
+    def test_blocks_denied_hosts_unless_allowed(self):
+        self.assertTrue(self.blocklist.blocks('https://connect.facebook.net/sdk.js'))
+        self.assertTrue(self.blocklist.blocks('https://FONTS.gstatic.com/s/font.woff2'))
+        self.assertTrue(self.blocklist.blocks('https://ads.example.com/pixel'))
+        self.assertFalse(self.blocklist.blocks('https://cdn.example.com/app.js'))
+        self.assertFalse(self.blocklist.blocks('https://www.ruten.com.tw/find/?q=ps5'))
+        self.assertFalse(self.blocklist.blocks('not a url'))
+
+    def test_pac_script_routes_denied_hosts_to_the_sink(self):
+        pac = self.blocklist.pac_script()
+
+        self.assertIn('function FindProxyForURL', pac)
+        self.assertIn('"*.facebook.net"', pac)
+        self.assertIn('"cdn.example.com"', pac)
+        self.assertIn(f"PROXY {SINK_PROXY}", pac)
+        encoded = self.blocklist.pac_url().split(',', 1)[1]
+        self.assertEqual(base64.b64decode(encoded).decode('utf-8'), pac)
+
+    def test_apply_configures_both_browsers(self):
+        firefox = MagicMock()
+        self.blocklist.apply(firefox, 'firefox')
+        firefox.set_preference.assert_any_call('network.proxy.type', 2)
+        firefox.set_preference.assert_any_call('network.proxy.autoconfig_url', self.blocklist.pac_url())
+        firefox.set_preference.assert_any_call('network.proxy.failover_direct', False)
+
+        chrome = MagicMock()
+        self.blocklist.apply(chrome, 'chrome')
+        chrome.add_argument.assert_called_once_with(f"--proxy-pac-url={self.blocklist.pac_url()}")
+
+    def test_default_blocklist_follows_config(self):
+        with patch.object(config, 'REQUEST_BLOCKING', False):
+            self.assertIsNone(default_blocklist())
+        with patch.object(config, 'REQUEST_BLOCKING', True):
+            self.assertTrue(default_blocklist().blocks('https://www.google-analytics.com/collect'))
+
+    def test_page_load_stats_counts_transferred_and_blocked_requests(self):
+        driver = MagicMock()
+        driver.execute_script.return_value = {
+            'document_bytes': 20_000,
+            'load_ms': 850.0,
+            'resources': [
+                ['https://cdn.example.com/app.js', 30_000],
+                ['https://connect.facebook.net/sdk.js', 0],
+                ['https://img.example.org/a.jpg', 5_000],
+            ],
+        }
+
+        stats = page_load_stats(driver, self.blocklist)
+
+        self.assertEqual(stats, {'requests': 3, 'bytes': 55_000, 'blocked_requests': 1, 'load_ms': 850.0})
+        self.assertEqual(page_load_stats(driver)['blocked_requests'], 0)
+
+
+class TestSeleniumScraperBlocking(unittest.TestCase):
+
+    @patch('scrapers.selenium_scraper.webdriver.Remote')
+    def test_firefox_session_gets_the_pac_and_records_page_loads(self, mock_remote):
+        with patch.object(config, 'REQUEST_BLOCKING', True):
+            scraper = SeleniumScraper(grid_url="http://fake-url", browser='firefox')
+
+        options = mock_remote.call_args.kwargs['options']
+        self.assertEqual(options.preferences['network.proxy.type'], 2)
+        self.assertEqual(options.preferences['network.proxy.autoconfig_url'], scraper.blocklist.pac_url())
+        self.assertFalse(options.preferences['gfx.downloadable_fonts.enabled'])
+
+        scraper.driver.execute_script.return_value = {
+            'document_bytes': 1_000, 'load_ms': 100.0,
+            'resources': [['https://www.googletagmanager.com/gtm.js', 0]],
+        }
+        requests_before = metrics.PAGE_LOAD_REQUESTS.count(browser='firefox')
+        blocked_before = metrics.BLOCKED_REQUESTS.value(browser='firefox')
+
+        scraper._record_page_load()  # Off by default
+        self.assertEqual(metrics.PAGE_LOAD_REQUESTS.count(browser='firefox'), requests_before)
+        with patch.object(config, 'PAGE_LOAD_STATS', True):
+            scraper._record_page_load()
+
+        self.assertEqual(metrics.PAGE_LOAD_REQUESTS.count(browser='firefox'), requests_before + 1)
+        self.assertEqual(metrics.BLOCKED_REQUESTS.value(browser='firefox'), blocked_before + 1)
+        scraper.close()
+
+    @patch('scrapers.selenium_scraper.webdriver.Remote')
+    def test_chrome_session_without_blocking(self, mock_remote):
+        with patch.object(config, 'REQUEST_BLOCKING', False):
+            scraper = SeleniumScraper(grid_url="http://fake-url", browser='chrome')
+
+        options = mock_remote.call_args.kwargs['options']
+        self.assertIsNone(scraper.blocklist)
+        self.assertFalse(any(arg.startswith('--proxy-pac-url') for arg in options.arguments))
+        mock_remote.return_value.execute_cdp_cmd.assert_not_called()
+        scraper.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+# tests/test_routing.py
+import unittest
+from contextlib import asynccontextmanager
+from unittest.mock import MagicMock, patch
+
+import config
+import metrics
+from models import Product
+from processors.sessions import open_scraper
+from scrapers.base import ScrapeDelta
+from scrapers.routing import BackendHealth, RoutingScraper, is_empty_result
+
+
+class FakeBackends:
+    """Scrapers by name, each returning (or raising) its queued results in turn."""
+
+    def __init__(self, **results):
+        self.results = {name: list(values) for name, values in results.items()}
+        self.opened = []
+        self.closed = []
+
+    @asynccontextmanager
+    async def open(self, name):
+        self.opened.append(name)
+        scraper = MagicMock()
+        result = self.results[name].pop(0)
+        if isinstance(result, Exception):
+            scraper.scrape.side_effect = result
+        else:
+            scraper.scrape.return_value = result
+        yield scraper
+        self.closed.append(name)
+
+
+PRODUCTS = [Product(title="MGSD 命運鋼彈", price=1200, in_stock=False, url="https://r/1")]
+
+
+class TestRoutingScraper(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.health = BackendHealth()
+
+    def _router(self, backends):
+        return RoutingScraper(['api', 'browser'], backends.open, route='task', health=self.health)
+
+    async def test_cheapest_backend_serves_while_healthy(self):
+        backends = FakeBackends(api=[PRODUCTS, PRODUCTS], browser=[])
+        served_before = metrics.ROUTED_REQUESTS.value(backend='api')
+
+        for _ in range(2):
+            self.assertEqual(await self._router(backends).ascrape({}), PRODUCTS)
+
+        self.assertEqual(backends.opened, ['api', 'api'])
+        self.assertEqual(metrics.ROUTED_REQUESTS.value(backend='api'), served_before + 2)
+        self.assertEqual(self.health.success_rate('api'), 1.0)
+
+    @patch.object(config, 'ROUTING_FAILURE_THRESHOLD', 2)
+    async def test_falls_back_on_errors_and_skips_a_failing_backend(self):
+        backends = FakeBackends(api=[RuntimeError("403"), RuntimeError("403")], browser=[PRODUCTS] * 3)
+
+        for _ in range(3):
+            self.assertEqual(await self._router(backends).ascrape({}), PRODUCTS)
+
+        self.assertEqual(backends.opened, ['api', 'browser', 'api', 'browser', 'browser'])
+        self.assertFalse(self.health.is_healthy('api'))
+        self.assertEqual(self._router(backends).candidates(), ['browser', 'api'])
+
+    async def test_sudden_empty_result_is_confirmed_by_the_next_backend(self):
+        backends = FakeBackends(api=[PRODUCTS, [], []], browser=[PRODUCTS, []])
+
+        await self._router(backends).ascrape({})
+        self.assertEqual(await self._router(backends).ascrape({}), PRODUCTS)  # API broke: browser serves
+        self.assertEqual(self.health.success_rate('api'), 0.5)
+
+        self.assertEqual(await self._router(backends).ascrape({}), [])  # Browser agrees: nothing listed
+        self.assertEqual(self.health.success_rate('api'), 2 / 3)
+        self.assertEqual(backends.opened, ['api', 'api', 'browser', 'api', 'browser'])
+
+    async def test_empty_result_without_history_is_checked_once(self):
+        backends = FakeBackends(api=[[], [], []], browser=[PRODUCTS, []])
+
+        # Already broken at startup: the browser serves
+        self.assertEqual(await self._router(backends).ascrape({}), PRODUCTS)
+        self.assertEqual(self.health.success_rate('api'), 0.0)
+
+        self.assertEqual(await self._router(backends).ascrape({}), [])  # Browser agrees: nothing listed
+        self.assertEqual(await self._router(backends).ascrape({}), [])  # Trusted from now on
+        self.assertEqual(backends.opened, ['api', 'browser', 'api', 'browser', 'api'])
+
+    def test_healthy_backends_are_ranked_by_cost(self):
+        for _ in range(4):
+            self.health.record('api', True, 1.5)
+        self.health.record('api', False, 1.5)
+        for _ in range(3):
+            self.health.record('browser', True, 2.0)
+        router = RoutingScraper(['browser', 'api', 'pages'], FakeBackends().open, health=self.health)
+
+        # 1.5 s at 5/7 beats 2 s at 4/5; 'pages' is unmeasured and counts as free
+        self.assertEqual(router.candidates(), ['pages', 'api', 'browser'])
+
+        for _ in range(5):  # Now failing two requests in three: 1.5 s at 10/22
+            for ok in (False, False, True):
+                self.health.record('api', ok, 1.5)
+        self.health.record('pages', True, 20.0)
+        self.assertEqual(router.candidates(), ['browser', 'api', 'pages'])
+
+    def test_costs_within_the_resolution_keep_the_declared_order(self):
+        self.health.record('api', True, 0.02)
+        self.health.record('browser', True, 0.001)
+        self.assertEqual(self._router(FakeBackends()).candidates(), ['api', 'browser'])
+
+    async def test_raises_when_every_backend_fails(self):
+        backends = FakeBackends(api=[RuntimeError("403")], browser=[ConnectionError("grid down")])
+
+        with self.assertRaises(ConnectionError):
+            await self._router(backends).ascrape({})
+
+    def test_page_scrape_with_every_page_failed_is_empty(self):
+        self.assertTrue(is_empty_result((PRODUCTS, {'failed_to_scrape': ['MGSD 命運鋼彈']})))
+        self.assertFalse(is_empty_result((PRODUCTS, {'failed_to_scrape': []})))
+        self.assertFalse(is_empty_result(([], {'failed_to_scrape': []})))
+
+    def test_nothing_new_from_an_incremental_search_is_not_empty(self):
+        self.assertFalse(is_empty_result(ScrapeDelta()))
+        self.assertTrue(is_empty_result([]))
+
+
+class TestRoutingScraperSync(unittest.TestCase):
+
+    def test_scrape_runs_on_its_own_loop_until_closed(self):
+        backends = FakeBackends(api=[RuntimeError("403")], browser=[PRODUCTS])
+        router = RoutingScraper(['api', 'browser'], backends.open, health=BackendHealth())
+
+        with router:
+            self.assertEqual(router.scrape({}), PRODUCTS)
+            self.assertEqual(router.scrape({}), PRODUCTS)  # Reuses the opened browser backend
+
+        self.assertEqual(backends.opened, ['api', 'browser'])
+        self.assertEqual(backends.closed, ['browser', 'api'])
+
+
+class TestOpenRoutedScraper(unittest.IsolatedAsyncioTestCase):
+
+    async def test_list_of_scrapers_opens_a_router(self):
+        api, browser = MagicMock(), MagicMock()
+        api.scrape.side_effect = RuntimeError("schema changed")
+        browser.scrape.return_value = PRODUCTS
+        get_scraper = MagicMock(side_effect=lambda name, *args, **kwargs: {'fake.api': api, 'fake.browser': browser}[name])
+        task = {'name': 'routed-task', 'browser': 'firefox'}
+
+        async with open_scraper(get_scraper, ['fake.api', 'fake.browser'], task) as scraper:
+            self.assertIsInstance(scraper, RoutingScraper)
+            products = await scraper.ascrape({'search_url': 'https://r/find'})
+
+        self.assertEqual(products, PRODUCTS)
+        api.__exit__.assert_called_once()
+        browser.__exit__.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
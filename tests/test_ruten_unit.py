@@ -2,6 +2,7 @@
 import pytest
 from unittest.mock import patch
 from bs4 import BeautifulSoup
+from selenium.common.exceptions import WebDriverException
 from models import Product
 from scrapers.ruten import RutenSearchScraper, RutenProductPageScraper
 from checkers.keyword import KeywordChecker
@@ -111,6 +112,98 @@ def sample_products_for_payment_check():
         Product(title="Product D", price=400, in_stock=True, seller="seller_D", url="http://example.com/d", payment_methods=['SEVEN_COD', 'PP_CRD']),
     ]
 
+class FakeTabbedDriver:
+    """A WebDriver stand-in with tabs whose pages become ready after a number of polls."""
+
+    def __init__(self, polls_until_ready):
+        self.polls_until_ready = polls_until_ready  # url -> polls, None never loads
+        self.tabs = {'tab-0': None}
+        self.current = 'tab-0'
+        self.remaining = {}
+        self.max_loading = 0
+        self.switch_to = self
+
+    @property
+    def current_window_handle(self):
+        return self.current
+
+    def new_window(self, kind):
+        self.current = f'tab-{len(self.tabs)}'
+        self.tabs[self.current] = None
+
+    def window(self, handle):
+        self.current = handle
+
+    def close(self):
+        del self.tabs[self.current]
+
+    def execute_script(self, script, *args):
+        if 'performance' in script:
+            return {'document_bytes': 1000, 'resources': [['https://www.google-analytics.com/ga.js', 0]]}
+        if 'location.href' in script:
+            if self.polls_until_ready[args[0]] == 'raise':
+                raise WebDriverException("tab crashed")
+            self.tabs[self.current] = args[0]
+            self.remaining[self.current] = self.polls_until_ready[args[0]]
+            self.max_loading = max(self.max_loading, sum(1 for r in self.remaining.values() if r is None or r > 0))
+            return None
+        remaining = self.remaining[self.current]
+        if remaining is None:
+            return False
+        self.remaining[self.current] = remaining - 1
+        return remaining <= 1
+
+    @property
+    def page_source(self):
+        url = self.tabs[self.current]
+        stock = 0 if url.endswith('sold-out') else 3
+        return f'<html><head><meta name="description" content="庫存: {stock}"></head><body><a href="https://www.ruten.com.tw/store/seller_{url[-1]}"></a></body></html>'
+
+
+@patch('scrapers.ruten.TAB_POLL_SECONDS', 0)
+def test_product_pages_load_in_parallel_tabs(ruten_page_scraper):
+    urls = ['https://r/1', 'https://r/2', 'https://r/sold-out', 'https://r/4', 'https://r/5']
+    ruten_page_scraper.driver = FakeTabbedDriver({'https://r/1': 3, 'https://r/2': 1, 'https://r/sold-out': 2, 'https://r/4': 1, 'https://r/5': 1})
+    products = [Product(title=url, price=100, url=url, in_stock=False) for url in urls]
+
+    updated, stats = ruten_page_scraper.scrape(products, {'page_tabs': 3})
+
+    assert [p.url for p in updated] == urls  # input order kept
+    assert [p.in_stock for p in updated] == [True, True, False, True, True]
+    assert updated[0].seller == 'seller_1'
+    assert stats['out_of_stock_after_scrape'] == ['https://r/sold-out']
+    assert stats['failed_to_scrape'] == []
+    assert ruten_page_scraper.driver.max_loading == 3
+    # Extra tabs are closed and the original one is current again
+    assert list(ruten_page_scraper.driver.tabs) == ['tab-0']
+    assert ruten_page_scraper.driver.current == 'tab-0'
+
+
+@patch('scrapers.ruten.TAB_POLL_SECONDS', 0)
+@patch('scrapers.ruten.PAGE_READY_TIMEOUT_SECONDS', 0)
+def test_tab_that_never_loads_is_marked_failed(ruten_page_scraper):
+    ruten_page_scraper.driver = FakeTabbedDriver({'https://r/1': None, 'https://r/2': 1})
+    products = [Product(title=url, price=100, url=url, in_stock=True) for url in ['https://r/1', 'https://r/2']]
+
+    updated, stats = ruten_page_scraper.scrape(products, {'page_tabs': 2})
+
+    assert stats['failed_to_scrape'] == ['https://r/1']
+    assert [p.in_stock for p in updated] == [False, True]
+
+
+@patch('scrapers.ruten.TAB_POLL_SECONDS', 0)
+def test_navigation_that_raises_fails_only_its_product(ruten_page_scraper):
+    urls = [f'https://r/{i}' for i in range(1, 6)]
+    ruten_page_scraper.driver = FakeTabbedDriver({'https://r/1': 1, 'https://r/2': 1, 'https://r/3': 1, 'https://r/4': 'raise', 'https://r/5': 1})
+    products = [Product(title=url, price=100, url=url, in_stock=True) for url in urls]
+
+    updated, stats = ruten_page_scraper.scrape(products, {'page_tabs': 3})
+
+    assert [p.url for p in updated] == urls
+    assert stats['failed_to_scrape'] == ['https://r/4']
+    assert [p.in_stock for p in updated] == [True, True, True, False, True]
+
+
 # --- Unit Tests ---
 
 def test_parse_product_item_successfully(ruten_search_scraper, sample_product_item_html):
@@ -1,7 +1,10 @@
 # tests/test_scrapers_pulamo_unit.py
+import re
 import unittest
+import unittest.mock
 from bs4 import BeautifulSoup, Tag
-from scrapers.pulamo import PulamoScraper
+from scrapers.fingerprint import element_region, payload_cache
+from scrapers.pulamo import PRODUCT_CARD_TAG, PulamoScraper
 from models import Product
 
 class TestPulamoScraperUnit(unittest.TestCase):
@@ -85,5 +88,38 @@ class TestPulamoScraperUnit(unittest.TestCase):
         self.assertTrue(product.in_stock)
         self.assertEqual(product.url, "http://pulamo.com.tw/search") # Should fallback to page_url
 
+    @unittest.mock.patch('config.PAGE_LOAD_STATS', False)
+    def test_unchanged_product_list_is_not_parsed_again(self):
+        payload_cache.clear()
+        card = """<div class="meepshop-meep-ui__productList-index__productCard">
+            <div class="meepshop-meep-ui__productList-index__productTitle">MGSD 飛翼鋼彈</div>
+            <div style="font-size:16px;font-weight:700">NT$ 1350</div>
+            <a href="/products/wing-gundam">View Product</a>
+        </div>"""
+        self.scraper.driver = unittest.mock.MagicMock()
+        params = {'search_url': "http://pulamo.com.tw/search"}
+
+        self.scraper.driver.page_source = f'<html><script>token=1</script><div id="list">{card}</div></html>'
+        first = self.scraper.scrape(params)
+        self.scraper.driver.page_source = f'<html><script>token=2</script><div id="list">{card}</div></html>'
+        with unittest.mock.patch.object(self.scraper, '_parse_product_card') as parse:
+            second = self.scraper.scrape(params)
+
+        parse.assert_not_called()  # Only the script changed
+        self.assertFalse(first.unchanged)
+        self.assertTrue(second.unchanged)
+        self.assertEqual(second.fingerprint, first.fingerprint)
+        self.assertEqual([p.title for p in second], ["MGSD 飛翼鋼彈"])
+        self.assertIsNot(second[0], first[0])
+
+    def test_element_region_spans_the_matching_divs(self):
+        html = ('<div id="page"><div class="productCard"><div>A</div></div>'
+                '<div class="productCard"><div>B</div></div></div><script>x</script>')
+
+        region = element_region(html, re.compile(r'<div\b[^>]*\bclass="productCard"'))
+
+        self.assertEqual(region, '<div class="productCard"><div>A</div></div><div class="productCard"><div>B</div></div>')
+        self.assertEqual(element_region('<div>none</div>', PRODUCT_CARD_TAG), '')
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,10 +1,21 @@
+import json
+import os
 import unittest
+import config
 from unittest.mock import MagicMock, patch
 import requests
 
-from scrapers.ruten_api import RutenSearchAPIScraper, RutenProductPageAPIScraper
+from benchmarks.synthetic import generate_catalog, ruten_search_page_html
+from logger_config import task_context
+from scrapers.ruten import RutenSearchScraper, parse_search_page
+from scrapers.base import ScrapeDelta
+from scrapers.ruten_api import (
+    RutenSearchAPIScraper, RutenProductPageAPIScraper, RutenSearchHTTPScraper, search_watermarks, split_price_band,
+)
 from models import Product
 
+SAVED_SEARCH_PAGE = os.path.join(os.path.dirname(__file__), '..', 'temp', 'ruten_search.html')
+
 class TestRutenAPIScrapers(unittest.TestCase):
 
     def setUp(self):
@@ -23,6 +34,7 @@ class TestRutenAPIScrapers(unittest.TestCase):
         }
 
         mock_details_response = MagicMock()
+        mock_details_response.content = b'[{"ProdId": "111"}, {"ProdId": "222"}]'
         mock_details_response.json.return_value = [
             {
                 "ProdId": "111",
@@ -173,5 +185,199 @@ class TestRutenAPIScrapers(unittest.TestCase):
         self.assertEqual(updated_products[0].price, 12345)
         self.assertTrue(updated_products[0].in_stock)
 
+class FakeRutenAPI:
+    """Answers the search API (by rank or newest first) and the details API from a list of listing IDs."""
+
+    def __init__(self, ids):
+        self.ids = list(ids)  # Oldest first
+        self.searches = []
+        self.detail_ids = []
+
+    def get(self, url, params=None, headers=None):
+        response = MagicMock()
+        if url.endswith(RutenSearchAPIScraper.SEARCH_API_PATH):
+            self.searches.append(params)
+            ordered = sorted(self.ids, key=int, reverse=params['sort'] == 'new/dc')
+            offset, limit = int(params['offset']) - 1, int(params['limit'])
+            response.json.return_value = {"Rows": [{"Id": i} for i in ordered[offset:offset + limit]]}
+        else:
+            ids = params['id'].split(',')
+            self.detail_ids.append(ids)
+            response.json.return_value = [
+                {"ProdId": i, "ProdName": f"MGSD {i}", "PriceRange": [100000], "StockStatus": 1, "SellerId": "s", "Payment": ""}
+                for i in ids
+            ]
+            response.content = json.dumps(response.json.return_value).encode()
+        return response
+
+
+@patch.object(config, 'RUTEN_INCREMENTAL_PAGE_SIZE', 3)
+class TestIncrementalSearch(unittest.TestCase):
+
+    def setUp(self):
+        search_watermarks.clear()
+        self.api = FakeRutenAPI(str(1000 + i) for i in range(10))
+        self.scraper = RutenSearchAPIScraper(session=self.api)
+        self.params = {'search_url': 'https://www.ruten.com.tw/find/?q=mgsd', 'incremental': True}
+
+    def test_polls_only_listings_newer_than_the_high_water_mark(self):
+        self.assertEqual(len(self.scraper.scrape(self.params)), 10)  # First call: full sweep
+
+        self.api.ids += ['1010', '1011', '1012', '1013']
+        products = self.scraper.scrape(self.params)
+
+        self.assertIsInstance(products, ScrapeDelta)
+        self.assertEqual(sorted(p.url.rsplit('?', 1)[-1] for p in products), ['1010', '1011', '1012', '1013'])
+        self.assertEqual(self.api.detail_ids[-1], ['1013', '1012', '1011', '1010'])
+        self.assertEqual([s['offset'] for s in self.api.searches[-2:]], ['1', '4'])  # Stopped at a known ID
+        self.assertEqual(self.scraper.scrape(self.params), [])  # Nothing new since
+        self.assertEqual(len(self.api.detail_ids), 2)
+
+    def test_full_sweep_runs_again_after_the_interval(self):
+        self.scraper.scrape(self.params)
+        self.api.ids.append('1010')
+
+        products = self.scraper.scrape({**self.params, 'full_sweep_seconds': 0})
+
+        self.assertNotIsInstance(products, ScrapeDelta)
+        self.assertEqual(len(products), 11)
+        self.assertEqual(self.api.searches[-2]['sort'], 'rnk/dc')
+        self.assertEqual(len(self.scraper.scrape(self.params)), 0)  # The sweep saw 1010
+
+    def test_queries_keep_separate_marks(self):
+        self.scraper.scrape(self.params)
+        other = {**self.params, 'search_url': 'https://www.ruten.com.tw/find/?q=mgsd&prc.now=900-1400'}
+
+        self.assertEqual(len(self.scraper.scrape(other)), 10)  # Its own first, full sweep
+
+    def test_tasks_sharing_a_query_keep_separate_marks(self):
+        for task in ('cheap', 'any seller'):
+            with task_context(task):
+                self.scraper.scrape(self.params)
+        self.api.ids.append('1010')
+
+        for task in ('cheap', 'any seller'):
+            with task_context(task):
+                self.assertEqual([p.url.rsplit('?', 1)[-1] for p in self.scraper.scrape(self.params)], ['1010'])
+
+
+class PricedRutenAPI(FakeRutenAPI):
+    """A FakeRutenAPI whose listings have prices, honouring `prc.now` and reporting TotalRows."""
+
+    def __init__(self, prices):
+        super().__init__(prices)
+        self.prices = dict(prices)
+
+    def get(self, url, params=None, headers=None):
+        if not url.endswith(RutenSearchAPIScraper.SEARCH_API_PATH):
+            return super().get(url, params, headers)
+        self.searches.append(params)
+        low, _, high = params.get('prc.now', '').partition('-')
+        matches = [i for i, price in self.prices.items()
+                   if (not low or price >= int(low)) and (not high or price <= int(high))]
+        offset, limit = int(params['offset']) - 1, int(params['limit'])
+        response = MagicMock()
+        response.json.return_value = {"TotalRows": len(matches), "Rows": [{"Id": i} for i in matches[offset:offset + limit]]}
+        return response
+
+
+class TestPriceBandSearch(unittest.TestCase):
+
+    def test_bands_are_adjacent_and_cover_the_range(self):
+        self.assertEqual(split_price_band((900, 1400), 4), [(900, 1024), (1025, 1149), (1150, 1274), (1275, 1400)])
+        self.assertEqual(split_price_band((5, 6), 4), [(5, 5), (6, 6)])
+        with patch.object(config, 'RUTEN_PRICE_BAND_CEILING', 1000):
+            self.assertEqual(split_price_band((0, None), 3), [(0, 499), (500, 1000), (1001, None)])
+
+    @patch.object(config, 'RUTEN_DETAILS_CHUNK_SIZE', 8)
+    def test_overflowing_bands_are_split_until_every_listing_is_found(self):
+        # 40 listings between 900 and 1400, twelve of them at the same price
+        prices = {str(2000 + i): 900 + i * 17 for i in range(28)}
+        prices.update({str(3000 + i): 1000 for i in range(12)})
+        api = PricedRutenAPI(prices.items())
+        params = {'search_url': 'https://www.ruten.com.tw/find/?q=mgsd&prc.now=900-1400&limit=5', 'price_bands': 2}
+
+        products = RutenSearchAPIScraper(session=api).scrape(params)
+
+        self.assertEqual(sorted(p.url.rsplit('?', 1)[-1] for p in products), sorted(prices))
+        self.assertEqual(sum(len(ids) for ids in api.detail_ids), 40)  # Deduped: each listing's details once
+        self.assertEqual(len(api.detail_ids), 5)  # Chunks of eight
+        self.assertIn('1000-1000', [s['prc.now'] for s in api.searches])  # The single price is paged through
+
+    @patch.object(config, 'RUTEN_SEARCH_CONCURRENCY', 1)
+    def test_listing_found_in_two_bands_is_kept_once(self):
+        api = PricedRutenAPI([('1', 950), ('2', 1300)])
+        original_get = api.get
+
+        def repriced_midway(url, params=None, headers=None):  # Listing 1 shows up in both bands
+            if params and params.get('prc.now') == '1150-1400':
+                api.prices['1'] = 1200
+            return original_get(url, params, headers)
+        api.get = repriced_midway
+        params = {'search_url': 'https://www.ruten.com.tw/find/?q=mgsd&prc.now=900-1400', 'price_bands': 2}
+
+        products = RutenSearchAPIScraper(session=api).scrape(params)
+
+        self.assertEqual(sorted(p.url.rsplit('?', 1)[-1] for p in products), ['1', '2'])
+        self.assertEqual(api.detail_ids, [['1', '2']])
+
+
+class TestRutenSearchHTTPScraper(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_session = MagicMock(spec=requests.Session)
+        self.params = {'search_url': 'https://www.ruten.com.tw/find/?q=mgsd'}
+
+    def _html_response(self, html):
+        response = MagicMock()
+        response.text = html
+        return response
+
+    @patch('config.PAGE_LOAD_STATS', False)
+    @patch('scrapers.ruten.time.sleep')
+    def test_matches_the_selenium_scraper_on_rendered_cards(self, _sleep):
+        html = ruten_search_page_html(generate_catalog(40, seed=3))
+        with patch('scrapers.selenium_scraper.SeleniumScraper._initialize_driver', return_value=MagicMock(page_source=html)):
+            browser_scraper = RutenSearchScraper(grid_url="http://fake-grid-url")
+        browser_products = browser_scraper.scrape(self.params)
+
+        self.mock_session.get.return_value = self._html_response(html)
+        http_products = RutenSearchHTTPScraper(session=self.mock_session).scrape(self.params)
+
+        self.assertEqual(len(http_products), 40)
+        self.assertEqual(http_products, browser_products)
+        self.mock_session.get.assert_called_once()  # No API fallback
+
+    def test_saved_search_page_falls_back_to_the_search_api(self):
+        """The saved page only has placeholder cards, which neither scraper can parse."""
+        with open(SAVED_SEARCH_PAGE, encoding='utf-8') as f:
+            saved_page = f.read()
+        self.assertEqual(parse_search_page(saved_page), [])
+
+        search_response = MagicMock()
+        search_response.json.return_value = {"Rows": [{"Id": "111"}]}
+        details_response = MagicMock()
+        details_response.json.return_value = [
+            {"ProdId": "111", "ProdName": "MGSD 命運鋼彈", "PriceRange": [120000, 120000], "StockStatus": 3,
+             "SellerId": "seller1", "Payment": "CREDIT_CARD"},
+        ]
+        details_response.content = json.dumps(details_response.json.return_value).encode()
+        self.mock_session.get.side_effect = [self._html_response(saved_page), search_response, details_response]
+
+        products = RutenSearchHTTPScraper(session=self.mock_session).scrape(self.params)
+
+        self.assertEqual([(p.title, p.price, p.url) for p in products],
+                         [("MGSD 命運鋼彈", 1200, "https://www.ruten.com.tw/item/show?111")])
+        self.assertEqual(self.mock_session.get.call_count, 3)
+
+    def test_page_fetch_failure_falls_back_to_the_search_api(self):
+        search_response = MagicMock()
+        search_response.json.return_value = {"Rows": []}
+        self.mock_session.get.side_effect = [requests.exceptions.ConnectionError("reset"), search_response]
+
+        self.assertEqual(RutenSearchHTTPScraper(session=self.mock_session).scrape(self.params), [])
+        self.assertEqual(self.mock_session.get.call_count, 2)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,117 @@
+# tests/test_streaming.py
+import asyncio
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from checkers.stock import StockChecker
+from models import Product
+from processors.ruten import notification_manager, process_ruten_task
+from processors.streaming import Channel, run_stages
+
+
+class TestChannel(unittest.IsolatedAsyncioTestCase):
+
+    async def test_batches_take_what_is_queued_and_close_every_consumer(self):
+        channel = Channel(maxsize=10)
+        for i in range(5):
+            await channel.put(i)
+        await channel.close()
+
+        async def consume():
+            return [batch async for batch in channel.batches(2)]
+
+        first, second = await asyncio.gather(consume(), consume())
+
+        self.assertEqual(sorted(i for batch in first + second for i in batch), [0, 1, 2, 3, 4])
+        self.assertTrue(all(len(batch) <= 2 for batch in first + second))
+
+    async def test_full_channel_applies_backpressure(self):
+        channel = Channel(maxsize=2)
+        produced = []
+
+        async def produce():
+            for i in range(5):
+                await channel.put(i)
+                produced.append(i)
+            await channel.close()
+
+        producer = asyncio.create_task(produce())
+        await asyncio.sleep(0.01)
+        self.assertEqual(produced, [0, 1])  # Waiting for a consumer
+
+        self.assertEqual([item async for item in channel], [0, 1, 2, 3, 4])
+        await producer
+
+    async def test_failing_stage_cancels_the_others(self):
+        channel = Channel(maxsize=1)
+
+        async def stuck_consumer():
+            async for _ in channel:
+                pass
+
+        async def failing_producer():
+            await channel.put(1)
+            raise ValueError("search failed")
+
+        consumer = stuck_consumer()
+        with self.assertRaises(ValueError):
+            await asyncio.wait_for(run_stages(failing_producer(), consumer), 1)
+
+
+class SlowPageScraper:
+    """Scrapes one product page per 20 ms, recording when each call finished."""
+
+    def __init__(self):
+        self.finished_at = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    async def ascrape(self, products, params):
+        await asyncio.sleep(0.02)
+        self.finished_at.append(time.perf_counter())
+        return products, {'failed_to_scrape': []}
+
+
+class TestRutenStreaming(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        notification_manager._last_notified.clear()
+
+    async def test_first_in_stock_product_is_notified_before_the_last_page_loads(self):
+        products = [Product(title=f"MGSD {i}", price=1000, url=f"https://r/{i}", in_stock=True, seller='s', payment_methods=[])
+                    for i in range(6)]
+        search_scraper = MagicMock()
+        search_scraper.scrape.return_value = products
+        keyword_checker = MagicMock()
+        keyword_checker.check.return_value = (products, {'rejected_keyword_mismatch': [], 'rejected_excluded_keyword': []})
+        page_scraper = SlowPageScraper()
+        notified_at = []
+        notifier = AsyncMock()
+        notifier.notify.side_effect = lambda product, params: notified_at.append(time.perf_counter()) or True
+        task = {
+            'name': 'streaming', 'search_scraper': 'fake.search', 'search_scraper_params': {},
+            'keyword_checker': 'fake.keyword', 'keyword_checker_params': {},
+            'page_scraper': 'fake.page', 'stock_checker': 'stock.StockChecker', 'stock_checker_params': {},
+            'notifier': 'fake.notifier', 'notifier_params': {},
+            'enrich_batch_size': 2, 'enrich_workers': 1,
+        }
+
+        await process_ruten_task(
+            task,
+            get_scraper=MagicMock(side_effect=[search_scraper, page_scraper]),
+            get_checker=MagicMock(side_effect=[keyword_checker, StockChecker()]),
+            get_notifier=MagicMock(return_value=notifier),
+        )
+
+        self.assertEqual(notifier.notify.call_count, 6)
+        self.assertEqual(len(page_scraper.finished_at), 3)  # Batches of two
+        self.assertLess(notified_at[0], page_scraper.finished_at[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# tests/test_tracing.py
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+import tracing
+
+
+def _read_events(path):
+    with open(path, encoding='utf-8') as f:
+        content = f.read()
+    # Close the array the way the trace viewers do
+    return json.loads(content.rstrip().rstrip(',') + ']')
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'trace.json')
+
+    def tearDown(self):
+        tracing.shutdown_tracing()
+        self.tmpdir.cleanup()
+
+    def test_disabled_tracing_returns_noop_span(self):
+        tracing.configure_tracing('')
+        span = tracing.span('anything', host='x')
+        self.assertIs(span, tracing.span('other'))
+        with span as s:
+            s.set('ignored', 1)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_nested_spans_are_written_as_complete_events(self):
+        tracing.configure_tracing(self.path)
+        with tracing.track('task-a'):
+            with tracing.span('outer', task='task-a'):
+                with tracing.span('inner') as inner:
+                    inner.set('products', 3)
+        tracing.flush_traces()
+
+        events = _read_events(self.path)
+        spans = {e['name']: e for e in events if e['ph'] == 'X'}
+        names = [e for e in events if e['ph'] == 'M']
+        self.assertEqual(names[0]['args'], {'name': 'task-a'})
+        self.assertEqual(spans['inner']['args'], {'products': 3})
+        self.assertEqual(spans['outer']['tid'], names[0]['tid'])
+        self.assertEqual(spans['inner']['tid'], spans['outer']['tid'])
+        self.assertGreaterEqual(spans['inner']['ts'], spans['outer']['ts'])
+        self.assertLessEqual(spans['inner']['ts'] + spans['inner']['dur'], spans['outer']['ts'] + spans['outer']['dur'])
+
+    def test_concurrent_children_get_their_own_tracks(self):
+        tracing.configure_tracing(self.path)
+
+        @tracing.traced('notify', lambda i: {'index': i})
+        async def notify(i):
+            await asyncio.sleep(0.01)
+
+        async def run():
+            with tracing.span('notify_all'):
+                await asyncio.gather(*(notify(i) for i in range(3)))
+
+        asyncio.run(run())
+        tracing.flush_traces()
+
+        spans = [e for e in _read_events(self.path) if e['ph'] == 'X' and e['name'] == 'notify']
+        self.assertEqual(sorted(e['args']['index'] for e in spans), [0, 1, 2])
+        self.assertEqual(len({e['tid'] for e in spans}), 3)
+
+    def test_exception_is_recorded_on_span(self):
+        tracing.configure_tracing(self.path)
+        with self.assertRaises(ValueError):
+            with tracing.span('failing'):
+                raise ValueError("bad")
+        tracing.flush_traces()
+        self.assertEqual(_read_events(self.path)[0]['args']['error'], 'ValueError: bad')
+
+    def test_events_are_batched_and_file_rotates(self):
+        tracing.configure_tracing(self.path, max_bytes=200, backup_count=2, batch_size=5)
+        for _ in range(4):
+            with tracing.span('step'):
+                pass
+        self.assertFalse(os.path.exists(self.path))  # Not a full batch yet
+
+        for _ in range(16):
+            with tracing.span('step'):
+                pass
+        tracing.flush_traces()
+
+        self.assertTrue(os.path.exists(self.path + '.1'))
+        self.assertFalse(os.path.exists(self.path + '.3'))
+        for path in (self.path, self.path + '.1'):
+            self.assertTrue(all(e['name'] == 'step' for e in _read_events(path)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,229 @@
+# tracing.py
+"""
+Lightweight nested spans, exported in batches to a rotating file in the
+Chrome trace event format, which chrome://tracing and Perfetto can open.
+
+Each line of the file is one complete event ("ph": "X") followed by a comma,
+inside a JSON array whose closing bracket is left out, as the trace viewers
+allow. Each task run gets its own track (shown as a thread); spans that run
+concurrently under the same parent, such as gathered notifications, are put
+on their own tracks so they do not overlap.
+
+Tracing is off until `configure_tracing()` is given a path. While it is off,
+`span()` returns a shared no-op object, so instrumented code costs a function
+call per span.
+"""
+import asyncio
+import atexit
+import contextvars
+import functools
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('trace_span', default=None)
+_current_track: contextvars.ContextVar[int] = contextvars.ContextVar('trace_track', default=0)
+_track_ids = itertools.count(1)
+
+# Converts perf_counter_ns readings to microseconds since the epoch
+_EPOCH_OFFSET_NS = time.time_ns() - time.perf_counter_ns()
+
+_exporter: Optional['TraceExporter'] = None
+
+
+class TraceExporter:
+    """Buffers finished events and appends them to `path` in batches, rotating by size."""
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 3, batch_size: int = 256):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.pid = os.getpid()
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def record(self, event: Dict[str, Any]):
+        with self._lock:
+            self._buffer.append(event)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            events, self._buffer = self._buffer, []
+        if not events:
+            return
+        data = ''.join(json.dumps(event, ensure_ascii=False) + ',\n' for event in events)
+        with self._write_lock:
+            try:
+                if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                    self._rotate()
+                is_new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    if is_new:
+                        f.write('[\n')
+                    f.write(data)
+            except OSError as e:
+                logging.warning(f"無法寫入追蹤檔案 {self.path}: {e}")
+
+    def _rotate(self):
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+class Span:
+    """A timed operation with attributes. Use as a context manager."""
+    __slots__ = ('name', 'attributes', 'track', 'parent', 'open_children', '_start_ns', '_tokens')
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+        self.open_children = 0
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def __enter__(self) -> 'Span':
+        self.parent = _current_span.get()
+        self.track = _current_track.get()
+        if self.parent is not None:
+            if self.parent.open_children:
+                # A sibling is still running: draw this one on its own track
+                self.track = _new_track(self.parent.name)
+            self.parent.open_children += 1
+        self._tokens = (_current_span.set(self), _current_track.set(self.track))
+        self._start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        end_ns = time.perf_counter_ns()
+        span_token, track_token = self._tokens
+        _current_span.reset(span_token)
+        _current_track.reset(track_token)
+        if self.parent is not None:
+            self.parent.open_children -= 1
+        if exc_type is not None:
+            self.attributes['error'] = f"{exc_type.__name__}: {exc_val}"
+        exporter = _exporter
+        if exporter is not None:
+            exporter.record({
+                'name': self.name,
+                'ph': 'X',
+                'ts': (self._start_ns + _EPOCH_OFFSET_NS) // 1000,
+                'dur': (end_ns - self._start_ns) // 1000,
+                'pid': exporter.pid,
+                'tid': self.track,
+                'args': self.attributes,
+            })
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, key: str, value: Any):
+        pass
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attributes):
+    """Returns a span context manager, or a no-op when tracing is disabled."""
+    if _exporter is None:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+
+def _new_track(label: str) -> int:
+    track = next(_track_ids)
+    exporter = _exporter
+    if exporter is not None:
+        exporter.record({'name': 'thread_name', 'ph': 'M', 'pid': exporter.pid, 'tid': track, 'args': {'name': label}})
+    return track
+
+
+@contextmanager
+def track(label: str):
+    """Starts a new track (e.g. one per task run) for the spans opened inside the block."""
+    if _exporter is None:
+        yield
+        return
+    token = _current_track.set(_new_track(label))
+    try:
+        yield
+    finally:
+        _current_track.reset(token)
+
+
+def traced(name: str, attributes: Optional[Callable[..., Dict[str, Any]]] = None):
+    """
+    Decorates a function or coroutine function so each call is a span.
+
+    `attributes`, if given, is called with the same arguments as the function
+    and returns the span attributes.
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _exporter is None:
+                    return await func(*args, **kwargs)
+                with Span(name, attributes(*args, **kwargs) if attributes else {}):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _exporter is None:
+                return func(*args, **kwargs)
+            with Span(name, attributes(*args, **kwargs) if attributes else {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def configure_tracing(path: Optional[str], max_bytes: int = 10 * 1024 * 1024, backup_count: int = 3, batch_size: int = 256):
+    """Enables tracing to `path`, or disables it when `path` is empty."""
+    global _exporter
+    shutdown_tracing()
+    if path:
+        _exporter = TraceExporter(path, max_bytes, backup_count, batch_size)
+        logging.info(f"追蹤已啟用，輸出至 {path}")
+
+
+def flush_traces():
+    """Writes out any buffered events, e.g. at the end of a cycle."""
+    if _exporter is not None:
+        _exporter.flush()
+
+
+def shutdown_tracing():
+    """Flushes and disables tracing."""
+    global _exporter
+    if _exporter is not None:
+        _exporter.flush()
+        _exporter = None
+
+
+atexit.register(shutdown_tracing)